@@ -1,10 +1,38 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 from PIL import Image, ImageTk
-import json
 import os
 import threading
 import time
+import questionbank
+import slidecache
+import journal
+import eventlog
+import reportbuilder
+import scoring
+import stagetimer
+import monitors
+import warmup
+
+JOURNAL_TIME_INTERVAL = 5  # seconds between timer checkpoints in the journal
+COLLECTOR = os.environ.get("PROCTORY_COLLECTOR")  # "host:port" of the central collector
+PERF_STATS_FILE = "perf_stats.json"
+TRACKING_MODE = os.environ.get("PROCTORY_TRACKING", "process")  # "process" or "thread"
+try:  # per-candidate draw size, None = every question
+    QUESTIONS_PER_CANDIDATE = max(int(os.environ.get("PROCTORY_QUESTIONS", "0")), 0) or None
+except ValueError:
+    print(f"Ignoring PROCTORY_QUESTIONS={os.environ['PROCTORY_QUESTIONS']!r}: not a whole number")
+    QUESTIONS_PER_CANDIDATE = None
+TRACKING_OPTIONS = {"calibration_duration": 3, "yaw_tol": 25}
+PREVIEW_INTERVAL_MS = 40  # UI preview refresh, independent of the tracking frame rate
+WARMUP_POLL_MS = 250      # readiness refresh while tracking loads in the background
+TRACKING_STAGES = ("capture", "convert", "inference", "eyes", "mouth", "gaze", "pose", "rules", "overlay", "handoff")
+JOURNALED_EVENTS = {"eye_violation", "head_violation", "focus_lost", "camera_failure",
+                    "multiple_faces", "identity_changed", "eyes_closed", "candidate_speaking",
+                    "external_voice", "suspicion_alert"}
+ALERT_DISPLAY_SECONDS = 30  # a suspicion alert stays on the status panel this long
+WORKER_EVIDENCE_EVENTS = ("candidate_speaking", "external_voice")  # Published here, clipped by the tracking process
+EXAM_MONITORS = ("devices", "network", "processes")  # Background watchers (see monitors.py)
 
 class ProctorYApp:
     def __init__(self, root):
@@ -30,6 +58,8 @@ class ProctorYApp:
         self.slides = []
         self.current_slide = 0
         self.questions = []
+        self.questions_per_candidate = QUESTIONS_PER_CANDIDATE  # None = every question in the bank
+        self.question_seed = None
         self.answers = {}
         self.bookmarked_questions = set()
         self.exam_duration = 30 * 60  # 30 minutes in seconds
@@ -37,13 +67,33 @@ class ProctorYApp:
         self.timer_running = False
         self.timer_thread = None
         self.monitoring_windows = {}  # Track open monitoring windows
+        self.journal = None  # Crash-safe record of the running exam
+        self.event_writer = None  # Durable log of every monitor event
+        self.shipper = None  # Streams events to the central collector, if configured
+        self.focus_lost_at = None
+        self.stage_timer = stagetimer.StageTimer(TRACKING_STAGES)
+        self.tracking_worker = None  # Eye/head tracking process, see trackworker
+        self.tracking_stats = None   # Latest stage timings reported by that process
+        self.warmup = None           # Background loading of camera/face tracking
+        self.camera_failures = {}    # Outage reason -> count, from camera watchdog events
+        self.camera_downtime = 0.0   # Seconds of finished outages
+        self.camera_down_since = None
+        self.talking = None          # talking.TalkingFusion: lips + microphone, during the exam
+        self.scorer = None           # scoring.SuspicionScorer: live weighted score of the event stream
+        self.last_alert = None       # (ts, score, top signals) of the latest suspicion alert
+        self.submitting = False
         
         # Load content
         self.load_slides("slides")
         self.load_questions()
+        if self.questions:
+            self.start_warmup()
         
-        # Start with slide presentation or exam based on content availability
-        if self.slides:
+        # Resume an interrupted exam straight away, otherwise start with the
+        # slide presentation or exam based on content availability
+        if self.questions and journal.load_session():
+            self.start_exam()
+        elif self.slides:
             self.show_slide()
         elif self.questions:
             self.show_begin_exam()
@@ -59,15 +109,25 @@ class ProctorYApp:
             for file in sorted(os.listdir(folder)):
                 if file.lower().endswith((".png", ".jpg", ".jpeg")):
                     self.slides.append(os.path.join(folder, file))
+        if self.slides:
+            # Decode the first slides in the background while the window opens
+            self.slide_cache = slidecache.SlideCache(self.slides)
+            self.slide_cache.prefetch(0)
 
     def load_questions(self):
-        """Load questions from JSON file"""
-        if os.path.exists("questions.json"):
-            try:
-                with open("questions.json", "r") as f:
-                    self.questions = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                self.questions = []
+        """Open the indexed question bank (questions.jsonl or questions.json)"""
+        try:
+            bank = questionbank.open_question_bank()
+        except (ValueError, OSError):
+            bank = None
+        if not bank:
+            self.questions = []
+            return
+        if self.questions_per_candidate:
+            # Per-candidate draw: only the index is touched, nothing is parsed
+            self.question_seed = int.from_bytes(os.urandom(8), "little")
+            bank = bank.sample(self.questions_per_candidate, self.question_seed)
+        self.questions = bank
 
     # ============================
     # UI COMPONENTS
@@ -193,7 +253,9 @@ class ProctorYApp:
             ("Devices", self.show_devices_monitor),
             ("Network", self.show_network_monitor),
             ("Background Apps", self.show_background_apps),
-            ("Eye/Head Tracking", self.show_eyehead_tracking)
+            ("Eye/Head Tracking", self.show_eyehead_tracking),
+            ("Perf Stats", self.show_perf_stats),
+            ("Dump Perf", self.dump_perf_stats)
         ]
         for i, (text, cmd) in enumerate(script_buttons):
             btn = tk.Button(btn_frame, text=text, font=("Arial", 8),
@@ -229,13 +291,32 @@ class ProctorYApp:
                         fg=self.colors["text_secondary"],
                         justify="center")
         self.video_label.pack(expand=True)
+
+        # Status indicators at bottom
+        status_frame = tk.Frame(self.monitor_frame, bg=self.colors["bg_secondary"])
+        status_frame.pack(fill="x", padx=5, pady=5)
+        
+        tk.Label(status_frame, text="System Status",
+                font=("Arial", 9, "bold"),
+                bg=self.colors["bg_secondary"],
+                fg=self.colors["text_secondary"]).pack()
+        
+        self.status_labels = {}
+        statuses = ["Face: ✓", "Network: ✓", "Focus: ✓", "Suspicion: 0"]
+        for status in statuses:
+            label = tk.Label(status_frame, text=status,
+                           font=("Arial", 8),
+                           bg=self.colors["bg_secondary"],
+                           fg=self.colors["success"])
+            label.pack()
+            self.status_labels[status] = label
+
     # --- Script integration methods ---
     def show_devices_monitor(self):
         self.monitoring_output.pack(fill="x", pady=(5, 0))
         self.monitoring_text.delete(1.0, tk.END)
         try:
-            import connectedperipherals
-            devices = connectedperipherals.get_connected_peripherals()
+            devices = monitors.registry.module("devices").get_connected_peripherals()
             self.monitoring_text.insert(tk.END, "Connected Devices:\n" + "\n".join(devices))
         except Exception as e:
             self.monitoring_text.insert(tk.END, f"Error: {e}")
@@ -244,8 +325,7 @@ class ProctorYApp:
         self.monitoring_output.pack(fill="x", pady=(5, 0))
         self.monitoring_text.delete(1.0, tk.END)
         try:
-            import network
-            conns = network.get_active_connections()
+            conns = monitors.registry.module("network").get_active_connections()
             lines = [f"{c['remote_ip']}:{c['remote_port']}" for c in conns]
             self.monitoring_text.insert(tk.END, "Active Connections:\n" + "\n".join(lines) if lines else "No active connections.")
         except Exception as e:
@@ -255,7 +335,7 @@ class ProctorYApp:
         self.monitoring_output.pack(fill="x", pady=(5, 0))
         self.monitoring_text.delete(1.0, tk.END)
         try:
-            import back
+            back = monitors.registry.module("processes")
             from io import StringIO
             import sys
             old_stdout = sys.stdout
@@ -267,145 +347,177 @@ class ProctorYApp:
             self.monitoring_text.insert(tk.END, f"Error: {e}")
 
     def show_eyehead_tracking(self):
-        # Start a thread to run the OpenCV loop and update the video_label with frames
+        # Run the OpenCV loop in a worker process (or a thread) and update the video_label with frames
+        if self.tracking_worker is not None:
+            return  # Already running
         if hasattr(self, '_eyehead_thread') and self._eyehead_thread.is_alive():
             return  # Already running
         self.video_label.config(text="Starting camera...")
+        engine = self.warmup.take("tracking") if self.warmup else None
+        if TRACKING_MODE == "process":
+            import trackworker
+            self.tracking_stats = None
+            if engine is not None:
+                engine.begin(self.tracking_options())
+                self.tracking_worker = engine
+            else:
+                self.tracking_worker = trackworker.TrackingWorker(options=self.tracking_options()).start()
+            self.root.after(PREVIEW_INTERVAL_MS, self._poll_tracking)
+            return
         import threading
-        self._eyehead_thread = threading.Thread(target=self._run_eyehead_tracking, daemon=True)
+        self._eyehead_thread = threading.Thread(target=self._run_eyehead_tracking, args=(engine,),
+                                                name="eyehead-tracking", daemon=True)
         self._eyehead_thread.start()
 
-    def _run_eyehead_tracking(self):
+    def start_warmup(self):
+        """Load camera and face tracking in the background during the intro screens"""
+        if TRACKING_MODE == "process":
+            load, release = lambda: warmup.load_tracking_worker(TRACKING_OPTIONS), lambda w: w.stop()
+        else:
+            load, release = lambda: warmup.load_tracking_engine(TRACKING_OPTIONS), warmup.release_tracking_engine
+        self.warmup = warmup.Warmup().add("tracking", load, release, "Camera & face tracking")
+        if monitors.registry.plugins["audio"].available():
+            self.warmup.add("audio", warmup.load_audio_stream, warmup.release_audio_stream, "Microphone")
+        self.warmup.start()
+
+    def create_warmup_status(self, parent):
+        """Readiness line for the intro screens, refreshed until everything loaded"""
+        if self.warmup is None:
+            return
+        label = tk.Label(parent, font=("Arial", 9), justify="center",
+                         bg=self.colors["bg_primary"], fg=self.colors["text_secondary"])
+        label.pack(pady=(5, 0))
+
+        def refresh():
+            if not label.winfo_exists():
+                return
+            text, finished = self.warmup.summary()
+            label.config(text=text, fg=self.colors["success" if finished else "text_secondary"])
+            if not finished:
+                self.root.after(WARMUP_POLL_MS, refresh)
+        refresh()
+
+    def start_tracking_when_ready(self):
+        """Hand the warmed-up tracking engine to the exam once it is loaded"""
+        if not self.timer_running:
+            return  # Exam already over
+        if self.warmup is not None and not self.warmup.done("tracking"):
+            self.video_label.config(text="Loading camera and face tracking...")
+            self.root.after(WARMUP_POLL_MS, self.start_tracking_when_ready)
+            return
+        self.show_eyehead_tracking()
+
+    def tracking_options(self):
+        """Tracker settings, recording landmarks and evidence clips into this session's event folder"""
+        options = dict(TRACKING_OPTIONS)
+        if getattr(self, "event_folder", None):
+            import landmarkrec
+            options["record_path"] = landmarkrec.new_recording_path(self.event_folder)
+            options["evidence_folder"] = self.event_folder
+        return options
+
+    def _poll_tracking(self):
+        """Drain the tracking process: re-publish its events, show its newest frame"""
+        worker = self.tracking_worker
+        if worker is None:
+            return
+        for record in worker.poll():
+            if record[0] == "event":
+                _, ts, kind, detail, value = record
+                eventlog.publish(kind, detail, value, ts)
+                if kind == "camera_failure":
+                    self.video_label.config(image="", text=f"Camera lost ({detail}), reconnecting...")
+            elif record[0] == "frame":
+                if self.talking:
+                    self.talking.add_mouth(record[9], record[8])
+            elif record[0] == "stats":
+                self.tracking_stats = record[1]
+            elif record[0] == "error":
+                self.video_label.config(image="", text=f"Error: {record[1]}")
+        frame = worker.read_preview()
+        if frame is not None and self.video_label.winfo_exists():
+            imgtk = ImageTk.PhotoImage(image=Image.fromarray(frame))
+            self.video_label.imgtk = imgtk
+            self.video_label.config(image=imgtk, text="")
+        if worker.done:
+            self.stop_tracking()
+            if self.video_label.winfo_exists() and self.video_label.cget("image"):
+                self.video_label.config(image="", text="Click 'Eye/Head Tracking' to start")
+            return
+        self.root.after(PREVIEW_INTERVAL_MS, self._poll_tracking)
+
+    def stop_tracking(self, on_stopped=None):
+        """Stop the tracking process off the Tk thread; `on_stopped` runs on the Tk thread after"""
+        worker, self.tracking_worker = self.tracking_worker, None
+        if worker is None:
+            if on_stopped:
+                on_stopped()
+            return
+
+        def forward():
+            records = worker.poll()
+            while records:
+                for record in records:
+                    if record[0] == "event":
+                        _, ts, kind, detail, value = record
+                        eventlog.publish(kind, detail, value, ts)
+                    elif record[0] == "stats":
+                        self.tracking_stats = record[1]
+                records = worker.poll()
+
+        def stop():
+            forward()
+            worker.stop()
+            forward()  # Whatever it sent while shutting down
+            if on_stopped:
+                self.root.after(0, on_stopped)
+
+        threading.Thread(target=stop, name="tracking-stop", daemon=True).start()
+
+    def _run_eyehead_tracking(self, engine=None):
         try:
             import cv2
-            import mediapipe as mp
-            import numpy as np
-            from collections import deque
-            mp_face_mesh = mp.solutions.face_mesh
-            face_mesh = mp_face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True)
-            LEFT_EYE_IDX = [33, 133]
-            RIGHT_EYE_IDX = [362, 263]
-            LEFT_IRIS_IDX = 468
-            RIGHT_IRIS_IDX = 473
-            cap = cv2.VideoCapture(0)
-            dx_buffer, dy_buffer = deque(maxlen=5), deque(maxlen=5)
-            h_center = v_center = None
-            calibrated = False
-            horizontal_values = []
-            vertical_values = []
-            start_time = time.time()
-            CALIBRATION_DURATION = 3
-            HORIZONTAL_TOL = 0.06
-            VERTICAL_TOL = 0.06
-            HEAD_TOL = 80
-            HEAD_ANGLE_TOL = 2
-            OUTSIDE_FRAMES_REQUIRED = 10
-            outside_eye_frame_count = 0
-            outside_head_frame_count = 0
-            eye_violation_counter = 0
-            head_violation_counter = 0
-            def get_gaze_offset(landmarks, eye_indices, iris_idx, image_w, image_h):
-                eye_left = np.array([landmarks[eye_indices[0]].x * image_w,
-                                     landmarks[eye_indices[0]].y * image_h])
-                eye_right = np.array([landmarks[eye_indices[1]].x * image_w,
-                                      landmarks[eye_indices[1]].y * image_h])
-                eye_center = (eye_left + eye_right) / 2.0
-                iris = np.array([landmarks[iris_idx].x * image_w,
-                                 landmarks[iris_idx].y * image_h])
-                eye_width = np.linalg.norm(eye_right - eye_left)
-                eye_height = eye_width / 2
-                dx = (iris[0] - eye_center[0]) / eye_width
-                dy = (iris[1] - eye_center[1]) / eye_height
-                return dx, dy
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                frame = cv2.flip(frame, 1)
-                h, w, _ = frame.shape
-                results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                if results.multi_face_landmarks:
-                    landmarks = results.multi_face_landmarks[0].landmark
-                    l_dx, l_dy = get_gaze_offset(landmarks, LEFT_EYE_IDX, LEFT_IRIS_IDX, w, h)
-                    r_dx, r_dy = get_gaze_offset(landmarks, RIGHT_EYE_IDX, RIGHT_IRIS_IDX, w, h)
-                    avg_dx = (l_dx + r_dx) / 2
-                    avg_dy = (l_dy + r_dy) / 2
-                    dx_buffer.append(avg_dx)
-                    dy_buffer.append(avg_dy)
-                    smooth_dx = np.mean(dx_buffer)
-                    smooth_dy = np.mean(dy_buffer)
-                    nose = landmarks[1]
-                    nose_x, nose_y = int(nose.x * w), int(nose.y * h)
-                    center_x, center_y = w // 2, h // 2
-                    current_time = time.time()
-                    if not calibrated:
-                        horizontal_values.append(smooth_dx)
-                        vertical_values.append(smooth_dy)
-                        if current_time - start_time >= CALIBRATION_DURATION:
-                            h_center = np.median(horizontal_values)
-                            v_center = np.median(vertical_values)
-                            calibrated = True
-                        cv2.putText(frame, f'Calibrating... ({int(current_time - start_time)}s)',
-                                    (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 1)
-                    else:
-                        if (abs(smooth_dx - h_center) > HORIZONTAL_TOL or abs(smooth_dy - v_center) > VERTICAL_TOL):
-                            outside_eye_frame_count += 1
-                            if outside_eye_frame_count >= OUTSIDE_FRAMES_REQUIRED:
-                                eye_violation_counter += 1
-                                outside_eye_frame_count = 0
-                        else:
-                            outside_eye_frame_count = 0
-                        if np.linalg.norm([nose_x - center_x, nose_y - center_y]) > HEAD_TOL:
-                            outside_head_frame_count += 1
-                            if outside_head_frame_count >= OUTSIDE_FRAMES_REQUIRED:
-                                head_violation_counter += 1
-                                outside_head_frame_count = 0
-                        else:
-                            outside_head_frame_count = max(0, outside_head_frame_count - 1)
-                        left_eye = np.array([landmarks[LEFT_EYE_IDX[0]].x * w, landmarks[LEFT_EYE_IDX[0]].y * h])
-                        right_eye = np.array([landmarks[RIGHT_EYE_IDX[0]].x * w, landmarks[RIGHT_EYE_IDX[0]].y * h])
-                        eye_vector = right_eye - left_eye
-                        head_angle = np.degrees(np.arctan2(eye_vector[1], eye_vector[0]))
-                        head_x_min = int(min(left_eye[0], right_eye[0], nose_x))
-                        head_x_max = int(max(left_eye[0], right_eye[0], nose_x))
-                        head_y_min = int(min(left_eye[1], right_eye[1], nose_y))
-                        head_y_max = int(max(left_eye[1], right_eye[1], nose_y))
-                        cv2.rectangle(frame, (head_x_min, head_y_min), (head_x_max, head_y_max), (0, 255, 0), 2)
-                        if abs(head_angle) > HEAD_ANGLE_TOL:
-                            outside_head_frame_count += 1
-                            if outside_head_frame_count >= OUTSIDE_FRAMES_REQUIRED:
-                                head_violation_counter += 1
-                                outside_head_frame_count = 0
-                        else:
-                            outside_head_frame_count = max(0, outside_head_frame_count - 1)
-                        cv2.putText(frame, f"Head Angle: {head_angle:.2f} deg", (50, 120),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-                        cv2.putText(frame, "Tracking...", (50, 50),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 1)
-                    cv2.putText(frame, f"dx:{smooth_dx:.2f} dy:{smooth_dy:.2f}", (50, 100),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 1)
-                    cv2.putText(frame, f"Eye Violations: {eye_violation_counter}", (w-300, 50),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,255), 1)
-                    cv2.putText(frame, f"Head Violations: {head_violation_counter}", (w-300, 80),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,0,0), 1)
-                    cv2.circle(frame, (nose_x, nose_y), 5, (255,255,0), -1)
-                    cv2.circle(frame, (center_x, center_y), 5, (0,255,255), -1)
-                else:
-                    cv2.putText(frame, "Eyes not detected", (50, 50),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 1)
-                # Convert frame to Tkinter image and update video_label
-                img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                from PIL import Image, ImageTk
-                im = Image.fromarray(img)
-                im = im.resize((320, 240))
-                imgtk = ImageTk.PhotoImage(image=im)
-                def update_img():
-                    self.video_label.imgtk = imgtk
-                    self.video_label.config(image=imgtk, text="")
-                self.video_label.after(0, update_img)
-                if cv2.waitKey(5) & 0xFF == ord('q'):
-                    break
-            cap.release()
+            import eyehead
+            timer = self.stage_timer
+            face_mesh, cap = engine or (None, None)
+            tracker = eyehead.EyeHeadTracker(face_mesh=face_mesh, timer=timer, **self.tracking_options())
+            if cap is None:
+                import capture
+                cap = capture.watch_camera(0, tracker.face_mesh)
+            profiler = stagetimer.start_profiler()
+            try:
+                while cap.isOpened():
+                    timer.start()
+                    ret, frame = cap.read()
+                    captured = time.monotonic()
+                    timer.lap("capture")
+                    if not ret:
+                        if cap.failure is not None:
+                            def show_outage(reason=cap.failure):
+                                self.video_label.config(image="", text=f"Camera {reason}, reconnecting...")
+                            self.video_label.after(0, show_outage)
+                        continue  # The watchdog reconnects; isOpened() ends files
+                    frame = cv2.flip(frame, 1)
+                    result = tracker.process(frame)
+                    if self.talking:
+                        self.talking.add_mouth(captured, result.get("mouth"))
+                    tracker.draw(frame, result)
+                    # Convert frame to Tkinter image and update video_label
+                    im = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                    im = im.resize((320, 240))
+                    imgtk = ImageTk.PhotoImage(image=im)
+                    def update_img(imgtk=imgtk):
+                        self.video_label.imgtk = imgtk
+                        self.video_label.config(image=imgtk, text="")
+                    self.video_label.after(0, update_img)
+                    timer.lap("handoff")
+                    timer.frame_done()
+                    if cv2.waitKey(5) & 0xFF == ord('q'):
+                        break
+            finally:
+                cap.release()
+                tracker.close()
+                stagetimer.stop_profiler(profiler)
             cv2.destroyAllWindows()
             def reset_img():
                 self.video_label.config(image="", text="Click 'Eye/Head Tracking' to start")
@@ -414,25 +526,40 @@ class ProctorYApp:
             def show_err():
                 self.video_label.config(image="", text=f"Error: {e}")
             self.video_label.after(0, show_err)
-        
-        # Status indicators at bottom
-        status_frame = tk.Frame(self.monitor_frame, bg=self.colors["bg_secondary"])
-        status_frame.pack(fill="x", padx=5, pady=5)
-        
-        tk.Label(status_frame, text="System Status",
-                font=("Arial", 9, "bold"),
-                bg=self.colors["bg_secondary"],
-                fg=self.colors["text_secondary"]).pack()
-        
-        self.status_labels = {}
-        statuses = ["Face: ✓", "Network: ✓", "Focus: ✓"]
-        for status in statuses:
-            label = tk.Label(status_frame, text=status,
-                           font=("Arial", 8),
-                           bg=self.colors["bg_secondary"],
-                           fg=self.colors["success"])
-            label.pack()
-            self.status_labels[status] = label
+
+    def show_perf_stats(self):
+        """Per-stage latency of the tracking loop in the monitor panel"""
+        self.monitoring_output.pack(fill="x", pady=(5, 0))
+        self.monitoring_text.delete(1.0, tk.END)
+        snap = self.tracking_stats or self.stage_timer.snapshot()
+        if not snap["frames"]:
+            self.monitoring_text.insert(tk.END, "No frames timed yet. Start Eye/Head Tracking first.")
+            return
+        self.monitoring_text.insert(tk.END, stagetimer.format_snapshot(snap))
+        if snap.get("baselines"):
+            self.monitoring_text.insert(tk.END, "\nBaselines: " + ", ".join(
+                f"{name}={value}" for name, value in snap["baselines"].items()))
+        eyes = snap.get("eyes")
+        if eyes:
+            self.monitoring_text.insert(tk.END, f"\nEyes: {eyes['blink_rate']:.0f} blinks/min, "
+                                                f"{eyes['long_closures']} long closures ({eyes['closed_seconds']}s closed)")
+        self.monitoring_text.insert(tk.END, "\nMonitors: " + ", ".join(
+            f"{m['name']} ({'running' if m['running'] else 'idle'}, import {m['load_ms']} ms)"
+            for m in monitors.registry.status() if m["loaded"]))
+
+    def dump_perf_stats(self):
+        """Save the tracking stage timings for offline comparison"""
+        self.monitoring_output.pack(fill="x", pady=(5, 0))
+        self.monitoring_text.delete(1.0, tk.END)
+        try:
+            if self.tracking_stats:  # Timed in the tracking process
+                path = PERF_STATS_FILE
+                journal.atomic_write_json(path, self.tracking_stats, indent=4)
+            else:
+                path = self.stage_timer.dump(PERF_STATS_FILE)
+            self.monitoring_text.insert(tk.END, f"Stage timings written to {os.path.abspath(path)}")
+        except OSError as e:
+            self.monitoring_text.insert(tk.END, f"Error: {e}")
 
     # ============================
     # TIMER FUNCTIONALITY
@@ -450,6 +577,9 @@ class ProctorYApp:
             if self.timer_running:
                 self.time_remaining -= 1
                 self.update_timer_display()
+                self.update_suspicion_display()
+                if self.journal and self.time_remaining % JOURNAL_TIME_INTERVAL == 0:
+                    self.journal.record_time(self.time_remaining)
         
         if self.time_remaining <= 0:
             self.root.after(0, self.time_up)
@@ -471,6 +601,26 @@ class ProctorYApp:
             
             self.timer_display.config(text=time_str, fg=color)
 
+    def update_suspicion_display(self):
+        """Live windowed suspicion score; after an alert, its main signals in red"""
+        label = getattr(self, "status_labels", {}).get("Suspicion: 0")
+        if label is None or self.scorer is None or not label.winfo_exists():
+            return
+        now = time.time()
+        score = self.scorer.current(now)
+        alert = self.last_alert
+        if alert is not None and now - alert[0] < ALERT_DISPLAY_SECONDS:
+            signals = "\n".join(alert[2].split(", "))
+            label.config(text=f"⚠️ Suspicion alert: {score:.0f}\n{signals}", fg=self.colors["danger"])
+            return
+        if score >= self.scorer.threshold:
+            color = self.colors["danger"]
+        elif score >= self.scorer.threshold * scoring.REARM_FRACTION:
+            color = self.colors["warning"]
+        else:
+            color = self.colors["success"]
+        label.config(text=f"Suspicion: {score:.0f}", fg=color)
+
     def time_up(self):
         """Handle time up scenario"""
         self.timer_running = False
@@ -492,16 +642,10 @@ class ProctorYApp:
             content_frame.pack(fill="both", expand=True, padx=40, pady=20)
             
             try:
-                img = Image.open(self.slides[self.current_slide])
-                # Maintain aspect ratio while fitting in frame
-                img_width, img_height = img.size
-                max_width, max_height = 800, 500
-                ratio = min(max_width/img_width, max_height/img_height)
-                new_size = (int(img_width * ratio), int(img_height * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-                
-                tk_img = ImageTk.PhotoImage(img)
-                
+                # Slides are decoded and resized ahead of time by the cache
+                tk_img = self.slide_cache.photo(self.current_slide)
+                self.slide_cache.prefetch(self.current_slide + 1)
+
                 img_label = tk.Label(content_frame, image=tk_img, bg=self.colors["bg_primary"])
                 img_label.image = tk_img  # Keep reference
                 img_label.pack(pady=20)
@@ -518,7 +662,10 @@ class ProctorYApp:
             nav_frame.pack(pady=20)
             
             self.create_button(nav_frame, "Next Slide", self.next_slide).pack()
+            self.create_warmup_status(nav_frame)
         else:
+            if hasattr(self, 'slide_cache'):
+                self.slide_cache.close()
             self.show_begin_exam()
 
     def next_slide(self):
@@ -620,6 +767,7 @@ By clicking "I Agree & Start", you acknowledge understanding and acceptance of t
         
         self.create_button(btn_frame, "I Agree & Start Exam", self.start_exam, 
                           "danger", 30).pack()
+        self.create_warmup_status(btn_frame)
 
     def show_no_content(self):
         """Show when no slides or questions are available"""
@@ -638,11 +786,11 @@ By clicking "I Agree & Start", you acknowledge understanding and acceptance of t
                 fg=self.colors["warning"]).pack(pady=30)
 
         message_text = """No presentation slides found in 'slides' folder
-No questions found in 'questions.json' file
+No questions found in 'questions.jsonl' or 'questions.json'
 
 Please ensure your content files are in the correct location:
 • Slides: slides/slide1.png, slides/slide2.jpg, etc.
-• Questions: questions.json"""
+• Questions: questions.jsonl (one question per line) or questions.json"""
 
         tk.Label(message_frame, text=message_text,
                 font=("Arial", 12),
@@ -691,15 +839,139 @@ Please ensure your content files are in the correct location:
         self.root.bind("<KeyPress>", self.check_forbidden_keys)
         self.root.focus_set()  # Ensure window has focus
 
-        # Reset exam state
+        # Reset exam state, or restore it from the journal after a crash
         self.current_q = 0
         self.answers = {}
+        self.bookmarked_questions = set()
         self.time_remaining = self.exam_duration
+        question_ids = (self.questions.ids() if hasattr(self.questions, "ids")
+                        else list(range(len(self.questions))))
+        state = journal.load_session()
+        if state and not self.restore_session(state):
+            state = None
+        if state:
+            self.journal = journal.ExamJournal(state=state)
+        else:
+            self.journal = journal.ExamJournal()
+            self.journal.start(question_ids, self.question_seed, self.exam_duration)
         
         # Create exam layout and start timer
         self.create_exam_layout()
+        self.start_event_log()
         self.start_timer()
         self.show_question()
+        self.start_tracking_when_ready()
+
+    # ============================
+    # EVENT LOGGING
+    # ============================
+    def start_event_log(self):
+        """Log every monitor event of this session and start background watchers"""
+        session_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.journal.state["started"]))
+        self.event_folder = os.path.join(eventlog.EVENT_DIR, session_id)
+        self.event_writer = eventlog.EventLogWriter(self.event_folder)
+        eventlog.bus.subscribe(self.on_monitor_event)
+        config = scoring.load_config()
+        self.scorer = eventlog.bus.subscribe(
+            scoring.SuspicionScorer(config["weights"], config["window"], config["threshold"]))
+        if COLLECTOR:
+            import shipper, socket
+            host, _, port = COLLECTOR.rpartition(":")
+            self.shipper = shipper.EventShipper(f"{socket.gethostname()}-{session_id}",
+                                                host or "127.0.0.1", int(port))
+        eventlog.publish("monitor_started", "exam")
+
+        self.root.bind("<FocusOut>", self.on_focus_out)
+        self.root.bind("<FocusIn>", self.on_focus_in)
+
+        for name in EXAM_MONITORS:
+            monitors.registry.start(name)
+        import talking
+        self.talking = talking.TalkingFusion()
+        if monitors.registry.plugins["audio"].available():
+            # Loudness only: talking fusion publishes speech as intervals, a
+            # per-chunk sound_violation would be ~43 events a second
+            monitors.registry.start("audio", threshold=None, on_level=self.talking.add_audio,
+                                    audio=self.warmup.take("audio") if self.warmup else None)
+
+    def stop_event_log(self):
+        """Stop watchers and flush the event log"""
+        monitors.registry.stop_all(timeout=0)  # Don't block the UI; watchers exit at their next wait
+        if self.talking:
+            self.talking.close()
+            self.talking = None
+        if self.event_writer:
+            eventlog.publish("monitor_stopped", "exam")
+            eventlog.bus.unsubscribe(self.on_monitor_event)
+            eventlog.bus.unsubscribe(self.scorer)
+            self.event_writer.close()
+            self.event_writer = None
+        if self.shipper:
+            self.shipper.close(timeout=2.0)  # Anything unsent stays spooled for next start
+            self.shipper = None
+
+    def on_monitor_event(self, event):
+        """Mirror violations into the exam journal (runs on the publishing thread)"""
+        ts, kind, detail, value = event
+        if kind in JOURNALED_EVENTS and self.journal:
+            self.journal.record_violation(kind, detail)
+        worker = self.tracking_worker
+        if kind in WORKER_EVIDENCE_EVENTS and worker is not None:
+            worker.trigger_evidence(kind, detail, ts)
+        if kind == "camera_failure":
+            reason = detail.rpartition(": ")[2]
+            self.camera_failures[reason] = self.camera_failures.get(reason, 0) + 1
+            self.camera_down_since = ts
+        elif kind == "camera_recovered":
+            self.camera_downtime += value
+            self.camera_down_since = None
+        elif kind == "suspicion_alert":
+            self.last_alert = (ts, value, detail)
+            self.root.after(0, self.update_suspicion_display)
+
+    def on_focus_out(self, event=None):
+        # FocusOut also fires when focus moves between our own widgets
+        self.root.after(50, self._check_focus)
+
+    def _check_focus(self):
+        try:
+            focused = self.root.focus_displayof()
+        except (KeyError, tk.TclError):
+            focused = None
+        if focused is None and self.focus_lost_at is None and self.event_writer:
+            self.focus_lost_at = time.time()
+            eventlog.publish("focus_lost")
+
+    def on_focus_in(self, event=None):
+        if self.focus_lost_at is not None:
+            eventlog.publish("focus_gained", value=time.time() - self.focus_lost_at)
+            self.focus_lost_at = None
+
+    def restore_session(self, state):
+        """Restore answers, position and timer from a replayed journal"""
+        ids = state["question_ids"]
+        try:
+            if hasattr(self.questions, "subset"):
+                self.questions = self.questions.subset(ids)
+            elif ids != list(range(len(self.questions))):
+                return False
+        except ValueError:
+            return False  # Bank changed since the session started
+        self.question_seed = state["seed"]
+        self.answers = {int(q): v for q, v in state["answers"].items()}
+        self.bookmarked_questions = set(state["bookmarks"])
+        self.current_q = min(state["current_q"], len(self.questions) - 1)
+        if state["time_remaining"] is not None:
+            self.time_remaining = state["time_remaining"]
+        return True
+
+    def on_answer_selected(self, *args):
+        """Journal every answer change as soon as an option is picked"""
+        value = self.var.get()
+        if value:
+            self.answers[self.current_q] = value
+            if self.journal:
+                self.journal.record_answer(self.current_q, value)
 
     def show_question(self):
         """Display current question in exam mode"""
@@ -771,6 +1043,8 @@ Please ensure your content files are in the correct location:
 
         if self.current_q < len(self.questions):
             q = self.questions[self.current_q]
+            if self.journal:
+                self.journal.record_position(self.current_q)
 
             # Question header with navigation
             header_frame = tk.Frame(self.main_frame, bg=self.colors["bg_primary"])
@@ -818,6 +1092,7 @@ Please ensure your content files are in the correct location:
 
             # Options
             self.var = tk.StringVar(value=self.answers.get(self.current_q, ""))
+            self.var.trace_add("write", self.on_answer_selected)
             options_frame = tk.Frame(question_frame, bg=self.colors["bg_secondary"])
             options_frame.pack(fill="x", padx=50, pady=20)
 
@@ -906,6 +1181,8 @@ Please ensure your content files are in the correct location:
             self.bookmarked_questions.remove(self.current_q)
         else:
             self.bookmarked_questions.add(self.current_q)
+        if self.journal:
+            self.journal.record_bookmark(self.current_q, self.current_q in self.bookmarked_questions)
         self.show_question()  # Refresh to update bookmark display
 
     def show_question_overview(self):
@@ -1029,21 +1306,33 @@ Connect your network monitoring script here""",
 📊 Noise threshold: <60dB
 Connect your audio monitoring script here""",
             
-            "failures": """⚠️ System Failure Monitor:
-• Network Disconnections: 0
-• Camera Failures: 0
-• System Crashes: 0
-• Unauthorized Access: 0
-• Window Focus Lost: 0
-• Process Terminations: 0
-
-✅ All systems operating normally
-Connect your failure detection script here"""
+            "failures": self.failure_report(),
         }
         
         self.monitoring_text.insert(tk.END, monitor_data.get(monitor_type, "No data available"))
         self.monitoring_windows[monitor_type] = True
 
+    def failure_report(self):
+        """Failure panel text from the camera watchdog and focus events of this session"""
+        downtime = self.camera_downtime
+        if self.camera_down_since is not None:
+            downtime += time.time() - self.camera_down_since
+        reasons = ", ".join(f"{reason} {n}" for reason, n in sorted(self.camera_failures.items()))
+        lines = [
+            "⚠️ System Failure Monitor:",
+            f"• Camera Failures: {sum(self.camera_failures.values())}" + (f" ({reasons})" if reasons else ""),
+            f"• Camera Downtime: {downtime:.1f}s",
+            f"• Window Focus Lost: {eventlog.bus.counts.get('focus_lost', 0)}",
+            "",
+        ]
+        if self.camera_down_since is not None:
+            lines.append("❌ Camera is down, reconnecting...")
+        elif self.camera_failures:
+            lines.append("✅ Camera recovered")
+        else:
+            lines.append("✅ All systems operating normally")
+        return "\n".join(lines)
+
     def close_monitoring(self):
         """Close monitoring output"""
         self.monitoring_output.pack_forget()
@@ -1083,8 +1372,17 @@ Connect your failure detection script here"""
         if event.keysym in ['Tab', 'r', 'l', 'd', 'e', 'i', 'x', 's'] and (state & 0x40000):
             return "break"
     def submit_exam(self):
-        """Submit exam and show results"""
+        """Submit exam and show results once tracking has handed over its last events"""
+        if self.submitting:
+            return
+        self.submitting = True
         self.timer_running = False
+        self.stop_tracking(on_stopped=self._finish_submit)
+
+    def _finish_submit(self):
+        if self.warmup is not None:
+            self.warmup.close()  # Anything loaded but never used
+        self.stop_event_log()
         
         # Exit lockdown mode
         self.root.attributes("-fullscreen", False)
@@ -1099,6 +1397,20 @@ Connect your failure detection script here"""
         # Generate report
         percentage = (score / len(self.questions)) * 100 if self.questions else 0
         time_taken = self.exam_duration - self.time_remaining
+
+        # Monitoring timeline built from the recorded event stream
+        monitoring_flags = ["Monitoring log unavailable"]
+        suspicion_path = None
+        suspicion_score = self.scorer.summary() if self.scorer else None
+        if getattr(self, "event_folder", None):
+            try:
+                suspicion = reportbuilder.build_report(self.event_folder)
+                suspicion_path = os.path.join(self.event_folder, "suspicion_report.json")
+                journal.atomic_write_json(suspicion_path, suspicion, indent=4)
+                monitoring_flags = suspicion["summary"]
+                suspicion_score = suspicion["suspicion_score"]  # Re-scored from the complete log
+            except Exception as e:
+                print(f"Error building monitoring report: {e}")
         
         report = {
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -1108,18 +1420,17 @@ Connect your failure detection script here"""
             "time_taken_minutes": round(time_taken / 60, 1),
             "time_remaining_minutes": round(self.time_remaining / 60, 1),
             "status": self.get_status(percentage),
-            "monitoring_flags": [
-                "Face detection: Active",
-                "Network monitoring: Stable", 
-                "Window focus: Maintained",
-                "Suspicious activity: None detected"
-            ]
+            "monitoring_flags": monitoring_flags,
+            "suspicion_score": suspicion_score,
+            "suspicion_report": suspicion_path
         }
 
-        # Save report
+        # Save report atomically; the journal is only discarded once it exists
         try:
-            with open("exam_report.json", "w") as f:
-                json.dump(report, f, indent=4)
+            journal.atomic_write_json("exam_report.json", report, indent=4)
+            if self.journal:
+                self.journal.finish()
+                self.journal = None
         except Exception as e:
             print(f"Error saving report: {e}")
 
@@ -1,8 +1,9 @@
 import psutil
-from prettytable import PrettyTable
 import time
+import eventlog
 
 def list_background_applications():
+    from prettytable import PrettyTable  # Only the listing needs it, not the watcher
     table = PrettyTable(['PID', 'Name', 'Status', 'CPU Usage (%)', 'Memory (MB)'])
     
     # First call to initialize cpu_percent stats
@@ -28,5 +29,19 @@ def list_background_applications():
     
     print(table)
 
+def watch_processes(stop_event, interval=5):
+    """Publish every process started after monitoring began"""
+    # (pid, create_time) tells a new process from an old one whose PID got reused;
+    # only running processes are kept, so the set stays the size of the process table
+    seen = {(p.info['pid'], p.info['create_time']) for p in psutil.process_iter(['pid', 'create_time'])}
+    while not stop_event.wait(interval):
+        running = set()
+        for proc in psutil.process_iter(['pid', 'name', 'create_time']):
+            key = (proc.info['pid'], proc.info['create_time'])
+            running.add(key)
+            if key not in seen:
+                eventlog.publish("new_process", proc.info['name'] or "", proc.info['pid'])
+        seen = running
+
 if __name__ == '__main__':
     list_background_applications()
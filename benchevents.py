@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import eventlog
+import reportbuilder
+import shipper
+
+# ===================== Settings =====================
+BASELINE_FILE = "bench_baseline.json"
+REGRESSION_TOLERANCE = 0.20  # fail when a metric is 20% worse than the baseline
+
+# metric -> True if higher is better
+METRICS = {
+    "events_per_s": True,
+    "latency_p50_ms": False,
+    "latency_p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+def percentile(values, p):
+    """p-th percentile (0-100) of a list of numbers"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and its children, in MB"""
+    try:
+        import resource
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return round((own + children) / scale, 1)
+    except ImportError:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+
+
+def synthetic_stream(sessions, duration, rate, seed=0):
+    """Interleaved events of many synthetic sessions, ordered by time"""
+    rng = random.Random(seed)
+    start = 0.0
+    streams = [shipper.synthetic_events(random.Random(rng.random()), start, rate, duration)
+               for _ in range(sessions)]
+    return heapq.merge(*streams)
+
+
+def replay_stream(folder):
+    """Events of a recorded session, times relative to its first event"""
+    first = None
+    for ts, kind, detail, value in eventlog.iter_events(folder):
+        if first is None:
+            first = ts
+        yield ts - first, kind, detail, value
+
+
+# ===================== Benchmarks =====================
+def bench_pipeline(stream, folder, speed=0.0):
+    """Publish events through bus -> log writer; speed 0 = as fast as possible"""
+    bus = eventlog.EventBus()
+    latencies = []
+
+    def on_flush(batch):
+        now = time.time()
+        latencies.extend(now - event[0] for event in batch)
+
+    writer = eventlog.EventLogWriter(folder, event_bus=bus, on_flush=on_flush)
+    publish = bus.publish
+    count = 0
+    start = time.time()
+    for offset, kind, detail, value in stream:
+        if speed:
+            delay = start + offset / speed - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        publish(kind, detail, value)
+        count += 1
+    writer.close()
+    elapsed = time.time() - start
+    return {
+        "events": count,
+        "seconds": round(elapsed, 3),
+        "events_per_s": round(count / elapsed, 1) if elapsed else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def bench_report(folder):
+    """Build the suspicion report over the events written by bench_pipeline"""
+    start = time.perf_counter()
+    report = reportbuilder.build_report(folder)
+    elapsed = time.perf_counter() - start
+    count = report["event_count"]
+    return {
+        "events": count,
+        "seconds": round(elapsed, 3),
+        "events_per_s": round(count / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def bench_server(sessions, rate, duration, workers, data_dir):
+    """Synthetic clients against a local collector; latency is event -> ack"""
+    import proctorserver
+
+    async def run():
+        server = await proctorserver.IngestServer(port=0, workers=workers, data_dir=data_dir).start()
+        start = time.time()
+        results = await asyncio.gather(*[
+            shipper.synthetic_client(server.host, server.port, f"bench-{i:05d}", rate, duration)
+            for i in range(sessions)])
+        elapsed = time.time() - start
+        await server.stop()
+        return server.events, elapsed, [lat for result in results for lat in result]
+
+    count, elapsed, latencies = asyncio.run(run())
+    return {
+        "events": count,
+        "seconds": round(elapsed, 3),
+        "events_per_s": round(count / elapsed, 1) if elapsed else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+# ===================== Baseline =====================
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE, metrics_spec=METRICS):
+    """Regression messages for every metric worse than baseline by > tolerance"""
+    problems = []
+    # Whole-run metrics (peak memory) sit next to the per-benchmark ones
+    groups = dict(results["benchmarks"], process=results)
+    base_groups = dict(baseline.get("benchmarks", {}), process=baseline)
+    for bench, metrics in groups.items():
+        base = base_groups.get(bench, {})
+        for metric, higher_is_better in metrics_spec.items():
+            if metric not in metrics or not base.get(metric):
+                continue
+            new, old = metrics[metric], base[metric]
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > tolerance:
+                problems.append(f"{bench}.{metric}: {old} -> {new} ({change:+.0%} worse)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ProctorY event pipeline")
+    parser.add_argument("--sessions", type=int, default=1000, help="synthetic sessions")
+    parser.add_argument("--duration", type=float, default=60.0, help="session length in seconds")
+    parser.add_argument("--rate", type=float, default=30.0, help="events/s per session")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="replay speed (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--replay", help="replay a recorded exam_events session folder instead")
+    parser.add_argument("--server", type=int, default=0,
+                        help="also run N real-time synthetic clients against a local collector")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--save", nargs="?", const=BASELINE_FILE, help="write results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_FILE, help="fail on regressions")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="proctory-bench-")
+    try:
+        folder = os.path.join(scratch, "events")
+        stream = (replay_stream(args.replay) if args.replay
+                  else synthetic_stream(args.sessions, args.duration, args.rate))
+        benchmarks = {"pipeline": bench_pipeline(stream, folder, args.speed),
+                      "report": bench_report(folder)}
+        if args.server:
+            benchmarks["server"] = bench_server(args.server, args.rate, min(args.duration, 10.0),
+                                                args.workers, os.path.join(scratch, "server"))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": vars(args),
+        "peak_rss_mb": peak_rss_mb(),
+        "benchmarks": benchmarks,
+    }
+    for name, metrics in benchmarks.items():
+        print(f"{name:>9}: " + ", ".join(f"{k}={v}" for k, v in metrics.items()))
+    print(f"peak RSS: {results['peak_rss_mb']} MB")
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            problems = compare(results, json.load(f))
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        status = 1 if problems else 0
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=4)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from benchevents import compare, peak_rss_mb
+
+# ===================== Settings =====================
+CLIP_DIR = "bench_clips"  # reference recordings (*.mp4, *.avi); a synthetic one is generated if empty
+CLIP_PATTERNS = ("*.mp4", "*.avi", "*.mkv", "*.mov")
+SYNTHETIC_CLIP = "synthetic.avi"
+SYNTHETIC_SECONDS = 10
+BASELINE_FILE = "bench_tracking_baseline.json"
+MIN_FACE_RATIO = 0.5      # below this the clips hardly exercise tracking: the run is invalid
+
+# Tracker configurations compared on every clip (EyeHeadTracker keyword arguments)
+CONFIGS = {
+    "full": {},
+    "roi": {"roi": True},
+    "throttled": {"infer_every": 3},
+    "no-refine": {"refine_landmarks": False},
+}
+
+# metric -> True if higher is better
+METRICS = {
+    "fps": True,
+    "frame_p50_ms": False,
+    "frame_p99_ms": False,
+    "cpu_percent": False,
+    "peak_rss_mb": False,
+}
+
+
+def find_clips(folder):
+    clips = []
+    for pattern in CLIP_PATTERNS:
+        clips.extend(glob.glob(os.path.join(folder, pattern)))
+    return sorted(clips)
+
+
+def make_synthetic_clip(path, seconds=SYNTHETIC_SECONDS, fps=30, size=(640, 480)):
+    """Deterministic stand-in clip: a drawn face that drifts, turns and blinks.
+
+    FaceMesh may not take it for a face; then every configuration runs the
+    no-face path (roi and throttling never engage) and main() reports the
+    run as invalid through face_ratio.
+    """
+    import math
+    import cv2
+    import numpy as np
+
+    w, h = size
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    rng = np.random.default_rng(0)
+    backdrop = cv2.GaussianBlur(rng.integers(60, 120, (h, w, 3), dtype=np.uint8), (31, 31), 0)
+    for i in range(int(seconds * fps)):
+        t = i / fps
+        frame = backdrop.copy()
+        cx = int(w / 2 + 40 * math.sin(0.5 * t))
+        cy = int(h / 2 + 15 * math.sin(0.3 * t))
+        turn = int(25 * math.sin(0.4 * t))  # features shift sideways as the head turns
+        cv2.ellipse(frame, (cx, cy), (95, 125), 0, 0, 360, (140, 170, 215), -1)
+        eye = 2 if int(t * 10) % 40 == 0 else 12  # blinks every 4 s
+        for side in (-1, 1):
+            ex = cx + side * 38 + turn
+            cv2.ellipse(frame, (ex, cy - 25), (20, eye), 0, 0, 360, (245, 245, 245), -1)
+            if eye > 2:
+                cv2.circle(frame, (ex + int(6 * math.sin(t)), cy - 25), 7, (50, 40, 30), -1)
+            cv2.line(frame, (ex - 22, cy - 50), (ex + 22, cy - 52), (60, 70, 90), 4)
+        cv2.line(frame, (cx + turn, cy - 15), (cx + turn - 8, cy + 25), (110, 130, 180), 3)
+        mouth = 4 + int(6 * max(0.0, math.sin(2 * math.pi * 3 * t)))
+        cv2.ellipse(frame, (cx + turn, cy + 60), (30, mouth), 0, 0, 360, (70, 60, 150), -1)
+        out.write(frame)
+    out.release()
+    return path
+
+
+# ===================== Benchmark =====================
+def run_config(name, options, clips, max_frames=0):
+    """Run one tracker configuration over every clip (in its own process)"""
+    import cv2
+    import psutil
+    import eyehead
+
+    tracker = eyehead.EyeHeadTracker(**options)
+    timer = tracker.timer
+    process = psutil.Process()
+    cpu_start = process.cpu_times()
+    wall_start = time.perf_counter()
+    faces = frames = 0
+    for clip in clips:
+        cap = cv2.VideoCapture(clip)
+        while cap.isOpened() and not (max_frames and frames >= max_frames):
+            timer.start()
+            ret, frame = cap.read()
+            timer.lap("capture")
+            if not ret:
+                break
+            frame = cv2.flip(frame, 1)
+            result = tracker.process(frame)
+            tracker.draw(frame, result)
+            timer.frame_done()
+            frames += 1
+            faces += result["face"]
+        cap.release()
+    wall = time.perf_counter() - wall_start
+    cpu = process.cpu_times()
+    cpu_s = (cpu.user - cpu_start.user) + (cpu.system - cpu_start.system)
+
+    snap = timer.snapshot()
+    metrics = {
+        "frames": frames,
+        "face_ratio": round(faces / frames, 3) if frames else 0.0,
+        "fps": round(frames / wall, 1) if wall else 0.0,
+        "frame_p50_ms": snap["frame"]["p50_ms"],
+        "frame_p99_ms": snap["frame"]["p99_ms"],
+        "cpu_percent": round(100.0 * cpu_s / wall, 1) if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    for stage, summary in snap["stages"].items():
+        metrics[f"{stage}_ms"] = summary["mean_ms"]
+    return name, metrics
+
+
+def format_table(benchmarks):
+    """Configurations side by side, one metric per row"""
+    names = list(benchmarks)
+    rows = []
+    for metrics in benchmarks.values():
+        rows.extend(m for m in metrics if m not in rows)
+    lines = [f"{'':<16}" + "".join(f"{name:>12}" for name in names)]
+    for row in rows:
+        lines.append(f"{row:<16}" + "".join(f"{benchmarks[n].get(row, ''):>12}" for n in names))
+    return "\n".join(lines)
+
+
+def check_faces(benchmarks):
+    """Messages for configurations that hardly saw a face: their numbers
+    measure the no-face path, so comparing configurations means nothing"""
+    return [f"{name}.face_ratio: {m['face_ratio']} < {MIN_FACE_RATIO} (invalid run: no face tracked)"
+            for name, m in benchmarks.items() if m["face_ratio"] < MIN_FACE_RATIO]
+
+
+def check_limits(benchmarks, args):
+    """Messages for every configuration outside the absolute limits"""
+    problems = []
+    for name, m in benchmarks.items():
+        if args.min_fps and m["fps"] < args.min_fps:
+            problems.append(f"{name}.fps: {m['fps']} < {args.min_fps}")
+        if args.max_p99_ms and m["frame_p99_ms"] > args.max_p99_ms:
+            problems.append(f"{name}.frame_p99_ms: {m['frame_p99_ms']} > {args.max_p99_ms}")
+        if args.max_cpu and m["cpu_percent"] > args.max_cpu:
+            problems.append(f"{name}.cpu_percent: {m['cpu_percent']} > {args.max_cpu}")
+        if args.max_rss_mb and m["peak_rss_mb"] > args.max_rss_mb:
+            problems.append(f"{name}.peak_rss_mb: {m['peak_rss_mb']} > {args.max_rss_mb}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eye/head tracking on recorded clips")
+    parser.add_argument("--clips", default=CLIP_DIR, help="folder of reference videos")
+    parser.add_argument("--configs", default=",".join(CONFIGS),
+                        help=f"comma separated subset of: {', '.join(CONFIGS)}")
+    parser.add_argument("--max-frames", type=int, default=0, help="stop each config after N frames")
+    parser.add_argument("--min-fps", type=float, default=0.0)
+    parser.add_argument("--max-p99-ms", type=float, default=0.0)
+    parser.add_argument("--max-cpu", type=float, default=0.0, help="CPU%% (100 = one core)")
+    parser.add_argument("--max-rss-mb", type=float, default=0.0)
+    parser.add_argument("--save", nargs="?", const=BASELINE_FILE, help="write results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_FILE, help="fail on regressions")
+    args = parser.parse_args()
+
+    clips = find_clips(args.clips)
+    if not clips:
+        path = make_synthetic_clip(os.path.join(args.clips, SYNTHETIC_CLIP))
+        print(f"No clips found in {args.clips}/ ({', '.join(CLIP_PATTERNS)}); generated {path}")
+        clips = [path]
+    names = [n.strip() for n in args.configs.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CONFIGS]
+    if unknown:
+        parser.error(f"unknown config(s): {', '.join(unknown)}")
+
+    # A fresh process per configuration keeps CPU and peak memory separate
+    benchmarks = {}
+    ctx = mp.get_context("spawn")
+    for name in names:
+        with ctx.Pool(1) as pool:
+            name, metrics = pool.apply(run_config, (name, CONFIGS[name], clips, args.max_frames))
+        benchmarks[name] = metrics
+        print(f"{name}: {metrics['fps']} FPS over {metrics['frames']} frames")
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": vars(args),
+        "clips": [os.path.basename(c) for c in clips],
+        "benchmarks": benchmarks,
+    }
+    print(format_table(benchmarks))
+
+    invalid = check_faces(benchmarks)
+    problems = invalid + check_limits(benchmarks, args)
+    if args.compare and not invalid:
+        with open(args.compare) as f:
+            problems += compare(results, json.load(f), metrics_spec=METRICS)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if args.save and invalid:
+        print(f"Not saving {args.save}: the clips need a face the tracker finds")
+    elif args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=4)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
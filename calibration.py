@@ -0,0 +1,183 @@
+import math
+import rollingstats
+
+# ===================== Settings =====================
+SIGNALS = ("dx", "dy", "yaw", "pitch", "roll")
+GUARD = 0.5             # follow samples within this fraction of the tolerance
+FOLLOW_HALFLIFE = 600   # frames (~20 s at 30 FPS) for the in-bounds follower
+POSTURE_HALFLIFE = 1800 # frames (~60 s) of history behind the posture median
+STABLE = 0.5            # posture may move only while short-term spread < STABLE * tol
+MAX_DRIFT_RATE = 0.1    # tolerances per second the posture correction may move
+MAX_TOTAL_DRIFT = 0.75  # tolerances away from the initial calibration, at most
+REJECT = 4.0            # samples further than this many tolerances are ignored
+CHECK_EVERY = 15        # frames between posture median queries (O(bins) each)
+MIN_POSTURE_SAMPLES = 150
+PUBLISH_STEP = 0.5      # report a baseline once it moved this many tolerances
+
+
+class Baseline:
+    """One adaptive reference value (neutral gaze or head angle).
+
+    In-bounds samples (within GUARD of the tolerance) pull the center slowly
+    (EMA) and feed a decaying median that follows a gradual posture change,
+    but only while the signal is steady, at a capped rate and within
+    MAX_TOTAL_DRIFT of the initial calibration.  Out-of-bounds samples never
+    move it, so even a sustained look away keeps raising violations.
+    """
+
+    __slots__ = ("name", "tol", "initial", "center", "published", "rejected",
+                 "_alpha", "_posture", "_spread", "_n", "_last_check")
+
+    def __init__(self, name, center, tolerance):
+        self.name = name
+        self.tol = tolerance
+        self.initial = self.center = self.published = center
+        self.rejected = 0
+        self._alpha = 1.0 - 0.5 ** (1.0 / FOLLOW_HALFLIFE)
+        span = REJECT * tolerance
+        self._posture = rollingstats.DecayingQuantile(center - span, center + span, bins=100,
+                                                      decay=0.5 ** (1.0 / POSTURE_HALFLIFE))
+        self._spread = rollingstats.EMA(halflife=30)
+        self._n = 0
+        self._last_check = None
+
+    def update(self, x, now):
+        d = x - self.center
+        if abs(d) > REJECT * self.tol:
+            self.rejected += 1  # Tracking glitch or somebody else's face
+            return
+        self._spread.update(x)
+        lo, hi = self.initial - MAX_TOTAL_DRIFT * self.tol, self.initial + MAX_TOTAL_DRIFT * self.tol
+        if abs(d) <= GUARD * self.tol:
+            self._posture.update(x)
+            self.center = min(max(self.center + self._alpha * d, lo), hi)
+        self._n += 1
+        if self._n % CHECK_EVERY:
+            return
+        if self._last_check is None:
+            self._last_check = now
+            return
+        elapsed, self._last_check = now - self._last_check, now
+        if (self._posture.effective_count < MIN_POSTURE_SAMPLES or
+                self._spread.std >= STABLE * self.tol):
+            return
+        limit = MAX_DRIFT_RATE * self.tol * elapsed
+        step = min(max(self._posture.quantile(0.5) - self.center, -limit), limit)
+        self.center = min(max(self.center + step, lo), hi)
+
+    def replay(self, xs, times):
+        """update() over whole lists; returns the center before each sample.
+
+        Same arithmetic in the same order (identical results), with the
+        state held in locals: offline re-scoring spends its time here.
+        """
+        tol = self.tol
+        reject, guard, stable = REJECT * tol, GUARD * tol, STABLE * tol
+        lo, hi = self.initial - MAX_TOTAL_DRIFT * tol, self.initial + MAX_TOTAL_DRIFT * tol
+        alpha, center = self._alpha, self.center
+        spread, posture = self._spread, self._posture
+        s_alpha, s_mean, s_var, s_count = spread.alpha, spread.mean, spread.variance, spread.count
+        counts, weight, total, decay = posture.counts, posture.weight, posture.total, posture.decay
+        p_lo, p_range, bins = posture.lo, posture.hi - posture.lo, posture.bins
+        n, last_check, rejected = self._n, self._last_check, self.rejected
+        out = []
+        for x, now in zip(xs, times):
+            out.append(center)
+            d = x - center
+            if abs(d) > reject:
+                rejected += 1
+                continue
+            if s_count:  # EMA.update
+                delta = x - s_mean
+                s_mean += s_alpha * delta
+                s_var = (1.0 - s_alpha) * (s_var + s_alpha * delta * delta)
+            else:
+                s_mean = x
+            s_count += 1
+            if abs(d) <= guard:
+                i = int((x - p_lo) / p_range * bins)  # DecayingQuantile.update
+                i = 0 if i < 0 else bins - 1 if i >= bins else i
+                counts[i] += weight
+                total += weight
+                weight /= decay
+                if weight > 1e100:
+                    scale = 1.0 / weight
+                    posture.counts = counts = [c * scale for c in counts]
+                    total *= scale
+                    weight = 1.0
+                center = min(max(center + alpha * d, lo), hi)
+            n += 1
+            if n % CHECK_EVERY:
+                continue
+            if last_check is None:
+                last_check = now
+                continue
+            elapsed, last_check = now - last_check, now
+            if total / weight < MIN_POSTURE_SAMPLES or math.sqrt(s_var) >= stable:
+                continue
+            posture.weight, posture.total = weight, total
+            limit = MAX_DRIFT_RATE * tol * elapsed
+            step = min(max(posture.quantile(0.5) - center, -limit), limit)
+            center = min(max(center + step, lo), hi)
+        spread.mean, spread.variance, spread.count = s_mean, s_var, s_count
+        posture.weight, posture.total = weight, total
+        self.center, self._n, self._last_check, self.rejected = center, n, last_check, rejected
+        return out
+
+    def moved(self):
+        """True once per PUBLISH_STEP of movement since the last report"""
+        if abs(self.center - self.published) >= PUBLISH_STEP * self.tol:
+            self.published = self.center
+            return True
+        return False
+
+
+class AdaptiveCalibration:
+    """Calibration window, then (optionally) continuously adapted baselines.
+
+    Per frame call ``update(values, now)`` with one value per SIGNALS entry.
+    During the window the medians are collected (P-square, constant memory);
+    afterwards ``centers`` holds the references for the violation checks.
+    With adaptive=False the one-shot medians are kept for the whole exam.
+    """
+
+    def __init__(self, duration, tolerances, start_time, adaptive=True):
+        self.duration = duration
+        self.tolerances = tolerances
+        self.start_time = start_time
+        self.adaptive = adaptive
+        self.calibrated = False
+        self.medians = [rollingstats.P2Quantile(0.5) for _ in SIGNALS]
+        self.baselines = None
+        self.centers = None
+
+    def update(self, values, now):
+        """Feed one frame; returns the names of baselines that moved notably"""
+        if not self.calibrated:
+            for median, value in zip(self.medians, values):
+                median.update(value)
+            if now - self.start_time >= self.duration:
+                self._finish()
+            return ()
+        if not self.adaptive:
+            return ()
+        moved = []
+        for i, (baseline, value) in enumerate(zip(self.baselines, values)):
+            baseline.update(value, now)
+            self.centers[i] = baseline.center
+            if baseline.moved():
+                moved.append(baseline.name)
+        return moved
+
+    def _finish(self):
+        centers = [m.value for m in self.medians]
+        self.centers = centers
+        self.baselines = [Baseline(name, c, self.tolerances[name]) for name, c in zip(SIGNALS, centers)]
+        self.medians = None
+        self.calibrated = True
+
+    def snapshot(self):
+        """Current baselines for logging/display"""
+        if not self.calibrated:
+            return {}
+        return {name: round(c, 4) for name, c in zip(SIGNALS, self.centers)}
@@ -0,0 +1,418 @@
+import json
+import math
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import zlib
+import cv2
+import eventlog
+import journal
+
+# ===================== Settings =====================
+PROFILE_FILE = "capture_profiles.json"  # per seat: chosen mode for each camera
+# Tried when the driver cannot be asked for its formats (non-Linux, no v4l2-ctl)
+CANDIDATES = [(fourcc, w, h, fps) for fourcc in ("MJPG", "YUYV")
+              for w, h in ((640, 480), (960, 540), (1280, 720), (320, 240))
+              for fps in (30,)]
+MIN_FPS = 14              # delivered frames per second a profile must sustain
+MIN_EYE_PX = 40           # outer eye corner distance in pixels: landmark accuracy target
+MAX_WIDTH = 1280          # larger modes never pay off for one face at desk distance
+BENCH_FRAMES = 20         # frames timed per candidate
+ACCURACY_FRAMES = 3       # frames run through FaceMesh per candidate
+WARMUP_FRAMES = 5         # discarded after opening (auto exposure, stale buffers)
+MAX_UNVERIFIED_TUNES = 3  # starts that retry the accuracy check while no face was seen
+TUNE_BUDGET = 30.0        # seconds tune() may spend benchmarking (warmup waits READY_TIMEOUT)
+LEFT_EYE_OUTER, RIGHT_EYE_OUTER = 33, 263
+STALL_TIMEOUT = 2.0       # seconds a read may block before the camera counts as stalled
+FROZEN_TIMEOUT = 3.0      # seconds of bit-identical thumbnails before the camera counts as frozen
+THUMB_STEP = 16           # thumbnail = every 16th pixel (strided, so sensor noise survives)
+RECONNECT_BACKOFF = (0.5, 10.0)  # first and longest wait between reconnect attempts
+
+
+def profile_name(profile):
+    return f"{profile['fourcc']} {profile['width']}x{profile['height']}@{profile['fps']}"
+
+
+def fourcc_text(code):
+    code = int(code)
+    return "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip("\x00")
+
+
+# ===================== Device formats =====================
+def device_key(source):
+    """Stable cache key: the V4L2 card name where available, else the index"""
+    name_path = f"/sys/class/video4linux/video{source}/name"
+    try:
+        with open(name_path) as f:
+            return f"{f.read().strip()} (video{source})"
+    except OSError:
+        return f"camera{source}"
+
+
+def probe_formats(source):
+    """(fourcc, width, height, fps) modes the device reports, [] if it cannot be asked"""
+    if not sys.platform.startswith("linux") or not shutil.which("v4l2-ctl"):
+        return []
+    try:
+        out = subprocess.run(["v4l2-ctl", "-d", f"/dev/video{source}", "--list-formats-ext"],
+                             capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+    modes, fourcc, size = [], None, None
+    for line in out.splitlines():
+        m = re.search(r"'(\w{4})'", line)
+        if m and "[" in line:
+            fourcc, size = m.group(1), None
+            continue
+        m = re.search(r"Size: \w+ (\d+)x(\d+)", line)
+        if m:
+            size = (int(m.group(1)), int(m.group(2)))
+            continue
+        m = re.search(r"\(([\d.]+) fps\)", line)
+        if m and fourcc and size:
+            modes.append((fourcc, size[0], size[1], round(float(m.group(1)))))
+    return modes
+
+
+def candidates(source):
+    """Modes worth benchmarking, cheapest first: reported ones (or CANDIDATES)
+    within the limits, only the highest frame rate of each format and size"""
+    best = {}
+    for fourcc, w, h, fps in probe_formats(source) or CANDIDATES:
+        if fourcc in ("MJPG", "YUYV") and w <= MAX_WIDTH and fps >= MIN_FPS:
+            best[fourcc, w, h] = max(fps, best.get((fourcc, w, h), 0))
+    return sorted(((fourcc, w, h, fps) for (fourcc, w, h), fps in best.items()),
+                  key=lambda m: (m[1] * m[2], m[0] != "MJPG"))
+
+
+# ===================== Opening =====================
+def open_capture(source, profile=None):
+    """VideoCapture set to `profile` (FOURCC first, as drivers expect) with a one-frame buffer"""
+    cap = cv2.VideoCapture(source)
+    if profile:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*profile["fourcc"]))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, profile["width"])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, profile["height"])
+        cap.set(cv2.CAP_PROP_FPS, profile["fps"])
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Always hand out the newest frame
+    return cap
+
+
+def actual_profile(cap):
+    return {"fourcc": fourcc_text(cap.get(cv2.CAP_PROP_FOURCC)),
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": round(cap.get(cv2.CAP_PROP_FPS))}
+
+
+# ===================== Self-benchmark =====================
+def benchmark(source, profile, face_mesh=None, frames=BENCH_FRAMES):
+    """Delivered fps, CPU ms per frame (read + flip + convert) and eye distance in pixels"""
+    cap = open_capture(source, profile)
+    try:
+        if not cap.isOpened():
+            return None
+        for _ in range(WARMUP_FRAMES):
+            cap.read()
+        got, samples = 0, []
+        wall, cpu = time.perf_counter(), time.process_time()
+        for _ in range(frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            rgb = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+            got += 1
+            if len(samples) < ACCURACY_FRAMES:
+                samples.append(rgb)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if not got:
+            return None
+        result = {"profile": actual_profile(cap), "fps": round(got / wall, 1),
+                  "cpu_ms": round(cpu / got * 1000, 2), "eye_px": None}
+        if face_mesh is not None:
+            distances = [eye_distance(face_mesh, rgb) for rgb in samples]
+            distances = [d for d in distances if d is not None]
+            if distances:
+                result["eye_px"] = round(min(distances), 1)
+        return result
+    finally:
+        cap.release()
+
+
+def eye_distance(face_mesh, rgb):
+    results = face_mesh.process(rgb)
+    if not results.multi_face_landmarks:
+        return None
+    lm = results.multi_face_landmarks[0].landmark
+    h, w = rgb.shape[:2]
+    l, r = lm[LEFT_EYE_OUTER], lm[RIGHT_EYE_OUTER]
+    return math.hypot((r.x - l.x) * w, (r.y - l.y) * h)
+
+
+def tune(source, face_mesh=None, log=None, budget=TUNE_BUDGET):
+    """Benchmark the candidate modes; the cheapest that keeps up and is accurate enough wins.
+
+    Candidates run in cost order and tuning stops at the first mode that
+    qualifies, or once ``budget`` seconds are spent (the best mode found
+    so far is used).  Without a face in view (or without face_mesh)
+    accuracy cannot be checked; then the cheapest mode of at least 640 px
+    width is taken, unverified.
+    """
+    results = []
+    deadline = time.monotonic() + budget
+    for fourcc, w, h, fps in candidates(source):
+        if time.monotonic() >= deadline:
+            if log:
+                log(f"Tuning budget of {budget:.0f}s spent, {len(results)} modes measured")
+            break
+        result = benchmark(source, {"fourcc": fourcc, "width": w, "height": h, "fps": fps}, face_mesh)
+        if log:
+            log(f"{fourcc} {w}x{h}@{fps}: {result}")
+        if not result or (result["profile"]["width"], result["profile"]["height"]) != (w, h):
+            continue  # Ignore modes the driver silently replaced
+        results.append(result)
+        if result["fps"] >= MIN_FPS and (
+                (result["eye_px"] or 0) >= MIN_EYE_PX if face_mesh is not None else w >= 640):
+            break  # Cheapest qualifying mode; the rest only cost more
+    fast = [r for r in results if r["fps"] >= MIN_FPS]
+    accurate = [r for r in fast if r["eye_px"] is not None and r["eye_px"] >= MIN_EYE_PX]
+    pool = accurate or [r for r in fast if r["profile"]["width"] >= 640] or fast
+    if not pool:
+        return None
+    best = min(pool, key=lambda r: (r["cpu_ms"], r["profile"]["width"]))
+    return dict(best, verified=bool(accurate), tuned=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+# ===================== Cached profiles =====================
+def load_profiles(path=PROFILE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_profile(key, tuned, path=PROFILE_FILE):
+    profiles = load_profiles(path)
+    profiles[key] = tuned
+    journal.atomic_write_json(path, profiles, indent=2)
+
+
+def open_camera(source=0, face_mesh=None, retune=False, path=PROFILE_FILE, tune_missing=True):
+    """Open a camera in its cached (or freshly tuned) cheapest adequate mode.
+
+    Files and URLs are opened as-is.  A profile tuned without a face in view
+    is unverified; the next few starts with a face_mesh tune again.  Without
+    tune_missing, a camera with no cached profile opens in the driver default.
+    """
+    if not isinstance(source, int):
+        return cv2.VideoCapture(source)
+    key = device_key(source)
+    cached = None if retune else load_profiles(path).get(key)
+    if cached is None and not tune_missing:
+        return open_capture(source)
+    tuned = cached
+    if cached and not cached.get("verified") and face_mesh is not None and \
+            cached.get("attempts", 1) < MAX_UNVERIFIED_TUNES:
+        tuned = None
+    if tuned is None:
+        tuned = tune(source, face_mesh)
+        if tuned is not None:
+            if not tuned["verified"]:
+                tuned["attempts"] = (cached or {}).get("attempts", 0) + 1
+            save_profile(key, tuned, path)
+        else:
+            tuned = cached
+    cap = open_capture(source, tuned["profile"] if tuned else None)
+    if tuned and not cap.read()[0]:
+        # Cached mode no longer works (other driver, other camera on this index)
+        cap.release()
+        cap = open_capture(source)
+    return cap
+
+
+# ===================== Watchdog =====================
+class CameraWatchdog:
+    """VideoCapture stand-in that survives stalls, frozen frames and unplugging.
+
+    ``read()`` keeps the (ret, frame) contract.  A failed read (device
+    lost), a read blocking longer than STALL_TIMEOUT (noticed by a small
+    monitor thread) or FROZEN_TIMEOUT seconds of bit-identical thumbnails
+    start an outage: a "camera_failure" event is published, reads return
+    (False, None) and the camera is reopened with exponential backoff.  The
+    first good frame afterwards publishes "camera_recovered" with the
+    outage length as its value.  Without ``reopen`` (files) a failed read
+    just ends the stream and ``isOpened()`` turns False.
+
+    The monitor only records a stall; the device is never touched from
+    that thread (releasing a capture while another thread is inside its
+    read() can crash the backend).  When the stuck read returns, a frame
+    ends the outage and a failure reopens the camera, both on the reading
+    thread.  A read that never returns keeps that thread blocked, but
+    the outage is still published and timed.
+    """
+
+    def __init__(self, cap, reopen=None, name="camera", bus=eventlog.bus, stall_timeout=STALL_TIMEOUT,
+                 frozen_timeout=FROZEN_TIMEOUT, backoff=RECONNECT_BACKOFF):
+        self.cap = cap
+        self.reopen = reopen
+        self.name = name
+        self.bus = bus
+        self.stall_timeout = stall_timeout
+        self.frozen_timeout = frozen_timeout
+        self.backoff = backoff
+        self.lock = threading.Lock()
+        self.failure = None        # reason of the ongoing outage
+        self.failed_at = None      # (monotonic, epoch) start of the outage
+        self.reading_since = None  # monotonic start of the read in progress
+        self.last_thumb = None
+        self.same_since = None
+        self.attempts = 0
+        self.next_attempt = 0.0
+        self.broken = False        # the reader must reopen the device before reading
+        self.failures = {}         # reason -> outages
+        self.downtime = 0.0
+        self.reconnects = 0
+        self.ended = False
+        self.closed = threading.Event()
+        self.monitor = None
+        if reopen is not None:
+            self.monitor = threading.Thread(target=self._watch_stalls, name="camera-watchdog", daemon=True)
+            self.monitor.start()
+
+    def isOpened(self):
+        if self.closed.is_set() or self.ended:
+            return False
+        return self.reopen is not None or (self.cap is not None and self.cap.isOpened())
+
+    def grab(self):
+        return self.cap is not None and self.cap.grab()
+
+    def get(self, prop):
+        return self.cap.get(prop) if self.cap is not None else 0.0
+
+    def read(self):
+        if self.broken and not self._reconnect():
+            return False, None
+        self.reading_since = time.monotonic()
+        ret, frame = self.cap.read()
+        self.reading_since = None
+        if not ret:
+            if self.reopen is None:
+                self.ended = True  # End of file / stream; nothing to reconnect to
+            else:
+                self._fail("lost")  # Or a stalled read that gave up
+                self.broken = True
+            return False, None
+        now = time.monotonic()
+        thumb = zlib.crc32(frame[::THUMB_STEP, ::THUMB_STEP].tobytes())
+        if thumb != self.last_thumb:
+            self.last_thumb, self.same_since = thumb, now
+        elif self.reopen is not None and now - self.same_since >= self.frozen_timeout:
+            self._fail("frozen")
+            self.broken = True
+            return False, None
+        elif self.failure == "frozen":
+            self.broken = True
+            return False, None  # Reopened but still the same picture
+        if self.failure is not None:
+            self._recover()
+        return True, frame
+
+    # ---------- outages ----------
+    def _fail(self, reason, since=None):
+        with self.lock:
+            if self.failure is not None:
+                return
+            now = time.monotonic()
+            since = now if since is None else since
+            self.failure = reason
+            self.failed_at = (since, time.time() - (now - since))
+            self.failures[reason] = self.failures.get(reason, 0) + 1
+            self.attempts = 0
+            self.next_attempt = time.monotonic() + self.backoff[0]
+        if self.bus is not None:
+            self.bus.publish("camera_failure", f"{self.name}: {reason}", ts=self.failed_at[1])
+
+    def _recover(self):
+        with self.lock:
+            reason, self.failure = self.failure, None
+            if reason is None:
+                return
+            seconds = time.monotonic() - self.failed_at[0]
+            self.downtime += seconds
+        if self.bus is not None:
+            self.bus.publish("camera_recovered", f"{self.name}: {reason}", seconds)
+
+    def _reconnect(self):
+        """Reopen the camera once the backoff has passed; False while still waiting"""
+        now = time.monotonic()
+        if now < self.next_attempt:
+            time.sleep(min(0.1, self.next_attempt - now))  # Callers loop on read()
+            return False
+        self.attempts += 1
+        self.next_attempt = now + min(self.backoff[0] * 2 ** self.attempts, self.backoff[1])
+        if self.cap is not None:
+            self.cap.release()
+        try:
+            self.cap = self.reopen()
+        except Exception:
+            self.cap = None
+        if self.cap is None or not self.cap.isOpened():
+            return False
+        self.reconnects += 1
+        self.broken = False
+        return True
+
+    def _watch_stalls(self):
+        while not self.closed.wait(self.stall_timeout / 4):
+            started = self.reading_since
+            if started is None or time.monotonic() - started <= self.stall_timeout:
+                continue
+            self._fail("stalled", started)  # The reader deals with the device once read() returns
+
+    def stats(self):
+        """Outage counts by reason, total and current downtime, for status panels"""
+        with self.lock:
+            current = time.monotonic() - self.failed_at[0] if self.failure is not None else 0.0
+            return {"failures": dict(self.failures), "downtime": self.downtime + current,
+                    "failing": self.failure, "reconnects": self.reconnects}
+
+    def release(self):
+        self.closed.set()
+        if self.monitor is not None:
+            self.monitor.join()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+def watch_camera(source=0, face_mesh=None, bus=eventlog.bus, path=PROFILE_FILE):
+    """open_camera() behind a CameraWatchdog that reconnects in the cached mode"""
+    cap = open_camera(source, face_mesh, path=path)
+    if not isinstance(source, int):
+        return CameraWatchdog(cap, name=str(source), bus=bus)
+    return CameraWatchdog(cap, lambda: open_camera(source, path=path, tune_missing=False),
+                          f"camera{source}", bus)
+
+
+if __name__ == "__main__":
+    # python capture.py [camera index]  ->  re-tune and cache this seat's capture profile
+    source = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    face_mesh = None
+    try:
+        import eyehead
+        face_mesh = eyehead.create_face_mesh()
+    except Exception as e:
+        print(f"No FaceMesh ({e}); accuracy will not be checked")
+    print(f"Device: {device_key(source)}")
+    tuned = tune(source, face_mesh, log=print)
+    if tuned is None:
+        print("No working capture mode found")
+        sys.exit(1)
+    save_profile(device_key(source), tuned)
+    print(f"Chosen: {profile_name(tuned['profile'])} ({tuned['cpu_ms']} ms CPU/frame, "
+          f"{tuned['fps']} fps, eye distance {tuned['eye_px']} px)")
@@ -2,6 +2,7 @@ import time
 import os
 import psutil
 import subprocess
+import eventlog
 
 try:
     import pyudev  # For Linux USB detection
@@ -118,6 +119,23 @@ def get_connected_peripherals():
     return devices if devices else ["None"]
 
 
+def publish_device_changes(new_devices, removed_devices):
+    """Record device add/remove events on the monitor event bus"""
+    for d in new_devices - {"None"}:
+        eventlog.publish("device_added", d)
+    for d in removed_devices - {"None"}:
+        eventlog.publish("device_removed", d)
+
+
+def watch_peripherals(stop_event, interval=5):
+    """Publish device add/remove events until stop_event is set"""
+    previous_devices = set(get_connected_peripherals())  # Already plugged in when the exam started
+    while not stop_event.wait(interval):
+        devices = set(get_connected_peripherals())
+        publish_device_changes(devices - previous_devices, previous_devices - devices)
+        previous_devices = devices
+
+
 def monitor_peripherals(interval=5):
     print("🔍 External Device Monitor Only (Press Ctrl+C to exit)")
     print("Excludes: Internal components, built-in Wi-Fi, chargers")
@@ -129,6 +147,7 @@ def monitor_peripherals(interval=5):
 
         new_devices = devices - previous_devices
         removed_devices = previous_devices - devices
+        publish_device_changes(new_devices, removed_devices)
 
         # Clear screen
         os.system('cls' if os.name == 'nt' else 'clear')
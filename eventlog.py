@@ -0,0 +1,295 @@
+import os
+import queue
+import struct
+import threading
+import time
+
+# ===================== Schema =====================
+# Every monitor event is one fixed 18-byte record:
+#   timestamp (float64, epoch seconds) | kind (uint16) | detail id (uint32) | value (float32)
+# Free-text details (device names, domains, process names) are stored once per
+# segment in a length-prefixed string table next to the records, so the
+# record file itself can be scanned with struct.iter_unpack or numpy.frombuffer.
+
+EVENT_KINDS = {
+    "eye_violation": 1,
+    "head_violation": 2,
+    "sound_violation": 3,
+    "device_added": 10,
+    "device_removed": 11,
+    "new_domain": 20,
+    "new_process": 30,
+    "focus_lost": 40,
+    "focus_gained": 41,
+    "monitor_started": 50,
+    "monitor_stopped": 51,
+    "baseline_shift": 60,
+    "evidence_clip": 70,
+    "camera_failure": 80,
+    "camera_recovered": 81,
+    "multiple_faces": 90,
+    "no_face": 91,
+    "identity_changed": 100,
+    "eyes_closed": 110,
+    "candidate_speaking": 120,
+    "external_voice": 121,
+    "suspicion_alert": 130,
+}
+KIND_NAMES = {code: name for name, code in EVENT_KINDS.items()}
+
+RECORD = struct.Struct("<dHIf")
+STRING_HEADER = struct.Struct("<IH")  # string id, byte length
+SEGMENT_MAGIC = b"PEV1"
+
+EVENT_DIR = "exam_events"
+MAX_SEGMENT_BYTES = 8 * 1024 * 1024
+FLUSH_INTERVAL = 0.25  # seconds between batched writes
+MAX_BATCH = 4096
+
+
+def kind_name(code):
+    return KIND_NAMES.get(code, f"kind{code}")
+
+
+# ===================== Event bus =====================
+class EventBus:
+    """In-process publish/subscribe hub shared by every monitor.
+
+    Events are plain tuples ``(timestamp, kind, detail, value)``.  Subscribers
+    run on the publishing thread, so they must be cheap (the log writer only
+    enqueues).  Per-kind counters are kept for live status panels.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [cb for cb in self._subscribers if cb is not callback]
+
+    def publish(self, kind, detail="", value=0.0, ts=None):
+        event = (time.time() if ts is None else ts, kind, detail, value)
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        for callback in self._subscribers:
+            callback(event)
+        return event
+
+
+bus = EventBus()  # Process-wide default bus
+
+
+def publish(kind, detail="", value=0.0, ts=None):
+    """Publish an event on the default bus"""
+    return bus.publish(kind, detail, value, ts)
+
+
+# ===================== Writer =====================
+def segment_paths(folder=EVENT_DIR):
+    """(records, strings) path pairs of every segment, oldest first"""
+    if not os.path.isdir(folder):
+        return []
+    names = sorted(n for n in os.listdir(folder) if n.startswith("events-") and n.endswith(".bin"))
+    return [(os.path.join(folder, n), os.path.join(folder, n[:-4] + ".str")) for n in names]
+
+
+class SegmentWriter:
+    """Synchronous writer of event batches to rotating segments in a folder.
+
+    Appends to ``events-NNNNN.bin`` / ``.str`` and starts a new segment once
+    the current one exceeds max_segment_bytes.
+    """
+
+    def __init__(self, folder=EVENT_DIR, max_segment_bytes=MAX_SEGMENT_BYTES):
+        self.folder = folder
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(folder, exist_ok=True)
+
+        existing = segment_paths(folder)
+        self._segment = int(os.path.basename(existing[-1][0])[7:-4]) if existing else 0
+        self._bin = self._str = None
+        self._strings = {}
+        self._open_next_segment()
+
+    def _open_next_segment(self):
+        if self._bin:
+            self._bin.close()
+            self._str.close()
+        self._segment += 1
+        base = os.path.join(self.folder, f"events-{self._segment:05d}")
+        self._bin = open(base + ".bin", "wb")
+        self._str = open(base + ".str", "wb")
+        self._bin.write(SEGMENT_MAGIC + struct.pack("<I", RECORD.size))
+        self._strings = {}
+        self._size = self._bin.tell()
+
+    def _string_id(self, detail, out):
+        if not detail:
+            return 0
+        sid = self._strings.get(detail)
+        if sid is None:
+            sid = self._strings[detail] = len(self._strings) + 1
+            data = detail.encode("utf-8")[:0xFFFF]
+            out.append(STRING_HEADER.pack(sid, len(data)) + data)
+        return sid
+
+    def _encode(self, batch):
+        records, strings = bytearray(), []
+        pack, codes = RECORD.pack, EVENT_KINDS
+        for ts, kind, detail, value in batch:
+            code = codes.get(kind, 0) if isinstance(kind, str) else kind
+            records += pack(ts, code, self._string_id(detail, strings), value)
+        return records, b"".join(strings)
+
+    def write_batch(self, batch):
+        """Encode and append a list of (timestamp, kind, detail, value) events"""
+        if not batch:
+            return
+        if self._size >= self.max_segment_bytes:
+            self._open_next_segment()
+        records, strings = self._encode(batch)
+        self._str.write(strings)
+        self._str.flush()  # Strings first, so records never reference missing text
+        self._bin.write(records)
+        self._bin.flush()
+        self._size += len(records)
+
+    def close(self):
+        self._bin.close()
+        self._str.close()
+
+
+class EventLogWriter:
+    """Buffered, asynchronous writer of bus events to rotating segments.
+
+    ``write`` only enqueues; a background thread drains the queue in
+    batches into a SegmentWriter.  ``on_flush(batch)``, if given, is called
+    on that thread after each batch has been written.
+    """
+
+    def __init__(self, folder=EVENT_DIR, max_segment_bytes=MAX_SEGMENT_BYTES,
+                 flush_interval=FLUSH_INTERVAL, event_bus=None, on_flush=None):
+        self.folder = folder
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self._segments = SegmentWriter(folder, max_segment_bytes)
+
+        self._queue = queue.SimpleQueue()
+        self._bus = event_bus or bus
+        self._bus.subscribe(self.write)
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, event):
+        """Bus subscriber: queue an event for the writer thread"""
+        self._queue.put(event)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stop = True
+                batch = [e for e in batch if e is not None]
+            self._segments.write_batch(batch)
+            if self.on_flush and batch:
+                self.on_flush(batch)
+        self._segments.close()
+
+    def close(self):
+        """Flush pending events and stop the writer thread"""
+        self._bus.unsubscribe(self.write)
+        self._queue.put(None)
+        self._thread.join()
+
+
+# ===================== Reader =====================
+def read_strings(path):
+    """Load a segment's string table as {id: text}"""
+    strings = {}
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return strings
+    pos, size = 0, STRING_HEADER.size
+    while pos + size <= len(data):
+        sid, length = STRING_HEADER.unpack_from(data, pos)
+        strings[sid] = data[pos + size:pos + size + length].decode("utf-8", "replace")
+        pos += size + length
+    return strings
+
+
+def read_records(path):
+    """Raw record bytes of one segment (a torn last record is dropped)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 8:
+        return b""
+    if data[:4] != SEGMENT_MAGIC:
+        raise ValueError(f"{path}: not an event log segment")
+    end = 8 + (len(data) - 8) // RECORD.size * RECORD.size
+    return memoryview(data)[8:end]
+
+
+def iter_raw(folder=EVENT_DIR):
+    """Yield (timestamp, kind code, detail id, value, strings) quickly.
+
+    Segments are bounded by MAX_SEGMENT_BYTES, so memory stays bounded
+    however long the session was.
+    """
+    for bin_path, str_path in segment_paths(folder):
+        records = read_records(bin_path)
+        if not records:
+            continue
+        strings = read_strings(str_path)
+        for ts, code, sid, value in RECORD.iter_unpack(records):
+            yield ts, code, sid, value, strings
+
+
+def iter_events(folder=EVENT_DIR):
+    """Yield decoded events (timestamp, kind, detail, value) in write order"""
+    for ts, code, sid, value, strings in iter_raw(folder):
+        yield ts, kind_name(code), strings.get(sid, "") if sid else "", value
+
+
+def load_events(folder=EVENT_DIR):
+    """Every event as a NumPy structured array plus per-segment string tables.
+
+    Returns (records, strings) where records has fields ts, kind, detail,
+    value, segment; details resolve via strings[segment][detail].
+    """
+    import numpy as np
+
+    dtype = np.dtype([("ts", "<f8"), ("kind", "<u2"), ("detail", "<u4"), ("value", "<f4")])
+    parts, strings = [], []
+    for segment, (bin_path, str_path) in enumerate(segment_paths(folder)):
+        strings.append(read_strings(str_path))
+        records = read_records(bin_path)
+        if records:
+            parts.append((np.frombuffer(records, dtype), segment))
+
+    out_dtype = np.dtype(dtype.descr + [("segment", "<u2")])
+    records = np.empty(sum(len(p) for p, _ in parts), out_dtype)
+    pos = 0
+    for part, segment in parts:
+        chunk = records[pos:pos + len(part)]
+        for name in dtype.names:
+            chunk[name] = part[name]
+        chunk["segment"] = segment
+        pos += len(part)
+    return records, strings
@@ -0,0 +1,32 @@
+import json
+import struct
+
+# ===================== Protocol =====================
+# Client and collector exchange length-prefixed JSON messages over one
+# persistent TCP connection:
+#   client -> server  {"type": "hello", "session": id}
+#   server -> client  {"type": "welcome", "last_seq": n}   highest batch already accepted
+#   client -> server  {"type": "batch", "seq": n, "events": [[ts, kind, detail, value], ...]}
+#   server -> client  {"type": "ack", "seq": n}            batch n (and all before) accepted
+#   client -> server  {"type": "bye"}                      session finished
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME = 16 * 1024 * 1024
+
+
+def encode(message):
+    """One length-prefixed frame for a message dict"""
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_message(reader):
+    """Read one message from an asyncio StreamReader (IncompleteReadError on EOF)"""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"frame of {length} bytes exceeds limit")
+    return json.loads(await reader.readexactly(length))
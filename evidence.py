@@ -0,0 +1,224 @@
+import collections
+import os
+import queue
+import threading
+import time
+import wave
+import cv2
+import eventlog
+import journal
+
+# ===================== Settings =====================
+PREROLL = 5.0            # seconds kept before a violation
+POSTROLL = 3.0           # seconds recorded after it
+FRAME_SIZE = (320, 240)  # evidence frames are downscaled to this
+FPS = 10                 # frames kept per second (camera frames in between are skipped)
+JPEG_QUALITY = 70
+MAX_RING_BYTES = 8 * 1024 * 1024  # hard cap on the compressed frame ring
+AUDIO_RATE = 44100       # int16 mono, as captured by sound.py
+TRIGGER_EVENTS = ("eye_violation", "head_violation", "multiple_faces", "identity_changed",
+                  "eyes_closed", "candidate_speaking", "external_voice")
+ENCODE_QUEUE_SIZE = 2    # frames waiting for the encoder; more are dropped
+WRITE_QUEUE_SIZE = 4     # clips waiting for the writer; more are dropped
+
+
+def new_clip_path(folder, kind, ts):
+    base = os.path.join(folder, time.strftime("evidence-%H%M%S", time.localtime(ts)) + f"-{kind}")
+    path, n = base + ".mjpeg", 1
+    while os.path.exists(path):  # Several clips can start within one second
+        n += 1
+        path = f"{base}-{n}.mjpeg"
+    return path
+
+
+# ===================== Ring buffer =====================
+class ByteRing:
+    """(ts, bytes) items kept for `seconds` and at most `max_bytes` in total"""
+
+    def __init__(self, seconds, max_bytes):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.items = collections.deque()
+        self.bytes = 0
+
+    def append(self, ts, data):
+        self.items.append((ts, data))
+        self.bytes += len(data)
+        items = self.items
+        while items and (items[0][0] < ts - self.seconds or self.bytes > self.max_bytes):
+            self.bytes -= len(items.popleft()[1])
+
+    def between(self, start, end):
+        return [item for item in self.items if start <= item[0] <= end]
+
+
+# ===================== Recorder =====================
+class EvidenceRecorder:
+    """Keep the last seconds of compressed frames/audio; save a clip per violation.
+
+    ``add_frame`` only downscales and hands the frame to the encoder thread,
+    which JPEG-encodes it into a time- and byte-bounded ring, so memory and
+    CPU stay flat however long the exam runs.  A trigger (any event in
+    TRIGGER_EVENTS on the bus, or ``trigger()``) marks PREROLL seconds before
+    and POSTROLL after; once the post-roll frames are in, the clip goes to
+    the writer thread as a raw MJPEG stream (playable with ffplay/VLC) plus
+    a JSON index and, when audio is fed, a WAV file.  Each saved clip is
+    published as an "evidence_clip" event.
+    """
+
+    def __init__(self, folder, preroll=PREROLL, postroll=POSTROLL, frame_size=FRAME_SIZE, fps=FPS,
+                 quality=JPEG_QUALITY, max_bytes=MAX_RING_BYTES, audio_rate=AUDIO_RATE,
+                 trigger_events=TRIGGER_EVENTS, bus=eventlog.bus):
+        self.folder = folder
+        self.preroll, self.postroll = preroll, postroll
+        self.frame_size = frame_size
+        self.interval = 1.0 / fps
+        self.quality = quality
+        self.audio_rate = audio_rate
+        self.span = span = preroll + postroll
+        self.frames = ByteRing(span, max_bytes)
+        self.audio = ByteRing(span, int(span * audio_rate * 2) + 65536)
+        self.trigger_events = set(trigger_events)
+        self.pending = []        # [start, end, [(ts, kind, detail), ...]] waiting for post-roll
+        self.covered_until = 0.0 # clips never repeat frames of an earlier clip
+        self.last_frame_ts = None
+        self.lock = threading.Lock()
+        self.dropped_frames = self.dropped_clips = self.clips = 0
+        self.encode_queue = queue.Queue(ENCODE_QUEUE_SIZE)
+        self.write_queue = queue.Queue(WRITE_QUEUE_SIZE)
+        self.encoder = threading.Thread(target=self._encode_loop, name="evidence-encoder", daemon=True)
+        self.writer = threading.Thread(target=self._write_loop, name="evidence-writer", daemon=True)
+        self.encoder.start()
+        self.writer.start()
+        self.bus = bus
+        if bus is not None:
+            bus.subscribe(self.on_event)
+
+    # ---------- input ----------
+    def add_frame(self, frame, ts=None):
+        """Offer one BGR frame; cheap, never blocks (skips frames above FPS or when busy)"""
+        ts = time.time() if ts is None else ts
+        if self.last_frame_ts is not None and ts - self.last_frame_ts < self.interval:
+            return
+        self.last_frame_ts = ts
+        small = cv2.resize(frame, self.frame_size, interpolation=cv2.INTER_AREA)
+        try:
+            self.encode_queue.put_nowait((ts, small))
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def add_audio(self, data, ts=None):
+        """Offer one chunk of int16 mono PCM (ts = time of its last sample)"""
+        with self.lock:
+            self.audio.append(time.time() if ts is None else ts, bytes(data))
+
+    def on_event(self, event):
+        ts, kind, detail, _ = event
+        if kind in self.trigger_events:
+            self.trigger(kind, detail, ts)
+
+    def trigger(self, kind, detail="", ts=None):
+        """Save PREROLL seconds before and POSTROLL after `ts`"""
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            clip = self.pending[-1] if self.pending else None
+            if clip and ts - self.preroll <= clip[1] and ts + self.postroll <= clip[0] + self.span:
+                # Overlaps the clip being collected and still fits in the ring: extend it
+                clip[1] = max(clip[1], ts + self.postroll)
+                clip[2].append((ts, kind, detail))
+            else:
+                start = max(ts - self.preroll, self.covered_until)
+                self.pending.append([start, ts + self.postroll, [(ts, kind, detail)]])
+            self.covered_until = self.pending[-1][1]
+
+    # ---------- workers ----------
+    def _encode_loop(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while True:
+            item = self.encode_queue.get()
+            if item is None:
+                break
+            ts, small = item
+            ok, jpeg = cv2.imencode(".jpg", small, params)
+            with self.lock:
+                if ok:
+                    self.frames.append(ts, jpeg.tobytes())
+                ready = [clip for clip in self.pending if clip[1] <= ts]
+                if ready:
+                    self.pending = [clip for clip in self.pending if clip[1] > ts]
+                    self._hand_over(ready)
+
+    def _hand_over(self, clips):
+        # Called with the lock held: only collect references, the writer does the I/O
+        for start, end, triggers in clips:
+            job = (start, end, triggers, self.frames.between(start, end), self.audio.between(start, end))
+            try:
+                self.write_queue.put_nowait(job)
+            except queue.Full:
+                self.dropped_clips += 1
+
+    def _write_loop(self):
+        while True:
+            job = self.write_queue.get()
+            if job is None:
+                break
+            try:
+                self._write_clip(*job)
+            except OSError as e:
+                print(f"Evidence clip not saved: {e}")
+
+    def _write_clip(self, start, end, triggers, frames, audio):
+        if not frames:
+            return
+        ts, kind, _ = triggers[0]
+        os.makedirs(self.folder, exist_ok=True)
+        path = new_clip_path(self.folder, kind, ts)
+        offsets = []
+        with open(path, "wb") as f:
+            for frame_ts, jpeg in frames:
+                offsets.append((round(frame_ts, 3), f.tell(), len(jpeg)))
+                f.write(jpeg)
+        audio_path = None
+        if audio:
+            audio_path = path[:-len(".mjpeg")] + ".wav"
+            with wave.open(audio_path, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(self.audio_rate)
+                for _, chunk in audio:
+                    w.writeframes(chunk)
+        journal.atomic_write_json(path[:-len(".mjpeg")] + ".json", {
+            "start": start, "end": end, "size": list(self.frame_size),
+            "triggers": [{"ts": t, "kind": k, "detail": d} for t, k, d in triggers],
+            "frames": offsets,  # (ts, byte offset, length) of every JPEG in the stream
+            "audio": os.path.basename(audio_path) if audio_path else None,
+        }, indent=1)
+        self.clips += 1
+        if self.bus is not None:
+            self.bus.publish("evidence_clip", os.path.basename(path), end - start)
+
+    # ---------- shutdown ----------
+    def close(self, flush=True):
+        """Stop the workers; with flush, clips still collecting are saved with what exists"""
+        if self.bus is not None:
+            self.bus.unsubscribe(self.on_event)
+        self.encode_queue.put(None)
+        self.encoder.join()
+        if flush:
+            with self.lock:
+                pending, self.pending = self.pending, []
+                self._hand_over(pending)
+        self.write_queue.put(None)
+        self.writer.join()
+
+
+def read_clip(path):
+    """(ts, BGR frame) for every frame of a saved clip, via its JSON index"""
+    import json
+    import numpy as np
+    with open(path[:-len(".mjpeg")] + ".json") as f:
+        index = json.load(f)
+    with open(path, "rb") as f:
+        data = f.read()
+    for ts, offset, length in index["frames"]:
+        yield ts, cv2.imdecode(np.frombuffer(data, np.uint8, length, offset), cv2.IMREAD_COLOR)
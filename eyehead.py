@@ -1,67 +1,100 @@
+import collections
 import cv2
-import mediapipe as mp
 import numpy as np
 import time
-import pyaudio
-from collections import deque
+import eventlog
+import rollingstats
+import calibration
+import headpose
+import stagetimer
+import talking
 
 # ===================== Setup =====================
 # Face/Eye Tracking
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True)
-
 LEFT_EYE_IDX = [33, 133]
 RIGHT_EYE_IDX = [362, 263]
 LEFT_IRIS_IDX = 468
 RIGHT_IRIS_IDX = 473
+NOSE_IDX = 1
+CHIN_IDX = 152
+MOUTH_IDX = [61, 291]
+# Eyelids, paired upper/lower above the same point of the eye: outer pair, inner pair
+LEFT_LID_IDX = [160, 144, 158, 153]
+RIGHT_LID_IDX = [385, 380, 387, 373]
+INNER_LIP_IDX = [13, 14]  # upper, lower
+
+# Landmarks copied out of the FaceMesh result each frame, in this column order
+# (iris points only exist with refine_landmarks=True)
+LANDMARK_IDS = (LEFT_EYE_IDX + RIGHT_EYE_IDX + [NOSE_IDX, CHIN_IDX] + MOUTH_IDX +
+                LEFT_LID_IDX + RIGHT_LID_IDX + INNER_LIP_IDX + [LEFT_IRIS_IDX, RIGHT_IRIS_IDX])
+HEAD_LANDMARK_IDS = LANDMARK_IDS[:-2]
+FULL_MESH_IDS = list(range(478))
+COL = {lid: i for i, lid in enumerate(LANDMARK_IDS)}
+POSE_COLS = [COL[lid] for lid in headpose.MODEL_IDS]
+LID_COLS = [COL[lid] for lid in LEFT_LID_IDX + RIGHT_LID_IDX]
+EYE_CORNER_COLS = [COL[lid] for lid in LEFT_EYE_IDX + RIGHT_EYE_IDX]
+MOUTH_COLS = [COL[lid] for lid in INNER_LIP_IDX + MOUTH_IDX]  # upper, lower, left, right
 
 # Tolerances
 CALIBRATION_DURATION = 5  # seconds
 HORIZONTAL_TOL = 0.06
 VERTICAL_TOL = 0.06
-HEAD_TOL = 60         # reduced from 80 px → stricter
-HEAD_ANGLE_TOL = 2    # degrees
+YAW_TOL = 20          # degrees of head turn (solvePnP, see headpose.py)
+PITCH_TOL = 15        # degrees of looking up/down
+ROLL_TOL = 10         # degrees of sideways tilt
 
 # Smoothing
 SMOOTHING_WINDOW = 5
-dx_buffer, dy_buffer = deque(maxlen=SMOOTHING_WINDOW), deque(maxlen=SMOOTHING_WINDOW)
+
+# Eye openness (eye aspect ratio from the eyelid landmarks, no extra inference)
+EAR_CLOSED = 0.2       # mean EAR of both eyes below which they count as closed
+LONG_CLOSURE = 1.0     # seconds; shorter closures are blinks
+BLINK_WINDOW = 60.0    # seconds over which the blink rate is reported
+
+# Keep following the candidate's neutral gaze/head pose after calibration
+ADAPTIVE_CALIBRATION = True
 
 # Dwell detection
 OUTSIDE_FRAMES_REQUIRED = 10
-outside_eye_frame_count = 0
-outside_head_frame_count = 0
 
-# Violation counters
-eye_violation_counter = 0
-head_violation_counter = 0
-sound_violation_counter = 0
+# Second-person / empty-seat checks (facecount.py); None disables
+FACE_COUNT_INTERVAL = 0.3  # seconds
+
+# Same-candidate checks against the face signature taken while calibrating (identity.py); None disables
+IDENTITY_INTERVAL = 3.0  # seconds
+
+# Region of interest: crop around the last face, half-size in outer eye distances
+ROI_SCALE = 1.6
 
 # Sound Monitoring
 CHUNK = 1024
-FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 44100
 MAX_RMS = 1200
 THRESHOLD = 500
 
-p = pyaudio.PyAudio()
-stream = p.open(format=FORMAT, channels=CHANNELS, rate=RATE,
-                input=True, frames_per_buffer=CHUNK)
-
-# Camera
-cap = cv2.VideoCapture(0)
+# Stages reported by the tracking loops (see stagetimer.StageTimer)
+STAGES = ("capture", "convert", "inference", "eyes", "mouth", "gaze", "pose", "rules", "overlay", "handoff")
 
 
 # ===================== Functions =====================
-def get_gaze_offset(landmarks, eye_indices, iris_idx, image_w, image_h):
-    """Compute normalized gaze offset for one eye."""
-    eye_left = np.array([landmarks[eye_indices[0]].x * image_w,
-                         landmarks[eye_indices[0]].y * image_h])
-    eye_right = np.array([landmarks[eye_indices[1]].x * image_w,
-                          landmarks[eye_indices[1]].y * image_h])
+def create_face_mesh(refine_landmarks=True):
+    """Build the MediaPipe FaceMesh used by the tracker"""
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=refine_landmarks)
+
+
+def extract_landmarks(landmarks, image_w, image_h, ids=LANDMARK_IDS):
+    """(K, 2) pixel coordinates of the given landmark ids"""
+    return np.array([(landmarks[i].x, landmarks[i].y) for i in ids]) * (image_w, image_h)
+
+
+def get_gaze_offset(pts, eye_indices, iris_idx):
+    """Compute normalized gaze offset for one eye from an extract_landmarks array."""
+    eye_left = pts[COL[eye_indices[0]]]
+    eye_right = pts[COL[eye_indices[1]]]
     eye_center = (eye_left + eye_right) / 2.0
-    iris = np.array([landmarks[iris_idx].x * image_w,
-                     landmarks[iris_idx].y * image_h])
+    iris = pts[COL[iris_idx]]
 
     eye_width = np.linalg.norm(eye_right - eye_left)
     eye_height = eye_width / 2
@@ -70,142 +103,481 @@ def get_gaze_offset(landmarks, eye_indices, iris_idx, image_w, image_h):
     return dx, dy
 
 
-# ===================== Main Loop =====================
-start_time = time.time()
-calibrated = False
-horizontal_values = []
-vertical_values = []
-
-try:
-    while cap.isOpened():
-        # -------- Audio --------
-        try:
-            data = stream.read(CHUNK, exception_on_overflow=False)
-            audio_data = np.frombuffer(data, dtype=np.int16)
-        except Exception:
-            audio_data = np.array([0], dtype=np.int16)
-
-        if audio_data.size > 0:
-            rms_val = np.sqrt(np.mean(np.square(audio_data.astype(np.float64))))
-            rms = 0 if np.isnan(rms_val) or np.isinf(rms_val) else rms_val
+def eye_aspect_ratio(pts):
+    """Mean eye aspect ratio of both eyes from (..., K, 2) landmarks (one frame or a series)
+
+    Per eye: (outer lid gap + inner lid gap) / (2 * corner distance).
+    """
+    lids = pts[..., LID_COLS, :]
+    gaps = np.linalg.norm(lids[..., 0::2, :] - lids[..., 1::2, :], axis=-1)
+    corners = pts[..., EYE_CORNER_COLS, :]
+    widths = np.linalg.norm(corners[..., 0::2, :] - corners[..., 1::2, :], axis=-1)
+    ear = (gaps[..., 0::2] + gaps[..., 1::2]) / (2 * widths)
+    return (ear[..., 0] + ear[..., 1]) / 2
+
+
+class EyeHeadTracker:
+    """Gaze/head violation engine shared by the exam UI and this script.
+
+    ``process`` takes a mirrored BGR frame and returns a dict describing the
+    frame; ``draw`` renders the standard overlay.  Every stage is timed on
+    ``self.timer`` so callers only add their own capture/handoff laps.
+
+    Cost knobs: ``roi`` runs FaceMesh on a crop around the previous face
+    instead of the full frame, ``infer_every`` > 1 reuses the last landmarks
+    in between, and ``refine_landmarks=False`` drops the iris model (head
+    checks only).  With ``evidence_folder`` a short clip around every
+    violation is saved there (see evidence.py).  Every
+    ``face_count_interval`` seconds a separate face detector counts the
+    people in view on its own thread (see facecount.py).  Every
+    ``identity_interval`` seconds the face is compared with the signature
+    cached during calibration (see identity.py).
+
+    Eye openness comes from the eyelid landmarks of the same array: while
+    the eyes are closed the iris points are unreliable, so those frames
+    neither feed the gaze smoothing nor move the eye dwell counter.  Blinks
+    are counted and closures of LONG_CLOSURE seconds or more are published
+    as "eyes_closed" with their length.  The inner-lip opening, band-passed
+    to the speech rhythm, is reported as ``result["mouth"]`` for
+    talking.TalkingFusion.
+    """
+
+    def __init__(self, face_mesh=None, calibration_duration=CALIBRATION_DURATION,
+                 timer=None, refine_landmarks=True, roi=False, infer_every=1,
+                 record_path=None, record_full_mesh=False, adaptive=ADAPTIVE_CALIBRATION,
+                 yaw_tol=YAW_TOL, pitch_tol=PITCH_TOL, roll_tol=ROLL_TOL, evidence_folder=None,
+                 face_count_interval=FACE_COUNT_INTERVAL, identity_interval=IDENTITY_INTERVAL):
+        self.face_mesh = face_mesh or create_face_mesh(refine_landmarks)
+        self.calibration_duration = calibration_duration
+        self.yaw_tol, self.pitch_tol, self.roll_tol = yaw_tol, pitch_tol, roll_tol
+        self.timer = timer or stagetimer.StageTimer(STAGES)
+        self.refine_landmarks = refine_landmarks
+        self.landmark_ids = LANDMARK_IDS if refine_landmarks else HEAD_LANDMARK_IDS
+        self.roi = roi
+        self.infer_every = max(1, infer_every)
+        self.frame_index = 0
+        self.pts = None       # Landmarks of the last inference, full-frame pixels
+        self.roi_box = None   # (x0, y0, x1, y1) used for the next inference
+        self.record_path = record_path
+        self.record_ids = FULL_MESH_IDS if record_full_mesh and refine_landmarks else self.landmark_ids
+        self.recorder = None  # landmarkrec.LandmarkWriter, opened on the first frame
+        self.recorded = None  # Row written for the last inference
+        self.evidence_folder = evidence_folder
+        self.evidence = None  # evidence.EvidenceRecorder, started on the first frame
+        self.face_count_interval = face_count_interval
+        self.face_counter = None  # facecount.FaceCounter, started on the first frame
+        self.identity = None
+        if identity_interval:
+            import identity
+            self.identity = identity.IdentityCheck(identity_interval,
+                                                   enroll_interval=calibration_duration / identity.ENROLL_FRAMES)
+        self.raw = None       # (FaceMesh landmarks, width, height) of the last inference
+
+        self.dx_smooth = rollingstats.RollingMean(SMOOTHING_WINDOW)
+        self.dy_smooth = rollingstats.RollingMean(SMOOTHING_WINDOW)
+        self.start_time = time.time()
+        self.adaptive = adaptive
+        self.calibration = calibration.AdaptiveCalibration(
+            calibration_duration, self.tolerances(), self.start_time, adaptive)
+        self.pose = None          # headpose.HeadPoseEstimator, sized on the first face
+        self.angles = (0.0, 0.0, 0.0)  # Last solved yaw/pitch/roll
+
+        self.mouth = talking.MouthActivity()
+        self.ear = None
+        self.eyes_open = True
+        self.eyes_closed_since = None
+        self.blinks = collections.deque()  # Blink times within BLINK_WINDOW
+        self.blink_count = self.long_closures = 0
+        self.closed_seconds = 0.0
+
+        self.outside_eye_frame_count = 0
+        self.outside_head_frame_count = 0
+        self.eye_outside_since = self.head_outside_since = None
+        self.eye_violation_counter = 0
+        self.head_violation_counter = 0
+
+    # ---------- stages ----------
+    def _convert(self, frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def _infer(self, rgb):
+        results = self.face_mesh.process(rgb)
+        if results.multi_face_landmarks:
+            return results.multi_face_landmarks[0].landmark
+        return None
+
+    def _crop(self, frame):
+        if not (self.roi and self.roi_box):
+            return frame, (0, 0)
+        x0, y0, x1, y1 = self.roi_box
+        return frame[y0:y1, x0:x1], (x0, y0)
+
+    def _update_roi(self, pts, w, h):
+        left, right = pts[COL[LEFT_EYE_IDX[0]]], pts[COL[RIGHT_EYE_IDX[1]]]
+        half = ROI_SCALE * max(np.linalg.norm(right - left), 20.0)
+        cx, cy = (left + right) / 2
+        self.roi_box = (max(0, int(cx - half)), max(0, int(cy - half)),
+                        min(w, int(cx + half)), min(h, int(cy + half * 1.2)))
+
+    def _eyes(self, pts, now):
+        self.ear = float(eye_aspect_ratio(pts))
+        if self.ear < EAR_CLOSED:
+            if self.eyes_closed_since is None:
+                self.eyes_closed_since = now
+            return False
+        if self.eyes_closed_since is not None:
+            duration = now - self.eyes_closed_since
+            self.eyes_closed_since = None
+            self.closed_seconds += duration
+            if duration >= LONG_CLOSURE:
+                self.long_closures += 1
+                eventlog.publish("eyes_closed", value=duration)
+            else:
+                self.blink_count += 1
+                self.blinks.append(now)
+        while self.blinks and self.blinks[0] < now - BLINK_WINDOW:
+            self.blinks.popleft()
+        return True
+
+    def eye_stats(self):
+        """Blinks, blink rate per minute (last BLINK_WINDOW) and closure totals"""
+        return {"blinks": self.blink_count, "blink_rate": len(self.blinks) * 60.0 / BLINK_WINDOW,
+                "long_closures": self.long_closures, "closed_seconds": round(self.closed_seconds, 1),
+                "ear": self.ear}
+
+    def _gaze(self, pts, eyes_open=True):
+        if not self.refine_landmarks:
+            return 0.0, 0.0  # No iris landmarks: gaze is not tracked
+        if not eyes_open:
+            return self.dx_smooth.mean, self.dy_smooth.mean  # Hold the last gaze
+        l_dx, l_dy = get_gaze_offset(pts, LEFT_EYE_IDX, LEFT_IRIS_IDX)
+        r_dx, r_dy = get_gaze_offset(pts, RIGHT_EYE_IDX, RIGHT_IRIS_IDX)
+        return self.dx_smooth.update((l_dx + r_dx) / 2), self.dy_smooth.update((l_dy + r_dy) / 2)
+
+    def _pose(self, pts, w, h):
+        if self.pose is None:
+            self.pose = headpose.HeadPoseEstimator((w, h))
+        angles = self.pose.estimate(pts[POSE_COLS])
+        if angles is not None:  # Keep the last pose if solvePnP fails on this frame
+            self.angles = angles
+        return self.angles
+
+    def _rules(self, pts, smooth_dx, smooth_dy, angles, w, h):
+        nose = pts[COL[NOSE_IDX]]
+        yaw, pitch, roll = angles
+        result = {
+            "face": True, "pts": pts,
+            "smooth_dx": smooth_dx, "smooth_dy": smooth_dy,
+            "yaw": yaw, "pitch": pitch, "roll": roll,
+            "nose": (int(nose[0]), int(nose[1])), "center": (w // 2, h // 2),
+            "left_eye": pts[COL[LEFT_EYE_IDX[0]]], "right_eye": pts[COL[RIGHT_EYE_IDX[0]]],
+        }
+
+        current_time = time.time()
+        result["time"] = current_time
+        result["eyes_open"], result["ear"] = self.eyes_open, self.ear
+        result["mouth"] = self.mouth.value
+        cal = self.calibration
+        values = (smooth_dx, smooth_dy, yaw, pitch, roll)
+        if not cal.calibrated:
+            cal.update(values, current_time)
+            result["calibrating"] = int(current_time - self.start_time)
+            return result
+        h_center, v_center, yaw_center, pitch_center, roll_center = cal.centers
+
+        # Eye violation (closed-eye frames hold the dwell counter)
+        if not self.eyes_open:
+            pass
+        elif self.refine_landmarks and (abs(smooth_dx - h_center) > HORIZONTAL_TOL or
+                abs(smooth_dy - v_center) > VERTICAL_TOL):
+            if self.outside_eye_frame_count == 0:
+                self.eye_outside_since = current_time
+            self.outside_eye_frame_count += 1
+            if self.outside_eye_frame_count >= OUTSIDE_FRAMES_REQUIRED:
+                self.eye_violation_counter += 1
+                eventlog.publish("eye_violation", value=current_time - self.eye_outside_since)
+                self.outside_eye_frame_count = 0
         else:
-            rms = 0
+            self.outside_eye_frame_count = 0
 
-        if rms > THRESHOLD:
-            sound_violation_counter += 1
+        # Head violation (turned away or looking up/down)
+        if abs(yaw - yaw_center) > self.yaw_tol:
+            self._head_outside(current_time, "yaw")
+        elif abs(pitch - pitch_center) > self.pitch_tol:
+            self._head_outside(current_time, "pitch")
+        else:
+            self.outside_head_frame_count = max(0, self.outside_head_frame_count - 1)
 
-        # -------- Video --------
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame = cv2.flip(frame, 1)
+        # Head violation (tilted)
+        if abs(roll - roll_center) > self.roll_tol:
+            self._head_outside(current_time, "roll")
+        else:
+            self.outside_head_frame_count = max(0, self.outside_head_frame_count - 1)
+
+        # Baselines follow the candidate after the checks used this frame's values
+        for name in cal.update(values, current_time):
+            eventlog.publish("baseline_shift", name, cal.centers[calibration.SIGNALS.index(name)])
+        return result
+
+    def tolerances(self):
+        """Per-signal tolerances used by the adaptive calibration"""
+        return {"dx": HORIZONTAL_TOL, "dy": VERTICAL_TOL, "yaw": self.yaw_tol,
+                "pitch": self.pitch_tol, "roll": self.roll_tol}
+
+    def baselines(self):
+        """Current calibration references (empty while calibrating)"""
+        return self.calibration.snapshot()
+
+    def _head_outside(self, current_time, reason):
+        if self.outside_head_frame_count == 0:
+            self.head_outside_since = current_time
+        self.outside_head_frame_count += 1
+        if self.outside_head_frame_count >= OUTSIDE_FRAMES_REQUIRED:
+            self.head_violation_counter += 1
+            eventlog.publish("head_violation", reason, current_time - self.head_outside_since)
+            self.outside_head_frame_count = 0
+
+    # ---------- public ----------
+    def process(self, frame):
+        """Run FaceMesh and the violation logic on one mirrored BGR frame"""
+        timer = self.timer
         h, w, _ = frame.shape
-        results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-
-        if results.multi_face_landmarks:
-            landmarks = results.multi_face_landmarks[0].landmark
-
-            # Eye tracking
-            l_dx, l_dy = get_gaze_offset(landmarks, LEFT_EYE_IDX, LEFT_IRIS_IDX, w, h)
-            r_dx, r_dy = get_gaze_offset(landmarks, RIGHT_EYE_IDX, RIGHT_IRIS_IDX, w, h)
-            avg_dx, avg_dy = (l_dx + r_dx) / 2, (l_dy + r_dy) / 2
-
-            dx_buffer.append(avg_dx)
-            dy_buffer.append(avg_dy)
-            smooth_dx, smooth_dy = np.mean(dx_buffer), np.mean(dy_buffer)
-
-            # Nose position
-            nose = landmarks[1]
-            nose_x, nose_y = int(nose.x * w), int(nose.y * h)
-            center_x, center_y = w // 2, h // 2
-
-            # Calibration
-            current_time = time.time()
-            if not calibrated:
-                horizontal_values.append(smooth_dx)
-                vertical_values.append(smooth_dy)
-                cv2.putText(frame, f'Calibrating... ({int(current_time - start_time)}s)',
-                            (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 1)
-                if current_time - start_time >= CALIBRATION_DURATION:
-                    h_center = np.median(horizontal_values)
-                    v_center = np.median(vertical_values)
-                    calibrated = True
-            else:
-                # Eye violation
-                if (abs(smooth_dx - h_center) > HORIZONTAL_TOL or
-                        abs(smooth_dy - v_center) > VERTICAL_TOL):
-                    outside_eye_frame_count += 1
-                    if outside_eye_frame_count >= OUTSIDE_FRAMES_REQUIRED:
-                        eye_violation_counter += 1
-                        outside_eye_frame_count = 0
-                else:
-                    outside_eye_frame_count = 0
-
-                # Head violation (position)
-                if np.linalg.norm([nose_x - center_x, nose_y - center_y]) > HEAD_TOL:
-                    outside_head_frame_count += 1
-                    if outside_head_frame_count >= OUTSIDE_FRAMES_REQUIRED:
-                        head_violation_counter += 1
-                        outside_head_frame_count = 0
-                else:
-                    outside_head_frame_count = max(0, outside_head_frame_count - 1)
-
-                # Head angle
-                left_eye = np.array([landmarks[LEFT_EYE_IDX[0]].x * w,
-                                     landmarks[LEFT_EYE_IDX[0]].y * h])
-                right_eye = np.array([landmarks[RIGHT_EYE_IDX[0]].x * w,
-                                      landmarks[RIGHT_EYE_IDX[0]].y * h])
-                eye_vector = right_eye - left_eye
-                head_angle = np.degrees(np.arctan2(eye_vector[1], eye_vector[0]))
-                if abs(head_angle) > HEAD_ANGLE_TOL:
-                    outside_head_frame_count += 1
-                    if outside_head_frame_count >= OUTSIDE_FRAMES_REQUIRED:
-                        head_violation_counter += 1
-                        outside_head_frame_count = 0
-
-                # Debug info
-                cv2.putText(frame, f"Head Angle: {head_angle:.2f} deg", (50, 120),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-
-            # Draw reference markers
-            cv2.circle(frame, (nose_x, nose_y), 5, (255, 255, 0), -1)
-            cv2.circle(frame, (center_x, center_y), 5, (0, 255, 255), -1)
+        self.frame_index += 1
+        if self.evidence_folder:
+            self._evidence(frame)
+            timer.lap("evidence")
+        if self.face_count_interval:
+            self._count_faces(frame)
+            timer.lap("faces")
+        if self.pts is None or self.frame_index % self.infer_every == 0:
+            sub, (x0, y0) = self._crop(frame)
+            rgb = self._convert(sub)
+            timer.lap("convert")
+            landmarks = self._infer(rgb)
+            timer.lap("inference")
+            if landmarks is None:
+                self.pts = self.roi_box = self.raw = None
+                self._record(None, w, h)
+                return {"face": False}
+            self.pts = extract_landmarks(landmarks, sub.shape[1], sub.shape[0],
+                                         self.landmark_ids) + (x0, y0)
+            if self.roi:
+                self._update_roi(self.pts, w, h)
+            if self.identity is not None:
+                self.raw = (landmarks, sub.shape[1], sub.shape[0])
+            if self.record_path:
+                self.recorded = self.pts if self.record_ids is self.landmark_ids else \
+                    extract_landmarks(landmarks, sub.shape[1], sub.shape[0], self.record_ids) + (x0, y0)
+        pts = self.pts
+        self.eyes_open = self._eyes(pts, time.time())
+        timer.lap("eyes")
+        self.mouth.update(talking.mouth_opening(pts, *MOUTH_COLS), time.monotonic())
+        timer.lap("mouth")
+        smooth_dx, smooth_dy = self._gaze(pts, self.eyes_open)
+        timer.lap("gaze")
+        angles = self._pose(pts, w, h)
+        timer.lap("pose")
+        self._record(self.recorded, w, h, angles)
+        result = self._rules(pts, smooth_dx, smooth_dy, angles, w, h)
+        timer.lap("rules")
+        if self.identity is not None and self.raw is not None and self.identity.due(result["time"]):
+            self._identity(result["time"])
+            timer.lap("identity")
+        return result
+
+    def _identity(self, now):
+        import identity
+        cal = self.calibration
+        yaw, pitch, _ = self.angles
+        if cal.calibrated:
+            _, _, yaw_center, pitch_center, _ = cal.centers
+        else:  # Running pose median of the calibration window so far
+            yaw_center, pitch_center = cal.medians[2].value, cal.medians[3].value
+        if abs(yaw - yaw_center) > identity.MAX_ANGLE or abs(pitch - pitch_center) > identity.MAX_ANGLE:
+            return  # Only frontal faces are enrolled and compared
+        signature = identity.face_signature(*self.raw)
+        if self.identity.enrolled:
+            self.identity.check(signature, now)
         else:
+            self.identity.enroll(signature, now, (yaw, pitch),
+                                 (yaw_center, pitch_center) if cal.calibrated else None)
+
+    def _record(self, row, w, h, angles=None):
+        if not self.record_path:
+            return
+        if self.recorder is None:
+            import landmarkrec
+            self.recorder = landmarkrec.LandmarkWriter(self.record_path, self.record_ids, (w, h))
+        self.recorder.add(row, pose=angles)
+
+    def _evidence(self, frame):
+        if self.evidence is None:
+            import evidence
+            self.evidence = evidence.EvidenceRecorder(self.evidence_folder)
+        self.evidence.add_frame(frame, time.time())
+
+    def trigger_evidence(self, kind, detail="", ts=None):
+        """Clip an event that was not published on this process's bus"""
+        if self.evidence is not None:
+            self.evidence.trigger(kind, detail, ts)
+
+    def _count_faces(self, frame):
+        if self.face_counter is None:
+            import facecount
+            self.face_counter = facecount.FaceCounter(interval=self.face_count_interval)
+        self.face_counter.offer(frame)
+
+    def close(self):
+        """Flush the landmark recording, evidence clips and face count intervals, if any"""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.evidence is not None:
+            self.evidence.close()
+            self.evidence = None
+        if self.face_counter is not None:
+            self.face_counter.close()
+            self.face_counter = None
+
+    def draw(self, frame, result):
+        """Standard tracking overlay (markers, status text, counters)"""
+        h, w, _ = frame.shape
+        if self.face_counter is not None and self.face_counter.state == "multiple":
+            cv2.putText(frame, f"{self.face_counter.peak} faces in view", (50, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+        if self.identity is not None and self.identity.changed:
+            cv2.putText(frame, "Identity check failed", (w - 260, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+        if not result["face"]:
             cv2.putText(frame, "Eyes not detected", (50, 50),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1)
+            self.timer.lap("overlay")
+            return frame
 
-        # -------- Sound bar overlay --------
-        bar_height, bar_width = 200, 30
-        x, y = 50, 200
-        filled_height = int(min(rms / MAX_RMS, 1.0) * bar_height)
-
-        if filled_height < bar_height * 0.33:
-            color = (0, 255, 0)
-        elif filled_height < bar_height * 0.66:
-            color = (0, 255, 255)
+        nose_x, nose_y = result["nose"]
+        if "calibrating" in result:
+            cv2.putText(frame, f'Calibrating... ({result["calibrating"]}s)',
+                        (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 1)
         else:
-            color = (0, 0, 255)
-
-        cv2.rectangle(frame, (x, y), (x + bar_width, y + bar_height), (50, 50, 50), 2)
-        cv2.rectangle(frame, (x, y + bar_height - filled_height),
-                      (x + bar_width, y + bar_height), color, -1)
-
-        # -------- Unified violation summary --------
-        cv2.putText(frame, f"Eye: {eye_violation_counter}", (w-250, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-        cv2.putText(frame, f"Head: {head_violation_counter}", (w-250, 80),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-        cv2.putText(frame, f"Sound: {sound_violation_counter}", (w-250, 110),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 128, 255), 2)
-
-        # -------- Show --------
-        cv2.imshow('Eye/Head & Sound Monitoring', frame)
-        if cv2.waitKey(5) & 0xFF == ord('q'):
-            break
-
-finally:
-    cap.release()
-    cv2.destroyAllWindows()
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
+            left_eye, right_eye = result["left_eye"], result["right_eye"]
+            head_x_min = int(min(left_eye[0], right_eye[0], nose_x))
+            head_x_max = int(max(left_eye[0], right_eye[0], nose_x))
+            head_y_min = int(min(left_eye[1], right_eye[1], nose_y))
+            head_y_max = int(max(left_eye[1], right_eye[1], nose_y))
+            cv2.rectangle(frame, (head_x_min, head_y_min), (head_x_max, head_y_max), (0, 255, 0), 2)
+            cv2.putText(frame, f"Yaw {result['yaw']:.0f}  Pitch {result['pitch']:.0f}  "
+                               f"Roll {result['roll']:.0f} deg", (50, 120),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            cv2.putText(frame, "Tracking...", (50, 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 1)
+        cv2.putText(frame, f"dx:{result['smooth_dx']:.2f} dy:{result['smooth_dy']:.2f}", (50, 100),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 1)
+        cv2.putText(frame, f"Eye Violations: {self.eye_violation_counter}", (w - 300, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 1)
+        cv2.putText(frame, f"Head Violations: {self.head_violation_counter}", (w - 300, 80),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 1)
+        cv2.circle(frame, (nose_x, nose_y), 5, (255, 255, 0), -1)
+        cv2.circle(frame, result["center"], 5, (0, 255, 255), -1)
+        self.timer.lap("overlay")
+        return frame
+
+
+def draw_sound_bar(frame, rms, x=50, y=200):
+    """Analog loudness bar for the standalone monitor"""
+    bar_height, bar_width = 200, 30
+    filled_height = int(min(rms / MAX_RMS, 1.0) * bar_height)
+
+    if filled_height < bar_height * 0.33:
+        color = (0, 255, 0)
+    elif filled_height < bar_height * 0.66:
+        color = (0, 255, 255)
+    else:
+        color = (0, 0, 255)
+
+    cv2.rectangle(frame, (x, y), (x + bar_width, y + bar_height), (50, 50, 50), 2)
+    cv2.rectangle(frame, (x, y + bar_height - filled_height),
+                  (x + bar_width, y + bar_height), color, -1)
+
+
+# ===================== Main Loop =====================
+def main():
+    import pyaudio
+
+    sound_violation_counter = 0
+    p = pyaudio.PyAudio()
+    stream = p.open(format=pyaudio.paInt16, channels=CHANNELS, rate=RATE,
+                    input=True, frames_per_buffer=CHUNK)
+    import capture
+    tracker = EyeHeadTracker()
+    cap = capture.watch_camera(0, tracker.face_mesh)
+    timer = tracker.timer
+    fusion = talking.TalkingFusion()  # Candidate speaking vs. a voice in the room
+
+    # Durable, timestamped record of every violation
+    event_writer = eventlog.EventLogWriter()
+    profiler = stagetimer.start_profiler()
+
+    try:
+        while cap.isOpened():
+            timer.start()
+            # -------- Audio --------
+            try:
+                data = stream.read(CHUNK, exception_on_overflow=False)
+                audio_data = np.frombuffer(data, dtype=np.int16)
+            except Exception:
+                audio_data = np.array([0], dtype=np.int16)
+
+            if audio_data.size > 0:
+                rms_val = np.sqrt(np.mean(np.square(audio_data.astype(np.float64))))
+                rms = 0 if np.isnan(rms_val) or np.isinf(rms_val) else rms_val
+            else:
+                rms = 0
+
+            if rms > THRESHOLD:
+                sound_violation_counter += 1
+                eventlog.publish("sound_violation", value=CHUNK / RATE)
+            fusion.add_audio(rms)
+            timer.lap("audio")
+
+            # -------- Video --------
+            ret, frame = cap.read()
+            captured = time.monotonic()
+            timer.lap("capture")
+            if not ret:
+                continue  # Camera outage: the watchdog reconnects
+            frame = cv2.flip(frame, 1)
+            result = tracker.process(frame)
+            fusion.add_mouth(captured, result.get("mouth"))
+            tracker.draw(frame, result)
+            draw_sound_bar(frame, rms)
+            h, w, _ = frame.shape
+            cv2.putText(frame, f"Sound: {sound_violation_counter}", (w - 300, 110),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 128, 255), 2)
+
+            # -------- Show --------
+            cv2.imshow('Eye/Head & Sound Monitoring', frame)
+            key = cv2.waitKey(5) & 0xFF
+            timer.lap("handoff")
+            timer.frame_done()
+            if key == ord('p'):
+                print(timer.format_table())
+            elif key == ord('d'):
+                print(f"Stage timings written to {timer.dump('stage_timings.json')}")
+            elif key == ord('q'):
+                break
+
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        stream.stop_stream()
+        stream.close()
+        p.terminate()
+        tracker.close()
+        fusion.close()
+        event_writer.close()
+        stagetimer.stop_profiler(profiler)
+        print(timer.format_table())
+
+
+if __name__ == "__main__":
+    main()
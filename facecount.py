@@ -0,0 +1,132 @@
+import threading
+import time
+import cv2
+import eventlog
+
+# ===================== Settings =====================
+CHECK_INTERVAL = 0.3     # seconds between face counts (the tracker runs every frame)
+DETECT_WIDTH = 320       # frames are downscaled to this width before detection
+MIN_CONFIDENCE = 0.5
+CONFIRM_CHECKS = 2       # consecutive counts needed to start or end an interval
+MAX_INTERVAL = 10.0      # long intervals are published in chunks of at most this many seconds
+INTERVAL_EVENTS = {"multiple": "multiple_faces", "none": "no_face"}
+
+
+def create_face_detector(min_confidence=MIN_CONFIDENCE):
+    """MediaPipe short-range face detector (a few ms on a 320 px frame)"""
+    import mediapipe as mp
+    return mp.solutions.face_detection.FaceDetection(model_selection=0,
+                                                     min_detection_confidence=min_confidence)
+
+
+def count_faces(detector, rgb):
+    results = detector.process(rgb)
+    return len(results.detections) if results.detections else 0
+
+
+# ===================== Scheduled counter =====================
+class FaceCounter:
+    """Count faces in view a few times per second, off the tracking thread.
+
+    FaceMesh only follows one face, so someone behind the candidate is never
+    seen by the tracker.  ``offer(frame)`` is called with every camera frame
+    but only acts every CHECK_INTERVAL seconds, and only when the detector
+    thread is idle: it downscales the frame (the one copy, so the tracker may
+    draw on its frame afterwards) and wakes the thread.  The tracking frame
+    rate is therefore untouched; a slow detector just counts less often.
+
+    After CONFIRM_CHECKS equal counts a "multiple" (2+ faces) or "none"
+    interval starts; it is published as "multiple_faces" / "no_face" with
+    its length as the value once it ends, or every MAX_INTERVAL seconds
+    while it lasts.
+    """
+
+    def __init__(self, detector=None, interval=CHECK_INTERVAL, width=DETECT_WIDTH,
+                 confirm=CONFIRM_CHECKS, bus=eventlog.bus):
+        self.detector = detector
+        self.interval = interval
+        self.width = width
+        self.confirm = confirm
+        self.bus = bus
+        self.faces = None          # Last count
+        self.state = "one"         # Confirmed: "one", "multiple" or "none"
+        self.candidate = None      # [state, first seen, checks seen] not confirmed yet
+        self.peak = 0              # Most faces seen in the open interval
+        self.since = None          # Start of the open interval (or its unpublished part)
+        self.checks = 0
+        self.next_check = 0.0
+        self.job = None            # (ts, small RGB frame) for the thread
+        self.wake = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="face-counter", daemon=True)
+        self.thread.start()
+
+    def offer(self, frame, ts=None):
+        """Hand a BGR frame over if a count is due and the detector is idle; never blocks"""
+        ts = time.time() if ts is None else ts
+        if ts < self.next_check or self.job is not None:
+            return False
+        self.next_check = ts + self.interval
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, round(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        with self.wake:
+            self.job = (ts, cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+            self.wake.notify()
+        return True
+
+    def _run(self):
+        if self.detector is None:
+            try:
+                self.detector = create_face_detector()
+            except Exception as e:
+                print(f"Face counting disabled: {e}")
+                self.next_check = float("inf")
+                return
+        while True:
+            with self.wake:
+                while self.job is None and not self.closed:
+                    self.wake.wait()
+                if self.closed:
+                    break
+                ts, rgb = self.job
+            faces = count_faces(self.detector, rgb)
+            self.job = None
+            self.update(faces, ts)
+
+    # ---------- intervals ----------
+    def update(self, faces, ts):
+        """Feed one count taken at `ts` (public for replays and tests)"""
+        self.faces = faces
+        self.checks += 1
+        state = "multiple" if faces > 1 else "none" if faces == 0 else "one"
+        if state == self.state:
+            self.candidate = None
+            self.peak = max(self.peak, faces)
+            if self.since is not None and ts - self.since >= MAX_INTERVAL:
+                self._publish(ts)
+                self.since = ts
+            return
+        if self.candidate is None or self.candidate[0] != state:
+            self.candidate = [state, ts, 0]
+        self.candidate[2] += 1
+        if self.candidate[2] >= self.confirm:
+            changed_at = self.candidate[1]  # The change happened at its first sighting
+            if self.since is not None:
+                self._publish(changed_at)
+            self.state, self.candidate, self.peak = state, None, faces
+            self.since = changed_at if state != "one" else None
+
+    def _publish(self, end):
+        if self.bus is not None and end > self.since:
+            detail = f"{self.peak} faces" if self.state == "multiple" else ""
+            self.bus.publish(INTERVAL_EVENTS[self.state], detail, end - self.since, end)
+
+    def close(self):
+        """Stop the thread and publish the interval still open"""
+        with self.wake:
+            self.closed = True
+            self.wake.notify()
+        self.thread.join()
+        if self.since is not None:
+            self._publish(time.time())
+            self.since = None
@@ -0,0 +1,325 @@
+import sys
+import numpy as np
+import eyehead
+import landmarkrec
+import calibration
+import headpose
+from eyehead import COL, POSE_COLS, LEFT_EYE_IDX, RIGHT_EYE_IDX, LEFT_IRIS_IDX, RIGHT_IRIS_IDX
+
+# ===================== Settings =====================
+# Re-scoring defaults are the live tracker's, except that baselines stay at
+# the calibration medians: adaptive replay is a per-frame Python loop
+# (~1 us/frame per signal, ~1 s for a 2 h session against ~0.3 s for the
+# rest).  Pass adaptive=True to reproduce a tracker that adapted them.
+DEFAULTS = {
+    "calibration_duration": eyehead.CALIBRATION_DURATION,
+    "horizontal_tol": eyehead.HORIZONTAL_TOL,
+    "vertical_tol": eyehead.VERTICAL_TOL,
+    "yaw_tol": eyehead.YAW_TOL,
+    "pitch_tol": eyehead.PITCH_TOL,
+    "roll_tol": eyehead.ROLL_TOL,
+    "smoothing_window": eyehead.SMOOTHING_WINDOW,
+    "frames_required": eyehead.OUTSIDE_FRAMES_REQUIRED,
+    "adaptive": False,
+    "ear_closed": eyehead.EAR_CLOSED,
+    "long_closure": eyehead.LONG_CLOSURE,
+}
+INT_SETTINGS = ("smoothing_window", "frames_required")  # frame counts; every other number is a float
+HEAD_REASONS = ("yaw", "pitch", "roll")
+VIOLATION_DTYPE = np.dtype([("ts", "f8"), ("duration", "f8"), ("reason", "i1")])
+SCAN_CHUNK = 4096  # steps per vectorized pass of the head counter
+
+
+# ===================== Series =====================
+def gaze_series(pts):
+    """Per-frame (dx, dy) averaged over both eyes, from (T, K, 2) landmarks"""
+    x, y = np.ascontiguousarray(pts.transpose(2, 1, 0))  # (K, T) each, one pass
+
+    def offset(eye, iris):
+        lx, ly, rx, ry = x[COL[eye[0]]], y[COL[eye[0]]], x[COL[eye[1]]], y[COL[eye[1]]]
+        width = np.hypot(rx - lx, ry - ly)
+        dx = (x[COL[iris]] - (lx + rx) / 2.0) / width
+        dy = (y[COL[iris]] - (ly + ry) / 2.0) / (width / 2)
+        return dx, dy
+
+    l_dx, l_dy = offset(LEFT_EYE_IDX, LEFT_IRIS_IDX)
+    r_dx, r_dy = offset(RIGHT_EYE_IDX, RIGHT_IRIS_IDX)
+    return (l_dx + r_dx) / 2, (l_dy + r_dy) / 2
+
+
+def held_series(values, mask, fill=0.0):
+    """Spread values computed on the mask's True frames over all frames, holding the last one"""
+    k = np.cumsum(mask) - 1
+    return np.where(k >= 0, values[np.maximum(k, 0)] if len(values) else fill, fill)
+
+
+def closures(closed, ts):
+    """(start_ts, reopen_ts) of every run of closed-eye frames that ended with the eyes open"""
+    edges = np.diff(np.concatenate(([0], closed.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    keep = ends < len(closed)  # Still closed at the last frame: not reopened yet
+    return np.column_stack((ts[starts[keep]], ts[ends[keep]]))
+
+
+def rolling_mean(x, window):
+    """Trailing mean over up to `window` samples (shorter at the start), like a deque mean"""
+    c = np.cumsum(np.concatenate(([0.0], x)))
+    n = np.arange(1, len(x) + 1)
+    lo = np.maximum(n - window, 0)
+    return (c[n] - c[lo]) / (n - lo)
+
+
+def pose_series(pts, frame_size, angles=None):
+    """(T, 3) yaw/pitch/roll as the live tracker sees them.
+
+    Uses the recorded ``angles`` when there are some, else solves them from
+    the landmarks.  Frames where solvePnP fails keep the previous angles
+    (zeros before the first solve), like EyeHeadTracker._pose.
+    """
+    pose = headpose.estimate_batch(pts[:, POSE_COLS], frame_size) if angles is None else angles
+    known = ~np.isnan(pose[:, 0])
+    last = np.maximum.accumulate(np.where(known, np.arange(len(pose)), -1))
+    return np.where(last[:, None] >= 0, pose[np.maximum(last, 0)], 0.0)
+
+
+def replay_calibration(ts, values, start_ts, cfg):
+    """Run the tracker's calibration over a session's (T, 5) SIGNALS values.
+
+    Returns (first evaluated frame, (E, 5) references each evaluated frame
+    was checked against, final snapshot).  With cfg["adaptive"] the
+    baselines are replayed frame by frame (Baseline.replay, the one part
+    that is not vectorized); otherwise the references are constant after
+    the window.
+    """
+    tolerances = {"dx": cfg["horizontal_tol"], "dy": cfg["vertical_tol"], "yaw": cfg["yaw_tol"],
+                  "pitch": cfg["pitch_tol"], "roll": cfg["roll_tol"]}
+    cal = calibration.AdaptiveCalibration(cfg["calibration_duration"], tolerances, start_ts,
+                                          cfg["adaptive"])
+    rows, times = values.tolist(), ts.tolist()
+    first = len(rows)
+    for i, (row, now) in enumerate(zip(rows, times)):
+        cal.update(row, now)
+        if cal.calibrated:
+            first = i + 1  # The frame that completes calibration is still a calibration frame
+            break
+    if not cal.calibrated:
+        return first, np.empty((0, len(calibration.SIGNALS))), {}
+    if not cfg["adaptive"]:
+        return first, np.array(cal.centers)[None, :], cal.snapshot()
+    # Checks use the references from before each frame
+    centers = np.column_stack([baseline.replay(values[first:, k].tolist(), times[first:])
+                               for k, baseline in enumerate(cal.baselines)])
+    cal.centers = [baseline.center for baseline in cal.baselines]
+    return first, centers, cal.snapshot()
+
+
+# ===================== Dwell filters =====================
+def run_positions(mask):
+    """0-based position of each True inside its run of consecutive Trues"""
+    idx = np.arange(len(mask))
+    starts = np.where(mask & ~np.concatenate(([False], mask[:-1])), idx, 0)
+    return idx - np.maximum.accumulate(starts)
+
+
+def off_intervals(mask, ts, min_frames):
+    """(start_ts, end_ts) of every run of >= min_frames consecutive True frames"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    keep = ends - starts >= min_frames
+    return np.column_stack((ts[starts[keep]], ts[ends[keep] - 1]))
+
+
+def reset_dwell(off, ts, frames_required):
+    """Eye-style counter: +1 when off, back to 0 when on, fire and reset at N"""
+    pos = run_positions(off)
+    hits = np.flatnonzero(off & ((pos + 1) % frames_required == 0))
+    out = np.zeros(len(hits), VIOLATION_DTYPE)
+    out["ts"] = ts[hits]
+    out["duration"] = ts[hits] - ts[hits - (frames_required - 1)]
+    return out
+
+
+def decaying_dwell(steps, frames_required, chunk=SCAN_CHUNK):
+    """Head-style counter: +1 when off, -1 (not below 0) when on, fire and reset at N.
+
+    A clamped walk is ``S_n + c0 - min(0, c0 + min S_k)`` over the step
+    prefix sums, so each pass is vectorized.  Passes start short after a
+    violation (they tend to cluster) and double while nothing fires.
+    Returns the indices of firing steps and of the step each dwell started at.
+    """
+    s = np.where(steps, 1, -1).astype(np.int32)
+    hits, since = [], []
+    pos, c0, start, size = 0, 0, -1, frames_required * 4
+    while pos < len(s):
+        part = s[pos:pos + size]
+        S = np.cumsum(part)
+        c = S + c0 - np.minimum(0, c0 + np.minimum.accumulate(S))
+        fired = np.flatnonzero(c >= frames_required)
+        end = fired[0] + 1 if len(fired) else len(c)
+        prev = np.concatenate(([c0], c[:end - 1]))
+        starts = np.flatnonzero((prev == 0) & (c[:end] == 1))
+        if len(starts):
+            start = pos + starts[-1]
+        if len(fired):
+            hits.append(pos + fired[0])
+            since.append(start)
+            pos, c0, start, size = pos + end, 0, -1, frames_required * 4
+        else:
+            pos, c0, size = pos + len(c), int(c[-1]), min(size * 2, chunk)
+    return np.array(hits, dtype=np.int64), np.array(since, dtype=np.int64)
+
+
+# ===================== Session =====================
+def analyze(pts, ts, frame_size, start_ts=None, refine=True, pose=None, lids=True, angles=None,
+            **settings):
+    """Re-run calibration and violation logic over a whole recorded session.
+
+    pts: (T, K, 2) pixels in eyehead.LANDMARK_IDS column order, NaN rows where
+    no face was found; ts: (T,) seconds; frame_size: (w, h).  Keyword settings
+    override DEFAULTS (e.g. horizontal_tol=0.08, yaw_tol=25).  ``angles`` is
+    the (T, 3) pose the tracker recorded; without it head pose is solved
+    from the landmarks, the slow part (~20 us/frame), so pass a previous
+    result's "pose" to re-score with other tolerances.  Without ``lids``
+    (recordings older than the eyelid columns) every frame counts as eyes open.
+    """
+    cfg = dict(DEFAULTS, **settings)
+    pts, ts = np.asarray(pts, dtype=np.float64), np.asarray(ts, dtype=np.float64)
+    start_ts = ts[0] if start_ts is None and len(ts) else start_ts
+    checked = pts if lids else np.delete(pts, eyehead.LID_COLS, axis=1)
+    valid = ~np.isnan(checked.reshape(len(pts), -1).sum(axis=1))
+    frames = np.flatnonzero(valid)
+    p, t = (pts, ts) if valid.all() else (pts[valid], ts[valid])
+
+    # Eye openness; closed frames neither feed the gaze smoothing nor the eye counter
+    ear = eyehead.eye_aspect_ratio(p) if lids else np.full(len(t), np.nan)
+    closed = ear < cfg["ear_closed"]
+    eyes_open = ~closed
+    shut = closures(closed, t)
+    shut_seconds = shut[:, 1] - shut[:, 0]
+    long_shut = shut_seconds >= cfg["long_closure"]
+
+    if refine:
+        dx, dy = gaze_series(p[eyes_open])
+        dx = held_series(rolling_mean(dx, cfg["smoothing_window"]), eyes_open)
+        dy = held_series(rolling_mean(dy, cfg["smoothing_window"]), eyes_open)
+    else:
+        dx = dy = np.zeros(len(t))
+    if pose is None:
+        pose = pose_series(p, frame_size, None if angles is None else angles[valid])
+    values = np.column_stack((dx, dy, pose))
+    first, centers, baselines = replay_calibration(t, values, start_ts, cfg)
+    calibrated = len(centers) > 0
+
+    # Evaluated frames (after calibration, face present)
+    e = slice(first, None)
+    te, ve, oe = t[e], values[e], eyes_open[e]
+    if refine and calibrated:
+        eye_off = ((np.abs(ve[:, 0] - centers[:, 0]) > cfg["horizontal_tol"]) |
+                   (np.abs(ve[:, 1] - centers[:, 1]) > cfg["vertical_tol"])) & oe
+    else:
+        eye_off = np.zeros(len(te), dtype=bool)
+    if calibrated:
+        yaw_off = np.abs(ve[:, 2] - centers[:, 2]) > cfg["yaw_tol"]
+        pitch_off = np.abs(ve[:, 3] - centers[:, 3]) > cfg["pitch_tol"]
+        roll_off = np.abs(ve[:, 4] - centers[:, 4]) > cfg["roll_tol"]
+    else:
+        yaw_off = pitch_off = roll_off = np.zeros(len(te), dtype=bool)
+    turned_off = yaw_off | pitch_off
+
+    N = cfg["frames_required"]
+    eye_violations = reset_dwell(eye_off[oe], te[oe], N)
+
+    # Turn (yaw, else pitch) then tilt check per frame, sharing one counter
+    steps = np.column_stack((turned_off, roll_off)).ravel()
+    step_ts = np.repeat(te, 2)
+    hits, since = decaying_dwell(steps, N)
+    head_violations = np.zeros(len(hits), VIOLATION_DTYPE)
+    head_violations["ts"] = step_ts[hits]
+    head_violations["duration"] = step_ts[hits] - step_ts[since]
+    head_violations["reason"] = np.where(hits % 2, 2, np.where(yaw_off[hits // 2], 0, 1))
+
+    def full(mask):
+        out = np.zeros(len(ts), dtype=bool)
+        out[frames[first:]] = mask
+        return out
+
+    return {
+        "frames": len(ts),
+        "face_frames": int(valid.sum()),
+        "settings": cfg,
+        "baselines": baselines,
+        "calibrated_ts": t[first - 1] if calibrated else None,
+        "dx": dx,
+        "dy": dy,
+        "pose": pose,
+        "ear": ear,
+        "eye_off": full(eye_off),
+        "head_off": full(turned_off | roll_off),
+        "eye_intervals": off_intervals(eye_off[oe], te[oe], N),
+        "blinks": int((~long_shut).sum()),
+        "blink_rate": (~long_shut).sum() * 60.0 / (t[-1] - t[0]) if len(t) > 1 else 0.0,
+        "closures": shut[long_shut],  # (reopen_ts - start_ts) >= long_closure
+        "closed_seconds": float(shut_seconds.sum()),
+        "head_intervals": off_intervals(turned_off | roll_off, te, N),
+        "eye_violations": eye_violations,
+        "head_violations": head_violations,
+    }
+
+
+def to_events(result):
+    """Violations as (ts, kind, detail, value) event tuples, in the tracker's order"""
+    # Within one frame the tracker publishes eye closures first, then eye, then head
+    events = [(float(end), "eyes_closed", "", float(end - start)) for start, end in result["closures"]]
+    events += [(float(v["ts"]), "eye_violation", "", float(v["duration"]))
+               for v in result["eye_violations"]]
+    events += [(float(v["ts"]), "head_violation", HEAD_REASONS[v["reason"]], float(v["duration"]))
+               for v in result["head_violations"]]
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def parse_setting(name, text):
+    """Command-line value of a DEFAULTS setting: frame counts are ints, flags
+    true/false (or 1/0, yes/no), everything else a float"""
+    if name not in DEFAULTS:
+        raise ValueError(f"unknown setting {name!r} (one of {', '.join(DEFAULTS)})")
+    if isinstance(DEFAULTS[name], bool):
+        flag = text.strip().lower()
+        if flag not in ("true", "false", "1", "0", "yes", "no", "on", "off"):
+            raise ValueError(f"{name} must be true or false, not {text!r}")
+        return flag in ("true", "1", "yes", "on")
+    if name in INT_SETTINGS:
+        return int(text)
+    return float(text)
+
+
+def analyze_recording(path, **settings):
+    """analyze() over a landmarkrec file written by the tracker"""
+    rec = landmarkrec.LandmarkRecording(path)
+    ids = set(rec.ids.tolist())
+    refine = LEFT_IRIS_IDX in ids and RIGHT_IRIS_IDX in ids
+    columns = eyehead.LANDMARK_IDS if refine else eyehead.HEAD_LANDMARK_IDS
+    lids = all(lid in ids for lid in eyehead.LEFT_LID_IDX + eyehead.RIGHT_LID_IDX)
+    if lids:
+        pts = rec.pixels(columns)
+    else:  # Recorded before the eyelid columns existed: leave them NaN
+        present = [i for i, lid in enumerate(columns) if lid in ids]
+        pts = np.full((len(rec.timestamps()), len(columns), 2), np.nan)
+        pts[:, present] = rec.pixels([columns[i] for i in present])
+    result = analyze(pts, rec.timestamps(), (rec.width, rec.height), start_ts=rec.start_ts,
+                     refine=refine, lids=lids, angles=rec.angles(), **settings)
+    rec.close()
+    return result
+
+
+if __name__ == "__main__":
+    # python gazeanalytics.py <landmarks.lmk> [setting=value ...]
+    overrides = dict(arg.split("=", 1) for arg in sys.argv[2:])
+    settings = {k: parse_setting(k, v) for k, v in overrides.items()}
+    result = analyze_recording(sys.argv[1], **settings)
+    print(f"Frames: {result['frames']} ({result['face_frames']} with a face)")
+    print(f"Eye violations: {len(result['eye_violations'])}")
+    print(f"Head violations: {len(result['head_violations'])}")
+    print(f"Off-screen intervals: {len(result['eye_intervals'])} eye, {len(result['head_intervals'])} head")
+    print(f"Blinks: {result['blinks']} ({result['blink_rate']:.1f}/min), "
+          f"long eye closures: {len(result['closures'])} ({result['closed_seconds']:.1f}s closed)")
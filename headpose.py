@@ -0,0 +1,153 @@
+import math
+import cv2
+import numpy as np
+
+# ===================== Face model =====================
+# Generic 3D face (mm) in camera axes: x right, y down, z away from the
+# camera, nose tip at the origin.  Order matches MODEL_IDS (FaceMesh ids).
+MODEL_IDS = [1, 152, 33, 263, 61, 291]  # nose tip, chin, eye outer corners, mouth corners
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),
+    (0.0, 330.0, 65.0),
+    (-225.0, -170.0, 135.0),
+    (225.0, -170.0, 135.0),
+    (-150.0, 150.0, 125.0),
+    (150.0, 150.0, 125.0),
+])
+NO_DISTORTION = np.zeros((4, 1))
+BATCH_ITERATIONS = 12   # Gauss-Newton steps of estimate_batch (it converges in 4-6)
+BATCH_TOLERANCE = 1e-7  # frames stop iterating once a step is this small (rad / mm)
+BATCH_CHUNK = 16384     # frames solved together (bounds the Jacobian memory)
+
+
+def camera_matrix(width, height):
+    """Pinhole approximation: focal length ~ image width, centered principal point"""
+    return np.array([[width, 0, width / 2.0], [0, width, height / 2.0], [0, 0, 1.0]])
+
+
+def euler_angles(rvec):
+    """(yaw, pitch, roll) in degrees from a solvePnP rotation vector"""
+    R, _ = cv2.Rodrigues(rvec)
+    pitch = math.atan2(R[2, 1], R[2, 2])
+    yaw = math.atan2(-R[2, 0], math.hypot(R[2, 1], R[2, 2]))
+    roll = math.atan2(R[1, 0], R[0, 0])
+    return math.degrees(yaw), math.degrees(pitch), math.degrees(roll)
+
+
+class HeadPoseEstimator:
+    """solvePnP on six landmarks, warm-started from the previous frame.
+
+    Angles are independent of the camera resolution; yaw/pitch are what
+    turning away or looking down actually changes.
+    """
+
+    def __init__(self, frame_size):
+        self.camera = camera_matrix(*frame_size)
+        self.rvec = self.tvec = None
+
+    def estimate(self, points):
+        """(6, 2) image points in MODEL_IDS order -> (yaw, pitch, roll) or None"""
+        image = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 1, 2)
+        if self.rvec is None:
+            ok, rvec, tvec = cv2.solvePnP(MODEL_POINTS, image, self.camera, NO_DISTORTION,
+                                          flags=cv2.SOLVEPNP_ITERATIVE)
+        else:
+            ok, rvec, tvec = cv2.solvePnP(MODEL_POINTS, image, self.camera, NO_DISTORTION,
+                                          self.rvec, self.tvec, useExtrinsicGuess=True,
+                                          flags=cv2.SOLVEPNP_ITERATIVE)
+        if not ok or tvec[2, 0] <= 0:
+            self.rvec = self.tvec = None  # Behind the camera: start over next frame
+            return None
+        self.rvec, self.tvec = rvec, tvec
+        return euler_angles(rvec)
+
+
+def _rotations(w):
+    """(N, 3) rotation vectors -> (N, 3, 3) matrices (Rodrigues, vectorized)"""
+    theta = np.linalg.norm(w, axis=1)
+    small = theta < 1e-12
+    k = w / np.where(small, 1.0, theta)[:, None]
+    K = np.zeros((len(w), 3, 3))
+    K[:, 0, 1], K[:, 0, 2], K[:, 1, 2] = -k[:, 2], k[:, 1], -k[:, 0]
+    K[:, 1, 0], K[:, 2, 0], K[:, 2, 1] = k[:, 2], -k[:, 1], k[:, 0]
+    s, c = np.sin(theta)[:, None, None], (1 - np.cos(theta))[:, None, None]
+    R = np.eye(3) + s * K + c * (K @ K)
+    R[small] = np.eye(3)
+    return R
+
+
+def _weak_perspective(image, camera):
+    """Closed-form scaled-orthographic pose of (N, 6, 2) points: initial (R, t)"""
+    f, cx, cy = camera[0, 0], camera[0, 2], camera[1, 2]
+    model = MODEL_POINTS - MODEL_POINTS.mean(axis=0)
+    centroid = image.mean(axis=1)
+    M = np.einsum("kj,nkc->ncj", np.linalg.pinv(model).T, image - centroid[:, None, :])  # (N, 2, 3)
+    n1, n2 = np.linalg.norm(M[:, 0], axis=1), np.linalg.norm(M[:, 1], axis=1)
+    r1 = M[:, 0] / n1[:, None]
+    r2 = M[:, 1] - np.sum(M[:, 1] * r1, axis=1)[:, None] * r1
+    r2 /= np.linalg.norm(r2, axis=1)[:, None]
+    R = np.stack((r1, r2, np.cross(r1, r2)), axis=1)
+    tz = f / ((n1 + n2) / 2)
+    t = np.column_stack(((centroid[:, 0] - cx) * tz / f, (centroid[:, 1] - cy) * tz / f, tz))
+    return R, t - np.einsum("nij,j->ni", R, MODEL_POINTS.mean(axis=0))
+
+
+def solve_batch(image, camera, iterations=BATCH_ITERATIONS, tol=BATCH_TOLERANCE):
+    """Vectorized PnP: (N, 6, 2) points -> (N, 3, 3) rotations, (N, 3) translations.
+
+    Weak-perspective start, then Gauss-Newton on the reprojection error of
+    every frame at once (frames drop out as they converge); it lands on the
+    minimum solvePnP's refinement finds.
+    """
+    f, cx, cy = camera[0, 0], camera[0, 2], camera[1, 2]
+    R, t = _weak_perspective(image, camera)
+    active = np.arange(len(image))
+    for _ in range(iterations):
+        Ra, ta = R[active], t[active]
+        RX = np.einsum("nij,kj->nki", Ra, MODEL_POINTS)  # (N, 6, 3)
+        x, y = RX[..., 0] + ta[:, None, 0], RX[..., 1] + ta[:, None, 1]
+        z = np.maximum(RX[..., 2] + ta[:, None, 2], 1e-9)
+        iz = f / z
+        ru = x * iz + cx - image[active, :, 0]
+        rv = y * iz + cy - image[active, :, 1]
+        # With R <- exp(omega) R and t <- t + dt: dP = omega x RX + dt
+        a, b, c = RX[..., 0], RX[..., 1], RX[..., 2]
+        px, py = x / z, y / z
+        Ju = np.stack((-px * b * iz, (c + px * a) * iz, -b * iz, iz, np.zeros_like(iz), -px * iz), axis=2)
+        Jv = np.stack((-(c + py * b) * iz, py * a * iz, a * iz, np.zeros_like(iz), iz, -py * iz), axis=2)
+        J = np.concatenate((Ju, Jv), axis=1)  # (N, 12, 6)
+        r = np.concatenate((ru, rv), axis=1)
+        JT = J.transpose(0, 2, 1)
+        step = np.linalg.solve(JT @ J + 1e-9 * np.eye(6), -(JT @ r[..., None]))[..., 0]
+        R[active] = _rotations(step[:, :3]) @ Ra
+        t[active] = ta + step[:, 3:]
+        active = active[np.abs(step).max(axis=1) > tol]
+        if not len(active):
+            break
+    return R, t
+
+
+def euler_batch(R):
+    """(N, 3, 3) rotations -> (N, 3) yaw/pitch/roll in degrees, as euler_angles()"""
+    pitch = np.arctan2(R[:, 2, 1], R[:, 2, 2])
+    yaw = np.arctan2(-R[:, 2, 0], np.hypot(R[:, 2, 1], R[:, 2, 2]))
+    roll = np.arctan2(R[:, 1, 0], R[:, 0, 0])
+    return np.degrees(np.column_stack((yaw, pitch, roll)))
+
+
+def estimate_batch(points, frame_size, chunk=BATCH_CHUNK):
+    """(T, 6, 2) points (NaN rows = no face) -> (T, 3) yaw/pitch/roll, NaN where unknown.
+
+    Every frame is solved at once (solve_batch, in chunks to bound memory)
+    and converges to the pose the live tracker's solvePnP settles on; a face
+    that comes out behind the camera is unknown, as live.
+    """
+    out = np.full((len(points), 3), np.nan)
+    frames = np.flatnonzero(~np.isnan(points).any(axis=(1, 2)))
+    camera = camera_matrix(*frame_size)
+    for lo in range(0, len(frames), chunk):
+        idx = frames[lo:lo + chunk]
+        R, t = solve_batch(points[idx].astype(np.float64), camera)
+        ok = (t[:, 2] > 0) & np.isfinite(R).all(axis=(1, 2))
+        out[idx[ok]] = euler_batch(R[ok])
+    return out
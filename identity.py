@@ -0,0 +1,114 @@
+import numpy as np
+import eventlog
+
+# ===================== Settings =====================
+# Rigid FaceMesh points (no brows, lids or lips, which move with expressions):
+# eye corners, nose bridge/tip/base/alae, forehead, chin, cheeks, jaw angles
+SIGNATURE_IDS = [33, 133, 362, 263, 168, 6, 1, 2, 98, 327, 10, 152, 234, 454, 172, 397]
+SCALE_PAIR = (0, 3)        # outer eye corners: every distance is divided by this one
+CHECK_INTERVAL = 3.0       # seconds between re-verifications
+ENROLL_FRAMES = 30         # frontal frames averaged into the reference signature, spread over calibration
+MIN_ENROLL_FRAMES = 5
+MAX_ANGLE = 15             # degrees of yaw/pitch beyond which a face is not compared
+THRESHOLD = 0.07           # mean relative difference of the ratios that counts as another face
+QUICK_FEATURES = 24        # features compared first; clear cases stop there
+CONFIRM_CHECKS = 2         # consecutive mismatches before "identity_changed"
+
+_I, _J = np.triu_indices(len(SIGNATURE_IDS), 1)
+_SCALE = int(np.flatnonzero((_I == SCALE_PAIR[0]) & (_J == SCALE_PAIR[1]))[0])
+
+
+def face_signature(landmarks, w, h):
+    """Pairwise 3D distances of the rigid points divided by the eye span (scale free)
+
+    `landmarks` is a FaceMesh landmark list; z has the scale of x.
+    """
+    pts = np.array([(landmarks[i].x * w, landmarks[i].y * h, landmarks[i].z * w)
+                    for i in SIGNATURE_IDS])
+    d = np.linalg.norm(pts[_I] - pts[_J], axis=1)
+    return np.delete(d, _SCALE) / max(d[_SCALE], 1e-6)
+
+
+def signature_distance(signature, reference, order, threshold=THRESHOLD, quick=QUICK_FEATURES):
+    """Mean relative difference; decided on the `quick` most telling features when clear-cut"""
+    rel = np.abs(signature - reference) / reference
+    head = float(rel[order[:quick]].mean())
+    if head < threshold / 2 or head > threshold * 2:
+        return head, True
+    return float(rel.mean()), False
+
+
+# ===================== Continuity check =====================
+class IdentityCheck:
+    """Cached face signature of the candidate, re-verified every few seconds.
+
+    ``enroll`` collects frontal signatures while the tracker calibrates, one
+    per ``enroll_interval`` so they cover the whole window; once it is over,
+    the samples whose pose was off the calibrated center are dropped and
+    the rest averaged.  ``check`` compares one frontal signature with that
+    reference.  Features
+    are ordered by how much they vary across the enrollment frames (least
+    first), so the quick comparison looks at the most stable ratios and
+    usually settles the check on its own.  CONFIRM_CHECKS mismatches in a
+    row publish "identity_changed" once; a later match re-arms it.
+    """
+
+    def __init__(self, interval=CHECK_INTERVAL, threshold=THRESHOLD, enroll_interval=0.0, bus=eventlog.bus):
+        self.interval = interval
+        self.enroll_interval = enroll_interval
+        self.threshold = threshold
+        self.bus = bus
+        self.samples = []          # (signature, yaw, pitch) collected for enrollment
+        self.reference = None
+        self.order = None
+        self.next_check = 0.0
+        self.mismatches = 0
+        self.changed = False   # An "identity_changed" episode is open
+        self.last_distance = None
+        self.checks = self.quick_checks = 0
+
+    @property
+    def enrolled(self):
+        return self.reference is not None
+
+    def due(self, ts):
+        return ts >= self.next_check
+
+    def enroll(self, signature, ts, angles, center=None):
+        """Add one signature taken at (yaw, pitch) `angles`.
+
+        `center` is the calibrated (yaw, pitch) once calibration is over: it
+        freezes the reference from the samples within MAX_ANGLE of it.
+        """
+        self.next_check = ts + self.enroll_interval
+        if len(self.samples) < ENROLL_FRAMES:
+            self.samples.append((signature, angles[0], angles[1]))
+        if center is None:
+            return
+        frontal = [s for s, yaw, pitch in self.samples
+                   if abs(yaw - center[0]) <= MAX_ANGLE and abs(pitch - center[1]) <= MAX_ANGLE]
+        if len(frontal) < MIN_ENROLL_FRAMES:
+            self.samples = [(s, center[0], center[1]) for s in frontal]  # Keep collecting after calibration
+            return
+        samples = np.array(frontal)
+        self.reference = np.maximum(samples.mean(axis=0), 1e-6)
+        self.order = np.argsort(samples.std(axis=0) / self.reference)
+        self.samples = []
+
+    def check(self, signature, ts):
+        """Compare with the reference; returns the distance"""
+        self.next_check = ts + self.interval
+        distance, quick = signature_distance(signature, self.reference, self.order, self.threshold)
+        self.checks += 1
+        self.quick_checks += quick
+        self.last_distance = distance
+        if distance <= self.threshold:
+            self.mismatches = 0
+            self.changed = False
+            return distance
+        self.mismatches += 1
+        if self.mismatches >= CONFIRM_CHECKS and not self.changed:
+            self.changed = True
+            if self.bus is not None:
+                self.bus.publish("identity_changed", f"distance {distance:.3f}", distance, ts)
+        return distance
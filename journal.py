@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+import time
+
+# ===================== Settings =====================
+SESSION_DIR = "exam_session"
+JOURNAL_FILE = "journal.log"
+ROTATED_FILE = "journal.old"
+SNAPSHOT_FILE = "snapshot.json"
+
+FSYNC_INTERVAL = 0.5    # seconds between batched fsyncs of the journal
+SNAPSHOT_EVERY = 200    # journal records between snapshots
+
+
+def _fsync_dir(folder):
+    """Make a rename inside folder durable (no-op where unsupported)"""
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, data, indent=None):
+    """Write JSON so readers see either the old file or the complete new one"""
+    folder = os.path.dirname(os.path.abspath(path))
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(folder)
+
+
+def new_state():
+    return {
+        "seq": 0,
+        "started": None,
+        "completed": False,
+        "question_ids": [],
+        "seed": None,
+        "duration": None,
+        "answers": {},
+        "bookmarks": [],
+        "current_q": 0,
+        "time_remaining": None,
+        "violations": {},
+    }
+
+
+def apply_record(state, rec):
+    """Apply one journal record to a session state dict"""
+    kind = rec["k"]
+    if kind == "a":
+        state["answers"][str(rec["q"])] = rec["v"]
+    elif kind == "b":
+        marks = set(state["bookmarks"])
+        (marks.add if rec["on"] else marks.discard)(rec["q"])
+        state["bookmarks"] = sorted(marks)
+    elif kind == "p":
+        state["current_q"] = rec["q"]
+    elif kind == "r":
+        state["time_remaining"] = rec["r"]
+    elif kind == "v":
+        state["violations"][rec["e"]] = state["violations"].get(rec["e"], 0) + 1
+    elif kind == "s":
+        state.update(started=rec["t"], question_ids=rec["ids"], seed=rec["seed"],
+                     duration=rec["d"], time_remaining=rec["d"])
+    elif kind == "end":
+        state["completed"] = True
+    state["seq"] = rec["n"]
+
+
+def _replay_file(path, state):
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break  # Torn tail from a crash mid-write: everything before it is valid
+            if rec.get("n", 0) > state["seq"]:
+                apply_record(state, rec)
+
+
+def replay(folder=SESSION_DIR):
+    """Rebuild session state from the last snapshot plus the journal"""
+    state = new_state()
+    try:
+        with open(os.path.join(folder, SNAPSHOT_FILE)) as f:
+            state.update(json.load(f))
+    except (FileNotFoundError, ValueError):
+        pass
+    _replay_file(os.path.join(folder, ROTATED_FILE), state)
+    _replay_file(os.path.join(folder, JOURNAL_FILE), state)
+    return state
+
+
+def load_session(folder=SESSION_DIR):
+    """State of an unfinished exam in folder, or None"""
+    if not os.path.isdir(folder):
+        return None
+    state = replay(folder)
+    if state["started"] is None or state["completed"]:
+        return None
+    return state
+
+
+class ExamJournal:
+    """Append-only, crash-safe journal of one candidate's exam session.
+
+    Every answer change, bookmark, navigation step, timer checkpoint and
+    violation becomes one compact JSON line.  Writes only reach the OS page
+    cache on the calling (Tk) thread; a background thread fsyncs them in
+    batches every FSYNC_INTERVAL and periodically writes an atomic snapshot
+    so replay on restart stays short.
+    """
+
+    def __init__(self, folder=SESSION_DIR, state=None):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.state = state if state is not None else new_state()
+        self._lock = threading.Lock()
+        self._file = open(os.path.join(folder, JOURNAL_FILE), "ab")
+        self._dirty = False
+        self._since_snapshot = 0
+        self._closed = False
+        # Fold any replayed (or stale) journal into a snapshot of the given state
+        self.snapshot()
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-fsync", daemon=True)
+        self._flusher.start()
+
+    # ---------- writing ----------
+    def _append(self, rec):
+        with self._lock:
+            if self._closed:
+                return
+            rec["n"] = self.state["seq"] + 1
+            apply_record(self.state, rec)
+            self._file.write(json.dumps(rec, separators=(",", ":")).encode() + b"\n")
+            self._file.flush()  # Survives a process crash; fsync handles power loss
+            self._dirty = True
+            self._since_snapshot += 1
+
+    def start(self, question_ids, seed, duration):
+        self._append({"k": "s", "t": time.time(), "ids": list(question_ids),
+                      "seed": seed, "d": duration})
+
+    def record_answer(self, q, value):
+        if self.state["answers"].get(str(q)) != value:
+            self._append({"k": "a", "q": q, "v": value})
+
+    def record_bookmark(self, q, on):
+        self._append({"k": "b", "q": q, "on": 1 if on else 0})
+
+    def record_position(self, q):
+        if self.state["current_q"] != q:
+            self._append({"k": "p", "q": q})
+
+    def record_time(self, remaining):
+        self._append({"k": "r", "r": remaining})
+
+    def record_violation(self, kind, detail=""):
+        self._append({"k": "v", "e": kind, "d": detail, "t": time.time()})
+
+    # ---------- durability ----------
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(FSYNC_INTERVAL)
+            self.sync()
+            if self._since_snapshot >= SNAPSHOT_EVERY:
+                self.snapshot()
+
+    def sync(self):
+        """fsync everything written so far"""
+        with self._lock:
+            if not self._dirty or self._closed:
+                return
+            self._dirty = False
+            fd = self._file.fileno()
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass  # Journal was rotated or closed meanwhile; both fsync themselves
+
+    def snapshot(self):
+        """Atomically persist the current state and start a fresh journal"""
+        journal_path = os.path.join(self.folder, JOURNAL_FILE)
+        rotated_path = os.path.join(self.folder, ROTATED_FILE)
+        with self._lock:
+            if self._closed:
+                return
+            # Rotating is just a rename; the slow fsyncs happen outside the lock
+            old_file = self._file
+            os.replace(journal_path, rotated_path)
+            self._file = open(journal_path, "ab")
+            state = json.loads(json.dumps(self.state))
+            self._since_snapshot = 0
+        old_file.flush()
+        os.fsync(old_file.fileno())
+        old_file.close()
+        atomic_write_json(os.path.join(self.folder, SNAPSHOT_FILE), state)
+        os.remove(rotated_path)
+
+    def finish(self):
+        """Mark the exam complete and remove the session files"""
+        self._append({"k": "end"})
+        self.close()
+        for name in (JOURNAL_FILE, ROTATED_FILE, SNAPSHOT_FILE):
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                pass
+        try:
+            os.rmdir(self.folder)
+        except OSError:
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
@@ -0,0 +1,285 @@
+import glob
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+# ===================== Format =====================
+# <file>     = HEADER, landmark ids (uint16 x K), padding to 8, chunk*
+# <chunk>    = CHUNK, ts column, padding, coordinate column, padding, pose column, padding
+# ts         = uint32 milliseconds since start_ts (monotonic clock)
+# coordinate = int16 pixels * SCALE, (frames, K, 2); MISSING where no face
+# pose       = int16 degrees * POSE_SCALE, (frames, 3) yaw/pitch/roll the
+#              tracker used; MISSING where no face (version 2 on)
+# Raw chunks can be memory-mapped as they are; compressed chunks hold the
+# zlib'd per-frame deltas (int16 wrap-around, so decoding is exact).
+MAGIC = b"LMK1"
+VERSION = 2
+VERSIONS = (1, 2)
+HEADER = struct.Struct("<4sHHHHd")   # magic, version, K, width, height, start_ts
+CHUNK_V1 = struct.Struct("<4sIBxxxII")  # magic, frames, codec, ts bytes, coordinate bytes
+CHUNK = struct.Struct("<4sIBxxxIII")    # ... pose bytes
+CHUNK_MAGIC = b"LCHK"
+RAW, ZLIB_DELTA = 0, 1
+SCALE = 8                            # 1/8 px resolution, up to 4095 px
+POSE_SCALE = 100                     # 0.01 degree resolution
+MISSING = np.iinfo(np.int16).min
+CHUNK_FRAMES = 900                   # 30 s at 30 FPS
+RECORDING_PATTERN = "landmarks-*.lmk"
+
+
+def _pad(n):
+    return -n % 8
+
+
+def quantize(pts):
+    """(K, 2) float pixels (or None/NaN for no face) -> (K, 2) int16"""
+    if pts is None:
+        return None
+    q = np.rint(np.asarray(pts, dtype=np.float64) * SCALE)
+    q[~np.isfinite(q)] = MISSING
+    return np.clip(q, MISSING + 1, np.iinfo(np.int16).max).astype(np.int16)
+
+
+def quantize_pose(angles):
+    """(yaw, pitch, roll) degrees (or None) -> (3,) int16"""
+    if angles is None:
+        return None
+    q = np.rint(np.asarray(angles, dtype=np.float64) * POSE_SCALE)
+    q[~np.isfinite(q)] = MISSING
+    return np.clip(q, MISSING + 1, np.iinfo(np.int16).max).astype(np.int16)
+
+
+def to_pixels(coords):
+    """int16 coordinates -> float32 pixels with NaN for missing"""
+    out = coords.astype(np.float32) / SCALE
+    out[coords == MISSING] = np.nan
+    return out
+
+
+# ===================== Writer =====================
+class LandmarkWriter:
+    """Append per-frame landmarks to a chunked .lmk file.
+
+    ``add`` is cheap (one row copy); a chunk is encoded and written every
+    CHUNK_FRAMES frames, so a crash loses at most the open chunk.
+    """
+
+    def __init__(self, path, landmark_ids, frame_size, compress=True, chunk_frames=CHUNK_FRAMES,
+                 start_ts=None):
+        self.path = path
+        self.ids = np.asarray(landmark_ids, dtype=np.uint16)
+        self.compress = compress
+        self.chunk_frames = chunk_frames
+        self.start_ts = time.time() if start_ts is None else start_ts
+        self._t0 = time.monotonic()
+        self._ts = np.empty(chunk_frames, dtype=np.uint32)
+        self._coords = np.empty((chunk_frames, len(self.ids), 2), dtype=np.int16)
+        self._pose = np.empty((chunk_frames, 3), dtype=np.int16)
+        self._missing = np.full((len(self.ids), 2), MISSING, dtype=np.int16)
+        self._n = 0
+        self.frames = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        width, height = frame_size
+        head = HEADER.pack(MAGIC, VERSION, len(self.ids), width, height, self.start_ts)
+        head += self.ids.tobytes()
+        self._file.write(head + b"\0" * _pad(len(head)))
+
+    def add(self, pts, t=None, pose=None):
+        """Record one frame; pts is (K, 2) pixels or None when no face was found,
+        pose the (yaw, pitch, roll) degrees scored for it, if any"""
+        now = time.monotonic() if t is None else t
+        self._ts[self._n] = int((now - self._t0) * 1000)
+        coords = quantize(pts)
+        self._coords[self._n] = self._missing if coords is None else coords
+        angles = quantize_pose(pose)
+        self._pose[self._n] = MISSING if angles is None else angles
+        self._n += 1
+        self.frames += 1
+        if self._n == self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        if self._n:
+            self.write_chunk(self._ts[:self._n], self._coords[:self._n], self._pose[:self._n])
+            self._n = 0
+
+    def write_chunk(self, ts, coords, pose=None):
+        """Encode and append (n,) uint32 ms, (n, K, 2) and (n, 3) int16 coordinates and pose"""
+        if pose is None:
+            pose = np.full((len(ts), 3), MISSING, dtype=np.int16)
+        if self.compress:
+            def deltas(column):
+                delta = column.copy()
+                delta[1:] = np.diff(column, axis=0)  # int16 arithmetic wraps, like the decoder
+                return zlib.compress(delta.tobytes(), 6)
+            ts_bytes = zlib.compress(np.diff(ts, prepend=np.uint32(0)).tobytes(), 6)
+            coord_bytes, pose_bytes = deltas(coords), deltas(pose)
+            codec = ZLIB_DELTA
+        else:
+            ts_bytes, coord_bytes, pose_bytes, codec = ts.tobytes(), coords.tobytes(), pose.tobytes(), RAW
+        self._file.write(CHUNK.pack(CHUNK_MAGIC, len(ts), codec, len(ts_bytes), len(coord_bytes),
+                                    len(pose_bytes)))
+        for column in (ts_bytes, coord_bytes, pose_bytes):
+            self._file.write(column + b"\0" * _pad(len(column)))
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+# ===================== Reader =====================
+class LandmarkRecording:
+    """Read a .lmk file; raw chunks are numpy views over a memory map.
+
+    ``ts_ms``/``coords`` return the whole session: zero-copy when the file
+    is one raw chunk (see ``compact``), otherwise decoded once into fresh
+    arrays.  A torn last chunk (crash while writing) is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, k, self.width, self.height, self.start_ts = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version not in VERSIONS:
+            raise ValueError(f"{path} is not a landmark recording")
+        self.version = version
+        self.ids = self._map[HEADER.size:HEADER.size + 2 * k].view(np.uint16)
+        offset = HEADER.size + 2 * k
+        offset += _pad(offset)
+
+        chunk_struct = CHUNK if version >= 2 else CHUNK_V1
+        self.chunks = []  # (frames, codec, ts offset, ts bytes, coordinate offset, coordinate bytes,
+        #                    pose offset, pose bytes)
+        while offset + chunk_struct.size <= len(self._map):
+            cmagic, n, codec, ts_len, coord_len, *pose_len = chunk_struct.unpack_from(self._map, offset)
+            pose_len = pose_len[0] if pose_len else 0
+            ts_off = offset + chunk_struct.size
+            coord_off = ts_off + ts_len + _pad(ts_len)
+            pose_off = coord_off + coord_len + _pad(coord_len)
+            end = pose_off + pose_len + _pad(pose_len)
+            if cmagic != CHUNK_MAGIC or end > len(self._map):
+                break
+            self.chunks.append((n, codec, ts_off, ts_len, coord_off, coord_len, pose_off, pose_len))
+            offset = end
+        self.frames = sum(c[0] for c in self.chunks)
+        self.landmark_count = k
+        self._ts = self._coords = self._pose = None
+
+    def chunk(self, i):
+        """(ts_ms, coords, pose) of one chunk; views into the file for raw chunks.
+        pose is None in version 1 recordings."""
+        n, codec, ts_off, ts_len, coord_off, coord_len, pose_off, pose_len = self.chunks[i]
+        k = self.landmark_count
+        if codec == RAW:
+            ts = self._map[ts_off:ts_off + ts_len].view(np.uint32)
+            coords = self._map[coord_off:coord_off + coord_len].view(np.int16).reshape(n, k, 2)
+            pose = self._map[pose_off:pose_off + pose_len].view(np.int16).reshape(n, 3) \
+                if pose_len else None
+            return ts, coords, pose
+
+        def undelta(off, length, shape):
+            delta = np.frombuffer(zlib.decompress(self._map[off:off + length]), dtype=np.int16)
+            return np.cumsum(delta.reshape(shape), axis=0, dtype=np.int16)
+
+        ts = np.cumsum(np.frombuffer(zlib.decompress(self._map[ts_off:ts_off + ts_len]),
+                                     dtype=np.uint32), dtype=np.uint32)
+        pose = undelta(pose_off, pose_len, (n, 3)) if pose_len else None
+        return ts, undelta(coord_off, coord_len, (n, k, 2)), pose
+
+    def _load(self):
+        if self._ts is not None:
+            return
+        if len(self.chunks) == 1:
+            self._ts, self._coords, self._pose = self.chunk(0)
+            return
+        self._ts = np.empty(self.frames, dtype=np.uint32)
+        self._coords = np.empty((self.frames, self.landmark_count, 2), dtype=np.int16)
+        self._pose = np.empty((self.frames, 3), dtype=np.int16) if self.version >= 2 else None
+        pos = 0
+        for i, (n, *_) in enumerate(self.chunks):
+            self._ts[pos:pos + n], self._coords[pos:pos + n], pose = self.chunk(i)
+            if self._pose is not None:
+                self._pose[pos:pos + n] = pose
+            pos += n
+
+    @property
+    def ts_ms(self):
+        self._load()
+        return self._ts
+
+    @property
+    def coords(self):
+        self._load()
+        return self._coords
+
+    @property
+    def pose_coords(self):
+        """(T, 3) int16 recorded pose, None for version 1 recordings"""
+        self._load()
+        return self._pose
+
+    def timestamps(self):
+        """Wall-clock seconds (float64) of every frame"""
+        return self.start_ts + self.ts_ms / 1000.0
+
+    def pixels(self, ids=None):
+        """(T, K, 2) float32 pixels with NaN rows for frames without a face"""
+        coords = self.coords
+        if ids is not None:
+            cols = [int(np.flatnonzero(self.ids == i)[0]) for i in ids]
+            coords = coords[:, cols]
+        return to_pixels(coords)
+
+    def angles(self):
+        """(T, 3) float64 yaw/pitch/roll degrees the tracker scored, NaN rows without a face;
+        None when the recording predates the pose column"""
+        pose = self.pose_coords
+        if pose is None:
+            return None
+        out = pose.astype(np.float64) / POSE_SCALE
+        out[pose == MISSING] = np.nan
+        return out
+
+    def close(self):
+        self._ts = self._coords = self._pose = self.ids = None
+        self._map = None
+
+
+def compact(src, dst):
+    """Rewrite a recording as one raw chunk, so readers map it with zero copies"""
+    rec = LandmarkRecording(src)
+    writer = LandmarkWriter(dst + ".tmp", rec.ids, (rec.width, rec.height),
+                            compress=False, start_ts=rec.start_ts)
+    if rec.frames:
+        writer.write_chunk(rec.ts_ms, rec.coords, rec.pose_coords)
+    writer.close()
+    rec.close()
+    os.replace(dst + ".tmp", dst)
+    return dst
+
+
+def session_recordings(folder):
+    """Landmark recordings of one session folder, oldest first (reserved but unused names skipped)"""
+    return [path for path in sorted(glob.glob(os.path.join(folder, RECORDING_PATTERN)))
+            if os.path.getsize(path)]
+
+
+def new_recording_path(folder):
+    """Unused recording name that sorts in start order, even across midnight"""
+    os.makedirs(folder, exist_ok=True)
+    base = os.path.join(folder, time.strftime("landmarks-%Y%m%d-%H%M%S"))
+    n = 1
+    while True:  # Tracking can be restarted within one second
+        path = f"{base}-{n:02d}.lmk"
+        try:
+            open(path, "x").close()  # Reserve the name; the recorder rewrites the file
+            return path
+        except FileExistsError:
+            n += 1
@@ -0,0 +1,144 @@
+import importlib
+import importlib.util
+import subprocess
+import sys
+import threading
+import time
+
+# ===================== Settings =====================
+COSTS = ("low", "medium", "high")  # low: periodic psutil poll, high: camera + inference
+STOP_TIMEOUT = 2.0                 # seconds to wait for a watcher thread to finish
+
+
+# ===================== Registry =====================
+class MonitorPlugin:
+    """Declaration of one monitor: where it lives, what it watches, what it costs.
+
+    Nothing is imported until the monitor is started or its module is asked
+    for; ``available()`` only checks that the third-party packages exist.
+    """
+
+    def __init__(self, name, module, watch, capabilities=(), cost="low", requires=()):
+        self.name = name
+        self.module_name = module
+        self.watch = watch  # watch(stop_event, **options) in that module
+        self.capabilities = tuple(capabilities)
+        self.cost = cost
+        self.requires = tuple(requires)
+        self.module = None
+        self.load_seconds = None
+
+    def available(self):
+        return all(importlib.util.find_spec(dep) is not None for dep in self.requires)
+
+    def load(self):
+        if self.module is None:
+            started = time.perf_counter()
+            self.module = importlib.import_module(self.module_name)
+            self.load_seconds = time.perf_counter() - started
+        return self.module
+
+
+class MonitorRegistry:
+    """Monitors by name, imported lazily and started/stopped on demand.
+
+    Each running monitor is its module's watch function on a daemon thread
+    with its own stop event, so one can be stopped without the others.
+    """
+
+    def __init__(self):
+        self.plugins = {}
+        self.running = {}  # name -> (thread, stop_event)
+        self.lock = threading.Lock()
+
+    def register(self, name, module, watch, capabilities=(), cost="low", requires=()):
+        self.plugins[name] = MonitorPlugin(name, module, watch, capabilities, cost, requires)
+        return self.plugins[name]
+
+    def names(self, capability=None, max_cost=None):
+        """Registered monitors, optionally with a capability and at most a cost"""
+        return [name for name, plugin in self.plugins.items()
+                if (capability is None or capability in plugin.capabilities) and
+                (max_cost is None or COSTS.index(plugin.cost) <= COSTS.index(max_cost))]
+
+    def module(self, name):
+        """The monitor's module, imported on first use"""
+        return self.plugins[name].load()
+
+    def start(self, name, **options):
+        with self.lock:
+            running = self.running.get(name)
+            if running and running[0].is_alive():
+                return False
+            stop_event = threading.Event()
+            thread = threading.Thread(target=self._run, args=(name, stop_event, options),
+                                      name=f"monitor-{name}", daemon=True)
+            self.running[name] = (thread, stop_event)
+        thread.start()
+        return True
+
+    def _run(self, name, stop_event, options):
+        plugin = self.plugins[name]
+        try:
+            getattr(plugin.load(), plugin.watch)(stop_event, **options)
+        except Exception as e:
+            print(f"Monitor {name} stopped: {e}")
+
+    def stop(self, name, timeout=STOP_TIMEOUT):
+        with self.lock:
+            running = self.running.pop(name, None)
+        if running:
+            thread, stop_event = running
+            stop_event.set()
+            thread.join(timeout)
+
+    def stop_all(self, timeout=STOP_TIMEOUT):
+        # Signal everything first so the joins overlap
+        with self.lock:
+            running, self.running = self.running, {}
+        for thread, stop_event in running.values():
+            stop_event.set()
+        deadline = time.monotonic() + timeout
+        for thread, _ in running.values():
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def is_running(self, name):
+        running = self.running.get(name)
+        return bool(running and running[0].is_alive())
+
+    def status(self):
+        """One dict per monitor for status panels"""
+        return [{"name": name, "capabilities": plugin.capabilities, "cost": plugin.cost,
+                 "loaded": plugin.module is not None, "running": self.is_running(name),
+                 "load_ms": None if plugin.load_seconds is None else round(plugin.load_seconds * 1000, 1)}
+                for name, plugin in self.plugins.items()]
+
+
+registry = MonitorRegistry()  # Process-wide default registry
+registry.register("devices", "connectedperipherals", "watch_peripherals",
+                  ("usb", "bluetooth", "drives"), "low", ("psutil",))
+registry.register("network", "network", "watch_domains", ("domains",), "low", ("psutil",))
+registry.register("processes", "back", "watch_processes", ("processes",), "low", ("psutil",))
+registry.register("audio", "sound", "watch_sound", ("sound",), "medium", ("pyaudio",))
+registry.register("gaze", "trackworker", "watch_tracking", ("gaze", "head_pose"), "high",
+                  ("cv2", "mediapipe"))
+
+
+# ===================== Import cost =====================
+def measure_import(module):
+    """Seconds to import `module` in a fresh interpreter (nothing cached), None on failure"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return float(out.stdout) if out.returncode == 0 else None
+
+
+if __name__ == "__main__":
+    # python monitors.py  ->  cold import cost of the app and of every monitor
+    rows = [("UI (app start)", "UI", "", "")]
+    rows += [(name, p.module_name, p.cost, "yes" if p.available() else "no")
+             for name, p in registry.plugins.items()]
+    print(f"{'monitor':<16}{'module':<22}{'cost':<8}{'deps':<6}{'import ms':>10}")
+    for name, module, cost, available in rows:
+        seconds = measure_import(module)
+        ms = f"{seconds * 1000:.1f}" if seconds is not None else "error"
+        print(f"{name:<16}{module:<22}{cost:<8}{available:<6}{ms:>10}")
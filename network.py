@@ -3,6 +3,7 @@ import psutil
 import time
 from datetime import datetime
 from collections import defaultdict
+import eventlog
 
 def resolve_host(ip):
     """Resolve IP to hostname/domain"""
@@ -44,6 +45,7 @@ def monitor_network():
                 domain_key = domain
                 if domain_key not in seen_domains:
                     seen_domains.add(domain_key)
+                    eventlog.publish("new_domain", domain)
                     print(f"[{current_time}] {domain}")
             
             time.sleep(5)  # Check every 5 seconds
@@ -51,5 +53,16 @@ def monitor_network():
     except KeyboardInterrupt:
         print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Network monitoring stopped.")
 
+def watch_domains(stop_event, interval=5):
+    """Publish every newly contacted domain until stop_event is set"""
+    # Connections already open when the exam started are not news
+    seen_domains = {resolve_host(conn['remote_ip']) for conn in get_active_connections()}
+    while not stop_event.wait(interval):
+        for conn in get_active_connections():
+            domain = resolve_host(conn['remote_ip'])
+            if domain not in seen_domains:
+                seen_domains.add(domain)
+                eventlog.publish("new_domain", domain)
+
 if __name__ == "__main__":
     monitor_network()
\ No newline at end of file
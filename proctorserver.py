@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import time
+import zlib
+import eventlog
+import eventwire
+import reportbuilder
+from journal import atomic_write_json
+
+# ===================== Settings =====================
+DATA_DIR = "collected_sessions"
+WORKER_QUEUE_SIZE = 256   # batches buffered per worker before clients are throttled
+IDLE_CLOSE_SECONDS = 60   # close a session's files after this much silence
+ABANDON_SECONDS = 3600    # a session silent this long (no "bye") is finished and forgotten
+
+
+def shard_for(session_id, workers):
+    """Stable worker index for a session (same on every run)"""
+    return zlib.crc32(session_id.encode("utf-8")) % workers
+
+
+# ===================== Worker process =====================
+def session_worker(inbox, data_dir):
+    """Store batches of the sessions sharded to this process.
+
+    Each session gets its own event log folder (same format as the local
+    exam_events log) and a live report builder; a session's report is
+    written when its client says goodbye.  A quiet session first only
+    releases its files: the builder is kept, so the report still covers the
+    whole exam when the client comes back after a silence.  After
+    ABANDON_SECONDS without a word its report is written and its state
+    dropped; should it still come back, the builder is rebuilt from the
+    stored log.
+    """
+    sessions = {}  # session id -> [SegmentWriter or None while idle, SessionReportBuilder, last activity]
+    next_sweep = time.monotonic() + IDLE_CLOSE_SECONDS
+
+    def close_writer(state):
+        if state[0] is not None:
+            state[0].close()
+            state[0] = None
+
+    def close_session(session_id):
+        state = sessions.pop(session_id)
+        close_writer(state)
+        atomic_write_json(os.path.join(data_dir, session_id, "suspicion_report.json"),
+                          state[1].finish(), indent=4)
+
+    while True:
+        try:
+            item = inbox.get(timeout=1.0)
+        except queue.Empty:
+            item = ("tick", None, None)
+        kind, session_id, payload = item
+        if kind == "stop":
+            break
+        now = time.monotonic()
+
+        if kind == "batch":
+            state = sessions.get(session_id)
+            if state is None:
+                builder = reportbuilder.folder_builder(os.path.join(data_dir, session_id))
+                state = sessions[session_id] = [None, builder, now]
+            if state[0] is None:
+                state[0] = eventlog.SegmentWriter(os.path.join(data_dir, session_id))
+            events = [tuple(e) for e in payload]
+            state[0].write_batch(events)
+            state[1].add_events(events)
+            state[2] = now
+        elif kind == "bye" and session_id in sessions:
+            close_session(session_id)
+
+        # Release file handles of sessions that went quiet (client may come
+        # back), finish the ones that were never closed
+        if now >= next_sweep:
+            for session_id, state in list(sessions.items()):
+                if now - state[2] > ABANDON_SECONDS:
+                    close_session(session_id)
+                elif now - state[2] > IDLE_CLOSE_SECONDS:
+                    close_writer(state)
+            next_sweep = now + IDLE_CLOSE_SECONDS / 4
+
+    for state in sessions.values():
+        close_writer(state)
+
+
+# ===================== Ingest server =====================
+class IngestServer:
+    """asyncio front end: one persistent connection per exam client.
+
+    Batches are handed to the worker owning the session through a bounded
+    queue.  When a worker falls behind, ``put`` blocks, this connection
+    stops reading, and TCP flow control pushes back on the client, which
+    then spools locally.
+    """
+
+    def __init__(self, host=eventwire.DEFAULT_HOST, port=eventwire.DEFAULT_PORT,
+                 workers=max(1, os.cpu_count() // 2), data_dir=DATA_DIR):
+        self.host, self.port = host, port
+        self.data_dir = data_dir
+        self.queues = [mp.Queue(WORKER_QUEUE_SIZE) for _ in range(workers)]
+        self.processes = [mp.Process(target=session_worker, args=(q, data_dir), daemon=True)
+                          for q in self.queues]
+        self.last_seq = {}  # session id -> [highest stored batch, last activity]
+        self.next_prune = time.monotonic() + ABANDON_SECONDS
+        self.batches = 0
+        self.events = 0
+        self._server = None
+
+    async def start(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        for process in self.processes:
+            process.start()
+        self._server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def _put(self, session_id, item):
+        inbox = self.queues[shard_for(session_id, len(self.queues))]
+        try:
+            inbox.put_nowait(item)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, inbox.put, item)
+
+    async def handle_client(self, reader, writer):
+        session_id = None
+        try:
+            hello = await eventwire.read_message(reader)
+            session_id = str(hello.get("session", ""))
+            if hello.get("type") != "hello" or not session_id or "/" in session_id or session_id.startswith("."):
+                return
+            self._prune()
+            seen = self.last_seq.setdefault(session_id, [0, time.monotonic()])
+            writer.write(eventwire.encode({"type": "welcome", "last_seq": seen[0]}))
+            await writer.drain()
+
+            while True:
+                message = await eventwire.read_message(reader)
+                kind = message.get("type")
+                if kind == "batch":
+                    seq = message["seq"]
+                    seen[1] = time.monotonic()
+                    self.last_seq[session_id] = seen  # Back in, should a prune have run meanwhile
+                    if seq > seen[0]:  # Replays after reconnects are dropped
+                        await self._put(session_id, ("batch", session_id, message["events"]))
+                        seen[0] = seq
+                        self.batches += 1
+                        self.events += len(message["events"])
+                    writer.write(eventwire.encode({"type": "ack", "seq": seq}))
+                    await writer.drain()
+                elif kind == "bye":
+                    await self._put(session_id, ("bye", session_id, None))
+                    self.last_seq.pop(session_id, None)
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            writer.close()
+
+    def _prune(self):
+        """Forget the batch numbers of sessions the workers have finished as abandoned"""
+        now = time.monotonic()
+        if now < self.next_prune:
+            return
+        self.last_seq = {sid: seen for sid, seen in self.last_seq.items()
+                         if now - seen[1] <= ABANDON_SECONDS}
+        self.next_prune = now + ABANDON_SECONDS / 4
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        for inbox in self.queues:
+            inbox.put(("stop", None, None))
+        for process in self.processes:
+            await asyncio.get_running_loop().run_in_executor(None, process.join)
+
+
+async def run(args):
+    server = await IngestServer(args.host, args.port, args.workers, args.data_dir).start()
+    print(f"ProctorY collector on {server.host}:{server.port} "
+          f"({len(server.processes)} workers, data in {server.data_dir})")
+    if not args.synthetic:
+        await server.serve_forever()
+        return
+
+    # Local test: N simulated exam clients against this server
+    import shipper
+    clients = [shipper.synthetic_client(server.host, server.port, f"synthetic-{i:04d}",
+                                        args.rate, args.duration)
+               for i in range(args.synthetic)]
+    await asyncio.gather(*clients)
+    await server.stop()
+    print(f"Stored {server.events} events in {server.batches} batches "
+          f"from {args.synthetic} synthetic sessions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ProctorY multi-session event collector")
+    parser.add_argument("--host", default=eventwire.DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=eventwire.DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=max(1, os.cpu_count() // 2))
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="run N synthetic exam clients against this server, then exit")
+    parser.add_argument("--rate", type=float, default=50.0, help="events/s per synthetic client")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per synthetic client")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,215 @@
+import json
+import os
+import random
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+
+# ===================== Format =====================
+# A question bank is either
+#   * questions.jsonl - one question object per line (preferred), or
+#   * questions.json  - the original single JSON array (still accepted).
+# In both cases a compact sidecar index (<bank>.idx) stores the byte offset
+# and length of every question, so a question is only parsed when it is
+# actually shown.  The index is rebuilt whenever the bank's size or mtime
+# changes.
+
+BANK_FILES = ("questions.jsonl", "questions.json")
+
+INDEX_MAGIC = b"QIDX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sIQdQ")  # magic, version, size, mtime, count
+
+CACHE_SIZE = 64  # materialised questions kept in memory
+
+
+def find_question_bank(candidates=BANK_FILES, folder="."):
+    """Return the first existing question bank file, or None"""
+    for name in candidates:
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _scan_jsonl(path):
+    """Offsets/lengths of every non-empty line of a JSON Lines file"""
+    offsets, lengths = array("Q"), array("I")
+    with open(path, "rb") as f:
+        pos = 0
+        for line in f:
+            stripped = line.strip()
+            if stripped:
+                offsets.append(pos + line.index(stripped[:1]))
+                lengths.append(len(stripped))
+            pos += len(line)
+    return offsets, lengths
+
+
+def _scan_json_array(path):
+    """Offsets/lengths of every element of a top-level JSON array"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    # latin-1 maps bytes 1:1 onto characters, so character positions reported
+    # by the decoder are byte positions; element text is decoded as UTF-8 later.
+    text = raw.decode("latin-1")
+    decoder = json.JSONDecoder()
+    ws = " \t\r\n"
+
+    pos = len(text) - len(text.lstrip(ws + "\xef\xbb\xbf"))
+    if pos >= len(text) or text[pos] != "[":
+        raise ValueError(f"{path}: expected a JSON array of questions")
+    pos += 1
+
+    offsets, lengths = array("Q"), array("I")
+    while True:
+        while pos < len(text) and text[pos] in ws:
+            pos += 1
+        if pos >= len(text):
+            raise ValueError(f"{path}: unterminated question array")
+        if text[pos] == "]":
+            break
+        _, end = decoder.raw_decode(text, pos)
+        offsets.append(pos)
+        lengths.append(end - pos)
+        pos = end
+        while pos < len(text) and text[pos] in ws:
+            pos += 1
+        if pos < len(text) and text[pos] == ",":
+            pos += 1
+    return offsets, lengths
+
+
+def build_index(path):
+    """Scan a question bank once and return (offsets, lengths)"""
+    if path.lower().endswith(".jsonl"):
+        return _scan_jsonl(path)
+    return _scan_json_array(path)
+
+
+def _read_index(index_path, size, mtime):
+    try:
+        with open(index_path, "rb") as f:
+            header = f.read(INDEX_HEADER.size)
+            if len(header) != INDEX_HEADER.size:
+                return None
+            magic, version, idx_size, idx_mtime, count = INDEX_HEADER.unpack(header)
+            if (magic, version, idx_size, idx_mtime) != (INDEX_MAGIC, INDEX_VERSION, size, mtime):
+                return None
+            offsets, lengths = array("Q"), array("I")
+            offsets.fromfile(f, count)
+            lengths.fromfile(f, count)
+            return offsets, lengths
+    except (OSError, EOFError):
+        return None
+
+
+def _write_index(index_path, size, mtime, offsets, lengths):
+    tmp_path = index_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, size, mtime, len(offsets)))
+            offsets.tofile(f)
+            lengths.tofile(f)
+        os.replace(tmp_path, index_path)
+    except OSError:
+        pass  # Read-only content folder: keep the index in memory only
+
+
+def load_index(path):
+    """Load the sidecar index for a bank, rebuilding it if stale"""
+    st = os.stat(path)
+    index_path = path + ".idx"
+    index = _read_index(index_path, st.st_size, st.st_mtime)
+    if index is None:
+        index = build_index(path)
+        _write_index(index_path, st.st_size, st.st_mtime, *index)
+    return index
+
+
+# ===================== Bank =====================
+class QuestionBank:
+    """Lazily materialised, indexed view over a question bank file.
+
+    Behaves like a read-only list of question dicts.  ``sample`` returns
+    another view over a random subset without parsing any question.
+    """
+
+    def __init__(self, path, order=None, _shared=None):
+        self.path = path
+        if _shared is None:
+            offsets, lengths = load_index(path)
+            _shared = {
+                "offsets": offsets,
+                "lengths": lengths,
+                "file": open(path, "rb"),
+                "lock": threading.Lock(),
+                "cache": OrderedDict(),
+            }
+        self._shared = _shared
+        total = len(_shared["offsets"])
+        self.order = array("I", range(total) if order is None else order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __bool__(self):
+        return len(self.order) > 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return QuestionBank(self.path, self.order[i], self._shared)
+        return self.get_by_id(self.order[i])
+
+    def __iter__(self):
+        for qid in self.order:
+            yield self.get_by_id(qid)
+
+    @property
+    def total(self):
+        """Number of questions in the underlying file"""
+        return len(self._shared["offsets"])
+
+    def ids(self):
+        """Positions of this view's questions in the underlying file"""
+        return list(self.order)
+
+    def get_by_id(self, qid):
+        """Materialise one question by its position in the file"""
+        shared = self._shared
+        cache = shared["cache"]
+        with shared["lock"]:
+            if qid in cache:
+                cache.move_to_end(qid)
+                return cache[qid]
+            f = shared["file"]
+            f.seek(shared["offsets"][qid])
+            question = json.loads(f.read(shared["lengths"][qid]).decode("utf-8"))
+            cache[qid] = question
+            if len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+            return question
+
+    def subset(self, ids):
+        """View over the given file positions (e.g. a restored sample)"""
+        total = self.total
+        ids = [int(qid) for qid in ids]
+        if any(qid < 0 or qid >= total for qid in ids):
+            raise ValueError("question id out of range for this bank")
+        return QuestionBank(self.path, ids, self._shared)
+
+    def sample(self, n, seed=None):
+        """Random view of n questions for one candidate"""
+        rng = random.Random(seed)
+        n = min(n, len(self.order))
+        return QuestionBank(self.path, rng.sample(list(self.order), n), self._shared)
+
+    def close(self):
+        self._shared["file"].close()
+
+
+def open_question_bank(folder=".", candidates=BANK_FILES):
+    """Open the first question bank found in folder, or None"""
+    path = find_question_bank(candidates, folder)
+    return QuestionBank(path) if path else None
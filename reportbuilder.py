@@ -0,0 +1,242 @@
+import heapq
+import json
+import sys
+import time
+import eventlog
+import scoring
+
+# ===================== Settings =====================
+MERGE_GAP = 1.0          # seconds; closer violations of one kind form one interval
+LONGEST_INTERVALS = 20   # longest intervals listed in the report
+MAX_NAMES = 200          # devices/domains/processes listed per category
+
+K = eventlog.EVENT_KINDS
+# Event kind -> timeline category; the event value is the seconds it covers
+INTERVAL_CATEGORIES = {
+    K["eye_violation"]: "off_screen",
+    K["head_violation"]: "off_screen",
+    K["sound_violation"]: "speech",
+    K["focus_gained"]: "focus_lost",
+    K["camera_recovered"]: "camera_down",
+    K["multiple_faces"]: "multiple_faces",
+    K["no_face"]: "no_face",
+    K["eyes_closed"]: "eyes_closed",
+    K["candidate_speaking"]: "candidate_speaking",
+    K["external_voice"]: "external_voice",
+}
+# Interval categories reported by the event that ends the interval
+END_EVENTS = {K["focus_gained"], K["camera_recovered"]}
+NAME_CATEGORIES = {
+    K["device_added"]: "devices_connected",
+    K["device_removed"]: "devices_removed",
+    K["new_domain"]: "domains_contacted",
+    K["new_process"]: "new_processes",
+    K["evidence_clip"]: "evidence_clips",
+}
+
+
+class SessionReportBuilder:
+    """Single-pass, bounded-memory suspicion report over a monitor event stream.
+
+    Memory grows only with the session length in minutes (one bucket per
+    active minute) and the number of distinct names seen, never with the
+    number of events, so frame-level streams of millions of events are fine.
+    The weighted suspicion score is computed alongside by scoring.SuspicionScorer.
+    """
+
+    def __init__(self, merge_gap=MERGE_GAP, scoring_config=None):
+        self.merge_gap = merge_gap
+        config = scoring.load_config() if scoring_config is None else scoring_config
+        self.scorer = scoring.SuspicionScorer(config["weights"], config["window"], config["threshold"],
+                                              bus=None)
+        self.start = self.end = None
+        self.counts = {}
+        self.totals = {"off_screen": 0.0, "speech": 0.0, "focus_lost": 0.0, "camera_down": 0.0,
+                       "multiple_faces": 0.0, "no_face": 0.0, "eyes_closed": 0.0,
+                       "candidate_speaking": 0.0, "external_voice": 0.0}
+        self.open_intervals = {}   # category -> [start, end]
+        self.cameras_down = {}     # camera name -> failure time, until "camera_recovered"
+        self.longest = []          # min-heap of (seconds, start, end, category)
+        self.minutes = {}          # minute index -> {field: value}
+        self.names = {name: {} for name in NAME_CATEGORIES.values()}
+
+    # ---------- input ----------
+    def add(self, ts, code, detail, value):
+        """Feed one event (kind code as in eventlog.EVENT_KINDS)"""
+        if self.start is None:
+            self.start = ts
+        if self.end is None or ts > self.end:
+            self.end = ts
+        self.counts[code] = self.counts.get(code, 0) + 1
+        self.scorer.add(ts, eventlog.kind_name(code), detail, value)
+
+        if code == K["camera_failure"]:
+            self.cameras_down.setdefault(detail.rpartition(": ")[0], ts)
+        elif code == K["camera_recovered"]:
+            self.cameras_down.pop(detail.rpartition(": ")[0], None)
+        category = INTERVAL_CATEGORIES.get(code)
+        if category is not None:
+            self._add_interval(category, ts - max(value, 0.0), ts)
+            if code not in END_EVENTS:
+                self._bucket(ts)[eventlog.kind_name(code)] += 1
+            return
+        if code in (K["focus_lost"], K["camera_failure"]):
+            self._bucket(ts)[eventlog.kind_name(code)] += 1
+            return
+        name_category = NAME_CATEGORIES.get(code)
+        if name_category is not None and detail:
+            names = self.names[name_category]
+            if detail in names or len(names) < MAX_NAMES:
+                names[detail] = names.get(detail, 0) + 1
+
+    def add_events(self, events):
+        """Feed decoded (timestamp, kind, detail, value) events"""
+        codes = K
+        for ts, kind, detail, value in events:
+            self.add(ts, codes.get(kind, 0), detail, value)
+
+    def _bucket(self, ts):
+        minute = int((ts - self.start) // 60)
+        bucket = self.minutes.get(minute)
+        if bucket is None:
+            bucket = self.minutes[minute] = {
+                "eye_violation": 0, "head_violation": 0, "sound_violation": 0,
+                "focus_lost": 0, "camera_failure": 0, "multiple_faces": 0, "no_face": 0, "eyes_closed": 0,
+                "candidate_speaking": 0, "external_voice": 0,
+                "off_screen_s": 0.0, "speech_s": 0.0, "focus_lost_s": 0.0, "camera_down_s": 0.0,
+                "multiple_faces_s": 0.0, "no_face_s": 0.0, "eyes_closed_s": 0.0,
+                "candidate_speaking_s": 0.0, "external_voice_s": 0.0,
+            }
+        return bucket
+
+    # ---------- intervals ----------
+    def _add_interval(self, category, start, end):
+        current = self.open_intervals.get(category)
+        if current is not None and start <= current[1] + self.merge_gap:
+            if end > current[1]:
+                current[1] = end
+            current[0] = min(current[0], start)
+            return
+        if current is not None:
+            self._close_interval(category, current)
+        self.open_intervals[category] = [start, end]
+
+    def _close_interval(self, category, interval):
+        start, end = interval
+        seconds = end - start
+        self.totals[category] += seconds
+        item = (seconds, start, end, category)
+        if len(self.longest) < LONGEST_INTERVALS:
+            heapq.heappush(self.longest, item)
+        elif item > self.longest[0]:
+            heapq.heapreplace(self.longest, item)
+        # Spread the interval over the minute buckets it overlaps
+        field = category + "_s"
+        t = max(start, self.start)
+        while t < end:
+            minute_end = self.start + (int((t - self.start) // 60) + 1) * 60
+            step = min(end, minute_end) - t
+            self._bucket(t)[field] += step
+            t += step
+
+    # ---------- output ----------
+    def finish(self):
+        """Return the full report dict"""
+        # A camera that never came back was down until the end of the session
+        for failed_at in self.cameras_down.values():
+            self._add_interval("camera_down", failed_at, self.end)
+        self.cameras_down.clear()
+        for category, interval in list(self.open_intervals.items()):
+            self._close_interval(category, interval)
+        self.open_intervals.clear()
+
+        def count(kind):
+            return self.counts.get(K[kind], 0)
+
+        duration = (self.end - self.start) if self.start is not None else 0.0
+        report = {
+            "start": _iso(self.start),
+            "end": _iso(self.end),
+            "duration_minutes": round(duration / 60, 1),
+            "event_count": sum(self.counts.values()),
+            "counts": {eventlog.kind_name(code): n for code, n in sorted(self.counts.items())},
+            "eye_violations": count("eye_violation"),
+            "head_violations": count("head_violation"),
+            "off_screen_seconds": round(self.totals["off_screen"], 1),
+            "speech_seconds": round(self.totals["speech"], 1),
+            "focus_lost_count": count("focus_lost"),
+            "focus_lost_seconds": round(self.totals["focus_lost"], 1),
+            "camera_failure_count": count("camera_failure"),
+            "camera_down_seconds": round(self.totals["camera_down"], 1),
+            "multiple_faces_seconds": round(self.totals["multiple_faces"], 1),
+            "no_face_seconds": round(self.totals["no_face"], 1),
+            "identity_changes": count("identity_changed"),
+            "eyes_closed_count": count("eyes_closed"),
+            "eyes_closed_seconds": round(self.totals["eyes_closed"], 1),
+            "candidate_speaking_seconds": round(self.totals["candidate_speaking"], 1),
+            "external_voice_seconds": round(self.totals["external_voice"], 1),
+            "timeline": [dict(minute=m, **{k: round(v, 1) if isinstance(v, float) else v
+                                          for k, v in self.minutes[m].items()})
+                         for m in sorted(self.minutes)],
+            "longest_intervals": [
+                {"category": c, "start": _iso(s), "end": _iso(e), "seconds": round(sec, 1)}
+                for sec, s, e, c in sorted(self.longest, reverse=True)
+            ],
+        }
+        for category, names in self.names.items():
+            report[category] = sorted(names)
+        report["suspicion_score"] = self.scorer.summary()
+        report["summary"] = summarize(report)
+        return report
+
+
+def _iso(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) if ts is not None else None
+
+
+def summarize(report):
+    """Compact human-readable flags for the results screen"""
+    score = report["suspicion_score"]
+    flags = [
+        f"Suspicion score {score['total']:.0f} (peak {score['peak']:.0f} per "
+        f"{score['window_seconds']:.0f}s, {score['alert_count']} alerts)",
+        f"Looked away {report['eye_violations']} times, head turned {report['head_violations']} times"
+        f" ({report['off_screen_seconds']:.0f}s off-screen)",
+        f"Speech/noise detected for {report['speech_seconds']:.0f}s (candidate speaking "
+        f"{report['candidate_speaking_seconds']:.0f}s, other voices {report['external_voice_seconds']:.0f}s)",
+        f"Window focus lost {report['focus_lost_count']} times ({report['focus_lost_seconds']:.0f}s)",
+        f"Camera failed {report['camera_failure_count']} times ({report['camera_down_seconds']:.0f}s unmonitored)",
+        f"Another person in view for {report['multiple_faces_seconds']:.0f}s, "
+        f"nobody in view for {report['no_face_seconds']:.0f}s",
+        f"Face did not match the enrolled candidate {report['identity_changes']} times",
+        f"Eyes closed {report['eyes_closed_count']} times ({report['eyes_closed_seconds']:.0f}s)",
+    ]
+    devices = report["devices_connected"]
+    flags.append(f"Devices connected: {len(devices)}" + (f" ({', '.join(devices[:3])})" if devices else ""))
+    flags.append(f"Domains contacted: {len(report['domains_contacted'])}")
+    flags.append(f"New processes started: {len(report['new_processes'])}")
+    return flags
+
+
+def folder_builder(folder=eventlog.EVENT_DIR):
+    """A builder that has seen every event already stored in a session folder"""
+    builder = SessionReportBuilder()
+    add = builder.add
+    for ts, code, sid, value, strings in eventlog.iter_raw(folder):
+        add(ts, code, strings.get(sid, "") if sid else "", value)
+    return builder
+
+
+def build_report(folder=eventlog.EVENT_DIR):
+    """Stream every event of a session folder into a report"""
+    return folder_builder(folder).finish()
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else eventlog.EVENT_DIR
+    report = build_report(folder)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w") as f:
+            json.dump(report, f, indent=4)
+    for line in report["summary"]:
+        print(line)
@@ -0,0 +1,227 @@
+import math
+
+# ===================== Means and variances =====================
+class RollingMean:
+    """Mean/variance of the last `window` values in O(1) per update.
+
+    Same result as np.mean over a deque(maxlen=window), without the array.
+    The running sums are rebuilt from the ring every `window` updates so
+    floating-point drift cannot accumulate.
+    """
+
+    __slots__ = ("window", "values", "index", "count", "total", "squares", "_since_rebuild")
+
+    def __init__(self, window):
+        self.window = window
+        self.values = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self._since_rebuild = 0
+
+    def update(self, x):
+        old = self.values[self.index]
+        if self.count == self.window:
+            self.total -= old
+            self.squares -= old * old
+        else:
+            self.count += 1
+        self.values[self.index] = x
+        self.total += x
+        self.squares += x * x
+        self.index = (self.index + 1) % self.window
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            live = self.values if self.count == self.window else self.values[:self.count]
+            self.total = math.fsum(live)
+            self.squares = math.fsum(v * v for v in live)
+            self._since_rebuild = 0
+        return self.total / self.count
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        mean = self.total / self.count
+        return max(0.0, self.squares / self.count - mean * mean)
+
+    def reset(self):
+        self.values = [0.0] * self.window
+        self.index = self.count = self._since_rebuild = 0
+        self.total = self.squares = 0.0
+
+
+class RunningStats:
+    """Welford mean/variance over everything seen so far"""
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        return self.mean
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class EMA:
+    """Exponential moving mean/variance; alpha or half-life in samples"""
+
+    __slots__ = ("alpha", "mean", "variance", "count")
+
+    def __init__(self, alpha=None, halflife=None):
+        self.alpha = alpha if alpha is not None else 1.0 - 0.5 ** (1.0 / halflife)
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+
+    def update(self, x):
+        if not self.count:
+            self.mean = x
+        else:
+            delta = x - self.mean
+            self.mean += self.alpha * delta
+            self.variance = (1.0 - self.alpha) * (self.variance + self.alpha * delta * delta)
+        self.count += 1
+        return self.mean
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+# ===================== Quantiles =====================
+class P2Quantile:
+    """Streaming quantile with five markers (Jain & Chlamtac P-square).
+
+    Constant memory and no sorting after the first five samples; exact for
+    up to five samples.  Use for a one-off median such as calibration.
+    """
+
+    __slots__ = ("p", "count", "q", "n", "np", "dn")
+
+    def __init__(self, p=0.5):
+        self.p = p
+        self.count = 0
+        self.q = []                            # marker heights
+        self.n = [0, 1, 2, 3, 4]               # marker positions
+        self.np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # desired positions
+        self.dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, x):
+        self.count += 1
+        q = self.q
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        n = self.n
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+        for i in (1, 2, 3):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self):
+        if not self.count:
+            return None
+        if self.count <= 5:
+            # Same interpolation as np.quantile on the few samples we have
+            k = (len(self.q) - 1) * self.p
+            lo = int(k)
+            hi = min(lo + 1, len(self.q) - 1)
+            return self.q[lo] + (self.q[hi] - self.q[lo]) * (k - lo)
+        return self.q[2]
+
+
+class DecayingQuantile:
+    """Fixed-bin histogram quantile that slowly forgets old samples.
+
+    Each new sample weighs 1/decay times the previous one, which is the
+    same as multiplying every bin by `decay` per update, but costs O(1);
+    weights are rescaled only when they grow large.  Values outside
+    [lo, hi) land in the edge bins.  Queries are O(bins).
+    """
+
+    __slots__ = ("lo", "hi", "bins", "decay", "counts", "weight", "total")
+
+    def __init__(self, lo, hi, bins=200, decay=0.999):
+        self.lo, self.hi = lo, hi
+        self.bins = bins
+        self.decay = decay
+        self.counts = [0.0] * bins
+        self.weight = 1.0
+        self.total = 0.0
+
+    def update(self, x, weight=1.0):
+        i = int((x - self.lo) / (self.hi - self.lo) * self.bins)
+        i = 0 if i < 0 else self.bins - 1 if i >= self.bins else i
+        w = self.weight * weight
+        self.counts[i] += w
+        self.total += w
+        self.weight /= self.decay
+        if self.weight > 1e100:
+            scale = 1.0 / self.weight
+            self.counts = [c * scale for c in self.counts]
+            self.total *= scale
+            self.weight = 1.0
+
+    def quantile(self, p):
+        if not self.total:
+            return None
+        target = self.total * p
+        seen = 0.0
+        width = (self.hi - self.lo) / self.bins
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                return self.lo + (i + (target - seen) / c) * width
+            seen += c
+        return self.hi
+
+    @property
+    def effective_count(self):
+        """Samples' worth of weight still in the histogram"""
+        return self.total / self.weight
@@ -0,0 +1,176 @@
+import collections
+import json
+import os
+import sys
+import threading
+import eventlog
+
+# ===================== Settings =====================
+WINDOW = 60.0            # seconds of events the live score covers
+THRESHOLD = 20.0         # windowed score that raises a "suspicion_alert"
+REARM_FRACTION = 0.5     # the score must fall below THRESHOLD * this before the next alert
+MAX_ALERTS = 200         # alerts listed in a session summary
+CONFIG_FILE = "scoring.json"
+# Event kind -> (points per event, points per second of its value).  Interval
+# events carry the seconds they cover as their value; for the others the
+# value (a pid, a distance) is not a duration, so only the first term is used.
+WEIGHTS = {
+    "eye_violation": (0.5, 1.0),
+    "head_violation": (0.5, 1.0),
+    "sound_violation": (0.0, 1.0),
+    "candidate_speaking": (0.0, 2.0),
+    "external_voice": (0.0, 1.0),
+    "multiple_faces": (0.0, 3.0),
+    "no_face": (0.0, 0.5),
+    "identity_changed": (20.0, 0.0),
+    "eyes_closed": (0.0, 0.2),
+    "focus_lost": (5.0, 0.0),
+    "focus_gained": (0.0, 0.5),       # seconds spent outside the exam window
+    "camera_recovered": (0.0, 0.2),   # seconds nobody was watching
+    "device_added": (10.0, 0.0),
+    "new_domain": (2.0, 0.0),
+    "new_process": (2.0, 0.0),
+}
+
+
+def load_config(path=CONFIG_FILE):
+    """Scorer keyword arguments from a JSON file, defaults where it is silent.
+
+    The file may set "window", "threshold" and "weights" (kind -> [per event,
+    per second]); listed weights replace the default of their kind only.
+    """
+    config = {"window": WINDOW, "threshold": THRESHOLD, "weights": dict(WEIGHTS)}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+        config["window"] = float(data.get("window", WINDOW))
+        config["threshold"] = float(data.get("threshold", THRESHOLD))
+        for kind, (per_event, per_second) in data.get("weights", {}).items():
+            config["weights"][kind] = (float(per_event), float(per_second))
+    return config
+
+
+# ===================== Streaming scorer =====================
+class SuspicionScorer:
+    """Weighted suspicion score over a sliding window of monitor events.
+
+    Each weighted event adds its points to a running total and to a FIFO of
+    (timestamp, kind, points); points older than the window are subtracted
+    as the clock passes them, so every event costs O(1) amortized whatever
+    the session length.  The clock is the newest event timestamp, so a live
+    session (bus subscriber) and an offline replay of its log give the same
+    scores.  Crossing the threshold publishes "suspicion_alert" once; the
+    score has to drop below REARM_FRACTION of it before the next one.
+    """
+
+    def __init__(self, weights=None, window=WINDOW, threshold=THRESHOLD, bus=eventlog.bus):
+        self.weights = WEIGHTS if weights is None else weights
+        self.window = window
+        self.threshold = threshold
+        self.bus = bus
+        self.recent = collections.deque()  # (ts, kind, points) inside the window
+        self.score = 0.0                   # Sum of the points in `recent`
+        self.signals = {}                  # kind -> points inside the window
+        self.totals = {}                   # kind -> points over the whole session
+        self.now = None
+        self.armed = True
+        self.peak = 0.0
+        self.peak_at = None
+        self.alerts = []                   # (ts, score, top signals)
+        self.alert_count = 0
+        self.events = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        """Bus subscriber entry point"""
+        self.add(*event)
+
+    def add(self, ts, kind, detail="", value=0.0):
+        """Feed one (timestamp, kind, detail, value) event; returns the windowed score"""
+        weight = self.weights.get(kind)
+        if weight is None:
+            return self.score
+        points = weight[0] + weight[1] * max(value, 0.0)
+        with self.lock:
+            self._expire(ts)
+            self.events += 1
+            if points > 0:
+                self.recent.append((ts, kind, points))
+                self.score += points
+                self.signals[kind] = self.signals.get(kind, 0.0) + points
+                self.totals[kind] = self.totals.get(kind, 0.0) + points
+            score = self.score
+            if score > self.peak:
+                self.peak, self.peak_at = score, ts
+            alert = None
+            if self.armed and score >= self.threshold:
+                self.armed = False
+                alert = (ts, score, self._top())
+                self.alert_count += 1
+                if len(self.alerts) < MAX_ALERTS:
+                    self.alerts.append(alert)
+        if alert is not None and self.bus is not None:
+            # Outside the lock: the alert comes back to this subscriber
+            self.bus.publish("suspicion_alert", ", ".join(alert[2]), score, ts)
+        return score
+
+    def _expire(self, ts):
+        if self.now is None or ts > self.now:
+            self.now = ts
+        horizon = self.now - self.window
+        recent = self.recent
+        while recent and recent[0][0] <= horizon:
+            _, kind, points = recent.popleft()
+            self.signals[kind] -= points
+            self.score -= points
+        if not recent:
+            self.score = 0.0       # Drop the rounding drift of the running sums
+            self.signals.clear()
+        if not self.armed and self.score < self.threshold * REARM_FRACTION:
+            self.armed = True
+
+    def _top(self, n=3):
+        ranked = sorted(self.signals.items(), key=lambda item: -item[1])[:n]
+        return [f"{kind} {points:.1f}" for kind, points in ranked if points > 0]
+
+    def current(self, ts):
+        """Windowed score as of `ts` (lets an idle session decay on screen)"""
+        with self.lock:
+            self._expire(ts)
+            return self.score
+
+    def summary(self):
+        """Session totals, peak and alerts as a JSON-ready dict"""
+        with self.lock:
+            return {
+                "window_seconds": self.window,
+                "threshold": self.threshold,
+                "total": round(sum(self.totals.values()), 1),
+                "by_signal": {kind: round(points, 1) for kind, points in
+                              sorted(self.totals.items(), key=lambda item: -item[1])},
+                "peak": round(self.peak, 1),
+                "peak_at": self.peak_at,
+                "alert_count": self.alert_count,
+                "alerts": [{"ts": ts, "score": round(score, 1), "signals": top}
+                           for ts, score, top in self.alerts],
+            }
+
+
+def score_session(folder=eventlog.EVENT_DIR, config=None):
+    """Re-score a recorded session offline with the live scorer"""
+    config = load_config() if config is None else config
+    scorer = SuspicionScorer(config["weights"], config["window"], config["threshold"], bus=None)
+    add = scorer.add
+    names = eventlog.KIND_NAMES
+    for ts, code, sid, value, strings in eventlog.iter_raw(folder):
+        add(ts, names.get(code, ""), "", value)
+    return scorer.summary()
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else eventlog.EVENT_DIR
+    result = score_session(folder, load_config(sys.argv[2] if len(sys.argv) > 2 else CONFIG_FILE))
+    print(f"Suspicion total {result['total']}, peak {result['peak']} "
+          f"over {result['window_seconds']:.0f}s, {result['alert_count']} alerts")
+    for kind, points in result["by_signal"].items():
+        print(f"  {kind}: {points}")
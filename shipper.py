@@ -0,0 +1,290 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+import eventlog
+import eventwire
+
+# ===================== Settings =====================
+SPOOL_DIR = "event_spool"
+BATCH_INTERVAL = 0.5     # seconds between batches
+MAX_BATCH_EVENTS = 2000  # events per batch
+WINDOW = 8               # unacknowledged batches in flight
+MAX_BUFFERED = 100000    # events held in memory before they are dropped
+RECONNECT_MIN, RECONNECT_MAX = 0.5, 30.0
+
+
+class Spool:
+    """Append-only on-disk FIFO of outgoing batches"""
+
+    def __init__(self, path):
+        self.path = path
+        self.read_pos = 0
+        self.count = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                self.count = sum(1 for _ in f)
+
+    def append(self, batch):
+        with open(self.path, "ab") as f:
+            f.write(json.dumps(batch, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.count += 1
+
+    def peek(self):
+        """Oldest spooled batch and the file position after it, or (None, pos)"""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.read_pos)
+                line = f.readline()
+                pos = f.tell()
+        except FileNotFoundError:
+            return None, self.read_pos
+        if not line.endswith(b"\n"):
+            return None, self.read_pos
+        return json.loads(line), pos
+
+    def pop(self, pos):
+        """Mark the oldest batch as handed to the connection"""
+        self.read_pos = pos
+        self.count -= 1
+
+    def discard(self):
+        """Delete the file once every batch in it has been acknowledged"""
+        self.count, self.read_pos = 0, 0
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class EventShipper:
+    """Ship this seat's monitor events to the central collector.
+
+    Events are taken from the event bus without blocking the publisher and
+    cut into batches every BATCH_INTERVAL.  Each batch is appended to a
+    local spool file first, then sent over one persistent connection with
+    at most WINDOW unacknowledged batches.  While offline, or while the
+    server pushes back, the spool simply grows; after reconnecting it is
+    replayed in order and deleted once fully acknowledged.  Batch numbers
+    are millisecond timestamps, so they keep increasing across restarts and
+    the server can drop replays.
+    """
+
+    def __init__(self, session_id, host=eventwire.DEFAULT_HOST, port=eventwire.DEFAULT_PORT,
+                 spool_dir=SPOOL_DIR, event_bus=None):
+        self.session_id = session_id
+        self.host, self.port = host, port
+        os.makedirs(spool_dir, exist_ok=True)
+        self.spool = Spool(os.path.join(spool_dir, f"{session_id}.spool"))
+        self.connected = False
+        self.dropped = 0
+
+        self._events = deque()
+        self._inflight = OrderedDict()  # seq -> batch, sent but not acknowledged
+        self._seq = 0
+        self._acked_seq = 0
+        self._acked = None  # asyncio.Event, created on the shipper's loop
+        self._closing = False
+        self._bus = event_bus or eventlog.bus
+        self._bus.subscribe(self._on_event)
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),),
+                                        name="event-shipper", daemon=True)
+        self._thread.start()
+
+    def _on_event(self, event):
+        # Runs on the publishing thread: never block, never touch the network
+        if len(self._events) < MAX_BUFFERED:
+            self._events.append(event)
+        else:
+            self.dropped += 1
+
+    def _next_batch(self):
+        events = []
+        while self._events and len(events) < MAX_BATCH_EVENTS:
+            events.append(list(self._events.popleft()))
+        if not events:
+            return None
+        self._seq = max(self._seq + 1, int(time.time() * 1000))
+        return {"type": "batch", "seq": self._seq, "events": events}
+
+    # ---------- connection ----------
+    async def _main(self):
+        self._acked = asyncio.Event()
+        batcher = asyncio.create_task(self._batch_loop())
+        delay = RECONNECT_MIN
+        while not (self._closing and not self._pending()):
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX)
+                continue
+            delay = RECONNECT_MIN
+            try:
+                await self._session(reader, writer)
+            except (OSError, asyncio.IncompleteReadError, ValueError, KeyError):
+                pass
+            finally:
+                self.connected = False
+                writer.close()
+        await batcher
+
+    def _pending(self):
+        return bool(self._events or self._inflight or self.spool.count)
+
+    async def _session(self, reader, writer):
+        writer.write(eventwire.encode({"type": "hello", "session": self.session_id}))
+        welcome = await eventwire.read_message(reader)
+        self._ack(welcome.get("last_seq", 0))
+        self.connected = True
+        acks = asyncio.create_task(self._read_acks(reader))
+        try:
+            # Resend what was in flight when the connection dropped
+            for batch in list(self._inflight.values()):
+                writer.write(eventwire.encode(batch))
+            await writer.drain()
+            while True:
+                if acks.done():
+                    acks.result()  # Re-raise the connection error
+                if not self._inflight and self.spool.count <= 0 and os.path.exists(self.spool.path):
+                    self.spool.discard()
+                batch, pos = self.spool.peek()
+                if batch is None:
+                    if self._closing and not self._pending():
+                        writer.write(eventwire.encode({"type": "bye"}))
+                        await writer.drain()
+                        return
+                    await asyncio.sleep(BATCH_INTERVAL / 2)
+                    continue
+                while len(self._inflight) >= WINDOW and not acks.done():
+                    self._acked.clear()
+                    waiter = asyncio.ensure_future(self._acked.wait())
+                    await asyncio.wait([waiter, acks], return_when=asyncio.FIRST_COMPLETED)
+                    waiter.cancel()
+                if acks.done():
+                    continue
+                self.spool.pop(pos)
+                if batch["seq"] <= self._acked_seq:
+                    continue  # Already stored before a restart
+                self._inflight[batch["seq"]] = batch
+                writer.write(eventwire.encode(batch))
+                await writer.drain()  # Blocks when the server applies backpressure
+        finally:
+            acks.cancel()
+
+    async def _read_acks(self, reader):
+        while True:
+            message = await eventwire.read_message(reader)
+            if message.get("type") == "ack":
+                self._ack(message["seq"])
+
+    def _ack(self, seq):
+        self._acked_seq = max(self._acked_seq, seq)
+        while self._inflight and next(iter(self._inflight)) <= seq:
+            self._inflight.popitem(last=False)
+        if self._acked is not None:
+            self._acked.set()
+
+    async def _batch_loop(self):
+        """Cut batches on a fixed cadence; everything goes through the spool"""
+        while True:
+            await asyncio.sleep(BATCH_INTERVAL)
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                self.spool.append(batch)
+            if self._closing:
+                return
+
+    def close(self, timeout=10.0):
+        """Ship what is left (up to timeout), say goodbye and stop"""
+        self._bus.unsubscribe(self._on_event)
+        self._closing = True
+        self._thread.join(timeout)
+
+
+# ===================== Synthetic clients =====================
+SYNTHETIC_KINDS = [
+    ("eye_violation", 0.35), ("head_violation", 0.25), ("sound_violation", 0.3),
+    ("focus_lost", 0.03), ("device_added", 0.02), ("new_domain", 0.03), ("new_process", 0.02),
+]
+
+
+def synthetic_events(rng, start_ts, rate, duration):
+    """Plausible proctoring events at `rate` events/s over `duration` seconds"""
+    kinds, weights = zip(*SYNTHETIC_KINDS)
+    ts, end = start_ts, start_ts + duration
+    while True:
+        ts += rng.expovariate(rate)
+        if ts >= end:
+            return
+        kind = rng.choices(kinds, weights)[0]
+        detail = ""
+        if kind == "device_added":
+            detail = f"USB Device: Synthetic {rng.randint(1, 5)}"
+        elif kind == "new_domain":
+            detail = f"host{rng.randint(1, 40)}.example.com"
+        elif kind == "new_process":
+            detail = rng.choice(["chrome.exe", "discord.exe", "notepad.exe"])
+        value = {"sound_violation": 1024 / 44100}.get(kind, rng.uniform(0.3, 3.0))
+        yield ts, kind, detail, value
+
+
+async def synthetic_client(host, port, session_id, rate, duration, seed=None):
+    """One simulated exam seat speaking the shipper protocol in real time.
+
+    Returns the end-to-end latency (event time to server ack) of every event.
+    """
+    rng = random.Random(seed if seed is not None else session_id)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(eventwire.encode({"type": "hello", "session": session_id}))
+    await eventwire.read_message(reader)
+
+    sent = {}        # seq -> event timestamps awaiting an ack
+    latencies = []
+
+    async def read_acks():
+        try:
+            while True:
+                message = await eventwire.read_message(reader)
+                if message.get("type") == "ack":
+                    now = time.time()
+                    for done in [n for n in sent if n <= message["seq"]]:
+                        latencies.extend(now - ts for ts in sent.pop(done))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def send(seq, batch):
+        sent[seq] = [event[0] for event in batch]
+        writer.write(eventwire.encode({"type": "batch", "seq": seq, "events": batch}))
+
+    acks = asyncio.create_task(read_acks())
+    start = time.time()
+    seq, batch = 0, []
+    next_flush = start + BATCH_INTERVAL
+    for event in synthetic_events(rng, start, rate, duration):
+        delay = event[0] - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        batch.append(list(event))
+        if event[0] >= next_flush or len(batch) >= MAX_BATCH_EVENTS:
+            seq += 1
+            send(seq, batch)
+            await writer.drain()
+            batch, next_flush = [], event[0] + BATCH_INTERVAL
+    if batch:
+        seq += 1
+        send(seq, batch)
+    # Wait for outstanding acks before saying goodbye
+    deadline = time.time() + 10.0
+    while sent and not acks.done() and time.time() < deadline:
+        await asyncio.sleep(0.01)
+    writer.write(eventwire.encode({"type": "bye"}))
+    await writer.drain()
+    writer.close()
+    acks.cancel()
+    return latencies
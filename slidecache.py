@@ -0,0 +1,153 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+# ===================== Settings =====================
+SLIDE_MAX_SIZE = (800, 500)        # Display box used by show_slide
+PREFETCH_AHEAD = 2                 # Slides decoded ahead of the current one
+CACHE_MAX_BYTES = 96 * 1024 * 1024 # Decoded pixels kept in memory
+
+
+def fit_size(img_size, max_size):
+    """Largest size with the image's aspect ratio that fits in max_size"""
+    img_width, img_height = img_size
+    max_width, max_height = max_size
+    ratio = min(max_width / img_width, max_height / img_height)
+    return max(1, int(img_width * ratio)), max(1, int(img_height * ratio))
+
+
+def decode_slide(path, max_size=SLIDE_MAX_SIZE):
+    """Open, decode and LANCZOS-resize one slide to fit max_size"""
+    with Image.open(path) as img:
+        new_size = fit_size(img.size, max_size)
+        # JPEG can decode directly at a reduced scale, which is much cheaper
+        # than decoding full resolution and resizing afterwards.
+        img.draft("RGB", new_size)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        resized = img.resize(new_size, Image.Resampling.LANCZOS)
+    resized.load()
+    return resized
+
+
+class SlideCache:
+    """Background slide decoder with a size-bounded LRU of ready images.
+
+    A worker thread decodes and resizes slides ahead of the one on screen;
+    ``photo`` is called from the Tk thread and only wraps an already
+    decoded image in a PhotoImage (memoised per entry).  Entries are keyed
+    by (path, target size, mtime) so edited slides are picked up again.
+    """
+
+    def __init__(self, paths, max_size=SLIDE_MAX_SIZE, prefetch=PREFETCH_AHEAD,
+                 max_bytes=CACHE_MAX_BYTES):
+        self.paths = list(paths)
+        self.max_size = tuple(max_size)
+        self.prefetch_ahead = prefetch
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()  # key -> [image, photo or None, nbytes]
+        self._bytes = 0
+        self._inflight = {}            # key -> threading.Event
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="slide-decoder", daemon=True)
+        self._worker.start()
+
+    # ---------- keys ----------
+    def _key(self, index):
+        path = self.paths[index]
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        return (path, self.max_size, mtime)
+
+    # ---------- worker ----------
+    def _run(self):
+        while True:
+            index = self._queue.get()
+            if index is None or self._closed:
+                return
+            try:
+                self._ensure(index)
+            except Exception:
+                continue  # show_slide reports the error when the slide is shown
+
+    def _ensure(self, index):
+        """Return the decoded image for a slide, decoding it if needed"""
+        key = self._key(index)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    break
+            event.wait()  # Another thread is decoding this slide already
+
+        try:
+            image = decode_slide(key[0], self.max_size)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+        nbytes = image.width * image.height * len(image.getbands())
+        with self._lock:
+            self._entries[key] = [image, None, nbytes]
+            self._bytes += nbytes
+            self._evict()
+        return image
+
+    def _evict(self):
+        # Never evict the most recent entry, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+
+    # ---------- public ----------
+    def prefetch(self, index):
+        """Queue the next PREFETCH_AHEAD slides starting at index"""
+        for i in range(index, min(index + self.prefetch_ahead, len(self.paths))):
+            key = self._key(i)
+            with self._lock:
+                if key in self._entries or key in self._inflight:
+                    continue
+            self._queue.put(i)
+
+    def get(self, index):
+        """Decoded, resized PIL image for a slide (blocks only on a miss)"""
+        return self._ensure(index)
+
+    def photo(self, index):
+        """Ready-to-display PhotoImage for a slide; call from the Tk thread"""
+        image = self._ensure(index)
+        key = self._key(index)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None:
+                return entry[1]
+        tk_img = ImageTk.PhotoImage(image)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] = tk_img
+        return tk_img
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def close(self):
+        """Stop the worker and drop every cached image"""
+        self._closed = True
+        self._queue.put(None)
+        self.clear()
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+
+# ===================== Histogram =====================
+# HDR-style log-linear buckets over microseconds: exact below 64 us, then 32
+# sub-buckets per power of two (~3% relative error) up to ~30 s, in a fixed
+# list of ints.  Recording is one bit_length() and one list increment.
+SUB_BITS = 6
+HALF = 1 << (SUB_BITS - 1)
+BUCKETS = (26 - SUB_BITS + 2) * HALF + HALF
+
+PROFILE_ENV = "PROCTORY_PROFILE"  # set to a .prof path (or 1) to cProfile tracking
+
+
+def bucket_index(us):
+    if us < (1 << SUB_BITS):
+        return us
+    shift = us.bit_length() - SUB_BITS
+    return min(shift * HALF + (us >> shift), BUCKETS - 1)
+
+
+def bucket_value(index):
+    """Lower bound (us) of a bucket"""
+    if index < (1 << SUB_BITS):
+        return index
+    shift = index // HALF - 1
+    return (index - shift * HALF) << shift
+
+
+class Histogram:
+    """Fixed-size latency histogram (microseconds)"""
+
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0
+        self.count = 0
+        self.max = 0
+
+    def record(self, us):
+        self.counts[bucket_index(us)] += 1
+        self.total += us
+        self.count += 1
+        if us > self.max:
+            self.max = us
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        target = self.count * p / 100.0
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return bucket_value(index)
+        return self.max
+
+    def summary(self):
+        """Milliseconds: count, mean, p50, p90, p99, max"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count / 1000, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(50) / 1000,
+            "p90_ms": self.percentile(90) / 1000,
+            "p99_ms": self.percentile(99) / 1000,
+            "max_ms": self.max / 1000,
+        }
+
+
+# ===================== Stage timer =====================
+class StageTimer:
+    """Per-stage monotonic spans of a frame loop, aggregated into histograms.
+
+    Usage per frame: ``start()``, then ``lap("stage")`` after each stage and
+    ``frame_done()`` at the end.  With sample_every > 1 only every n-th
+    frame is timed, so the steady-state cost is a counter increment.
+    """
+
+    def __init__(self, stages=(), sample_every=1):
+        self.sample_every = max(1, sample_every)
+        self.histograms = {name: Histogram() for name in stages}
+        self.frame = Histogram()
+        self.frames = 0
+        self._active = False
+        self._frame_start = self._last = 0
+        self._lock = threading.Lock()  # Only taken by readers/reset, not per lap
+
+    def start(self):
+        self.frames += 1
+        self._active = self.frames % self.sample_every == 0
+        if self._active:
+            self._frame_start = self._last = time.perf_counter_ns()
+
+    def lap(self, stage):
+        if not self._active:
+            return
+        now = time.perf_counter_ns()
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = Histogram()
+        hist.record((now - self._last) // 1000)
+        self._last = now
+
+    def skip(self):
+        """Restart the current span without recording (e.g. after idle waits)"""
+        if self._active:
+            self._last = time.perf_counter_ns()
+
+    def frame_done(self):
+        if self._active:
+            self.frame.record((time.perf_counter_ns() - self._frame_start) // 1000)
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: hist.summary() for name, hist in self.histograms.items()}
+            frame = self.frame.summary()
+        fps = 1000.0 / frame["mean_ms"] if frame["mean_ms"] else 0.0
+        return {"frames": self.frames, "sample_every": self.sample_every,
+                "fps": round(fps, 1), "frame": frame, "stages": stages}
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {name: Histogram() for name in self.histograms}
+            self.frame = Histogram()
+            self.frames = 0
+
+    def format_table(self):
+        """Fixed-width text table for the debug panel"""
+        return format_snapshot(self.snapshot())
+
+    def dump(self, path):
+        """Write the current snapshot (with raw buckets) as JSON"""
+        snap = self.snapshot()
+        snap["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        snap["buckets_us"] = {name: {bucket_value(i): n for i, n in enumerate(h.counts) if n}
+                              for name, h in self.histograms.items()}
+        with open(path, "w") as f:
+            json.dump(snap, f, indent=4)
+        return path
+
+
+def format_snapshot(snap):
+    """Text table of a StageTimer.snapshot() (may come from another process)"""
+    lines = [f"Frames: {snap['frames']}  ~{snap['fps']} FPS",
+             f"{'stage':<10}{'mean':>7}{'p50':>7}{'p99':>7}{'max':>7}  ms"]
+    for name, s in list(snap["stages"].items()) + [("frame", snap["frame"])]:
+        lines.append(f"{name:<10}{s['mean_ms']:>7.2f}{s['p50_ms']:>7.2f}"
+                     f"{s['p99_ms']:>7.2f}{s['max_ms']:>7.2f}")
+    return "\n".join(lines)
+
+
+# ===================== Profiling =====================
+def start_profiler():
+    """Start cProfile if PROCTORY_PROFILE is set; returns the profiler or None"""
+    if not os.environ.get(PROFILE_ENV):
+        return None
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profiler(profiler, default_path="tracking.prof"):
+    """Stop a profiler from start_profiler and write its stats file"""
+    if profiler is None:
+        return None
+    profiler.disable()
+    path = os.environ.get(PROFILE_ENV, "")
+    path = path if path.endswith(".prof") else default_path
+    profiler.dump_stats(path)
+    return path
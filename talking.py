@@ -0,0 +1,163 @@
+import collections
+import math
+import threading
+import time
+import eventlog
+import rollingstats
+
+# ===================== Settings =====================
+# Syllables come at roughly 2-8 Hz; slower mouth changes (yawning, resting
+# posture) and frame-to-frame jitter fall outside the band
+BAND_LOW_HZ = 2.0
+BAND_HIGH_HZ = 8.0
+ENERGY_SECONDS = 0.5    # averaging time of the band-passed energy
+MOUTH_ACTIVE = 0.02     # band-passed mouth-opening RMS that counts as moving lips
+VOICE_RMS = 100         # audio chunk RMS (int16 samples) that counts as voice at the least: a whisper
+VOICE_OVER_FLOOR = 3.0  # ...and it must be this many times the room's noise floor
+NOISE_QUANTILE = 0.2    # noise floor: this quantile of recent chunk levels (speech has pauses)
+NOISE_HALFLIFE = 1300   # chunks (~30 s at 1024 samples / 44.1 kHz) behind the noise floor
+VOICE_FRACTION = 0.25   # share of loud chunks in a window for it to hold voice
+WINDOW = 0.5            # seconds per fused decision
+LAG = 0.3               # seconds a window waits for late samples of the other stream
+MAX_INTERVAL = 10.0     # long intervals are published in chunks of at most this many seconds
+EVENTS = {"candidate": "candidate_speaking", "external": "external_voice"}
+
+
+def mouth_opening(pts, upper, lower, left, right):
+    """Inner lip gap over mouth width, from a landmark array and its column indices"""
+    gap = math.hypot(pts[upper][0] - pts[lower][0], pts[upper][1] - pts[lower][1])
+    width = math.hypot(pts[right][0] - pts[left][0], pts[right][1] - pts[left][1])
+    return gap / width if width else 0.0
+
+
+# ===================== Mouth activity =====================
+class MouthActivity:
+    """Band-passed mouth-opening ratio, O(1) per frame.
+
+    The difference of a fast and a slow exponential average keeps the
+    speech-rhythm band; its energy is averaged over ENERGY_SECONDS.  The
+    filters use the real frame spacing, so a varying frame rate is fine.
+    """
+
+    def __init__(self, low_hz=BAND_LOW_HZ, high_hz=BAND_HIGH_HZ, energy_seconds=ENERGY_SECONDS):
+        self.fast_tau = 1.0 / (2 * math.pi * high_hz)
+        self.slow_tau = 1.0 / (2 * math.pi * low_hz)
+        self.energy_tau = energy_seconds
+        self.fast = self.slow = self.energy = None
+        self.last_t = None
+        self.value = 0.0
+
+    def update(self, ratio, t):
+        if self.last_t is None or t - self.last_t > 1.0:  # First frame or after a gap
+            self.fast = self.slow = ratio
+            self.energy = 0.0
+        else:
+            dt = max(t - self.last_t, 1e-3)
+            self.fast += (ratio - self.fast) * (1 - math.exp(-dt / self.fast_tau))
+            self.slow += (ratio - self.slow) * (1 - math.exp(-dt / self.slow_tau))
+            band = self.fast - self.slow
+            self.energy += (band * band - self.energy) * (1 - math.exp(-dt / self.energy_tau))
+        self.last_t = t
+        self.value = math.sqrt(self.energy)
+        return self.value
+
+
+# ===================== Fusion =====================
+class TalkingFusion:
+    """Tell the candidate speaking apart from a voice in the room.
+
+    Mouth samples (``add_mouth``, from the tracker) and audio levels
+    (``add_audio``, from the microphone) are stamped on time.monotonic(),
+    which is shared by every process of the machine, so the two streams line
+    up even though they come from different processes.  Every WINDOW
+    seconds (once LAG has passed for stragglers) the window is labelled:
+    voice with moving lips is "candidate", voice while the face is visible
+    and the lips are still is "external"; voice without a face in view is
+    left undecided.  A chunk is voice above VOICE_RMS and VOICE_OVER_FLOOR
+    times the noise floor, so a whisper counts in a quiet room while a
+    steady fan does not.  Runs of one label are published as
+    "candidate_speaking" / "external_voice" with their length as the value.
+    """
+
+    def __init__(self, window=WINDOW, lag=LAG, mouth_active=MOUTH_ACTIVE, voice_rms=VOICE_RMS,
+                 bus=eventlog.bus):
+        self.window = window
+        self.lag = lag
+        self.mouth_active = mouth_active
+        self.voice_rms = voice_rms
+        self.bus = bus
+        self.mouth = collections.deque()  # (t, activity or None without a face)
+        self.audio = collections.deque()  # (t, rms)
+        # log10 levels: 0.05 decade bins from silence to int16 full scale
+        self.levels = rollingstats.DecayingQuantile(0.0, 4.6, bins=92, decay=0.5 ** (1.0 / NOISE_HALFLIFE))
+        self.window_start = None
+        self.label = None                 # Label of the open run
+        self.since = None                 # Start of its unpublished part
+        self.windows = {"candidate": 0, "external": 0, "silent": 0, "unknown": 0}
+        self.lock = threading.Lock()
+
+    def add_mouth(self, t, activity):
+        """One tracker frame; activity None when no face was found"""
+        with self.lock:
+            self.mouth.append((t, activity))
+            self._advance(t)
+
+    def add_audio(self, rms, t=None):
+        """One audio chunk level; t = monotonic time of its last sample"""
+        t = time.monotonic() if t is None else t
+        with self.lock:
+            self.audio.append((t, rms))
+            self.levels.update(math.log10(rms + 1.0))
+            self._advance(t)
+
+    def _advance(self, now):
+        if self.window_start is None:
+            self.window_start = now
+        while self.window_start + self.window + self.lag <= now:
+            end = self.window_start + self.window
+            self._decide(self.window_start, end)
+            self.window_start = end
+
+    def _take(self, samples, end):
+        out = []
+        while samples and samples[0][0] < end:
+            out.append(samples.popleft()[1])
+        return out
+
+    def _decide(self, start, end):
+        levels = self._take(self.audio, end)
+        mouth = [a for a in self._take(self.mouth, end) if a is not None]
+        threshold = max(self.voice_rms, VOICE_OVER_FLOOR * self.noise_floor())
+        voice = bool(levels) and sum(rms > threshold for rms in levels) >= VOICE_FRACTION * len(levels)
+        if not voice:
+            label = "silent"
+        elif not mouth:
+            label = "unknown"
+        elif max(mouth) >= self.mouth_active:
+            label = "candidate"
+        else:
+            label = "external"
+        self.windows[label] += 1
+        if label != self.label:
+            self._publish(start)
+            self.label, self.since = label, start
+        elif self.since is not None and end - self.since >= MAX_INTERVAL:
+            self._publish(end)
+            self.since = end
+
+    def noise_floor(self):
+        """Typical level of the quiet chunks heard lately"""
+        level = self.levels.quantile(NOISE_QUANTILE)
+        return 0.0 if level is None else 10 ** level - 1.0
+
+    def _publish(self, end):
+        if self.label in EVENTS and self.bus is not None and end > self.since:
+            # Back to wall-clock time for the event log
+            self.bus.publish(EVENTS[self.label], "", end - self.since, end + time.time() - time.monotonic())
+
+    def close(self):
+        """Publish the run still open"""
+        with self.lock:
+            if self.window_start is not None:
+                self._publish(self.window_start)
+            self.label = self.since = None
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calibration
+
+FPS = 30
+YAW_TOL = 25  # UI TRACKING_OPTIONS
+
+
+def run(baseline, value, seconds, start=0.0):
+    for i in range(int(seconds * FPS)):
+        baseline.update(value, start + i / FPS)
+    return start + seconds
+
+
+def test_sustained_look_away_is_not_absorbed():
+    baseline = calibration.Baseline("yaw", 0.0, YAW_TOL)
+    run(baseline, 40.0, 300)
+    assert abs(40.0 - baseline.center) > YAW_TOL
+    assert abs(baseline.center) < 1e-9
+
+
+def test_gradual_posture_change_is_followed_within_cap():
+    baseline = calibration.Baseline("yaw", 0.0, YAW_TOL)
+    t = 0.0
+    for target in (4.0, 8.0, 12.0, 16.0, 20.0, 24.0):
+        t = run(baseline, target, 60, t)
+    assert baseline.center > 10.0
+    assert baseline.center <= calibration.MAX_TOTAL_DRIFT * YAW_TOL + 1e-9
+
+
+def test_replay_matches_update():
+    import random
+    rng = random.Random(3)
+    xs, value = [], 0.0
+    for i in range(20 * 60 * FPS):
+        value += rng.gauss(0.0, 0.3) + 0.002
+        xs.append(value + rng.gauss(0.0, 2.0) + (150.0 if rng.random() < 0.01 else 0.0))
+    times = [i / FPS for i in range(len(xs))]
+    live = calibration.Baseline("yaw", 0.0, YAW_TOL)
+    expected = []
+    for x, t in zip(xs, times):
+        expected.append(live.center)
+        live.update(x, t)
+    replayed = calibration.Baseline("yaw", 0.0, YAW_TOL)
+    assert replayed.replay(xs, times) == expected
+    assert replayed.center == live.center and replayed.rejected == live.rejected
@@ -0,0 +1,274 @@
+import multiprocessing as mp
+import queue
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+# ===================== Settings =====================
+PREVIEW_SHAPE = (240, 320, 3)  # RGB preview handed to the UI
+RING_SLOTS = 4
+STATS_INTERVAL = 1.0           # seconds between stage timing snapshots
+RESULT_QUEUE_SIZE = 256
+
+
+# ===================== Shared frame ring =====================
+class FrameRing:
+    """Fixed-shape uint8 frames in a shared memory ring, one writer.
+
+    Layout: int64 header [latest seq, slot seq x slots] followed by the
+    frames.  The writer marks a slot -1 while filling it; a reader copies
+    the latest slot and keeps the copy only if the slot's seq did not
+    change meanwhile, so no locks are needed and frames are never pickled.
+    """
+
+    def __init__(self, name=None, shape=PREVIEW_SHAPE, slots=RING_SLOTS, create=False):
+        self.shape = tuple(shape)
+        self.slots = slots
+        header = 8 * (1 + slots)
+        size = header + slots * int(np.prod(self.shape))
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self.shm.name
+        self.header = np.ndarray((1 + slots,), dtype=np.int64, buffer=self.shm.buf)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=header)
+        if create:
+            self.header[:] = 0
+        self._seq = int(self.header[0])
+
+    def write(self, frame):
+        seq = self._seq + 1
+        slot = seq % self.slots
+        self.header[1 + slot] = -1
+        self.frames[slot] = frame
+        self.header[1 + slot] = seq
+        self.header[0] = seq
+        self._seq = seq
+        return seq
+
+    def read_latest(self, after=0):
+        """(seq, copy of the newest frame) or (after, None) if nothing newer"""
+        seq = int(self.header[0])
+        if seq <= after:
+            return after, None
+        slot = seq % self.slots
+        frame = self.frames[slot].copy()
+        if int(self.header[1 + slot]) != seq:
+            return after, None  # Overwritten while copying; the next poll gets a newer one
+        return seq, frame
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.header = self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ===================== Worker process =====================
+def tracking_process(ring_name, results, stop, source, options, control=None, triggers=None):
+    """Capture + EyeHeadTracker loop; frames out via the ring, records via the queue.
+
+    Records are small tuples: ("frame", seq, face, dx, dy, yaw, pitch, roll, mouth,
+    captured) with mouth None without a face and captured on time.monotonic(),
+    ("event", ts, kind, detail, value), ("stats", snapshot), ("error", text)
+    and finally ("done",).  With a control queue the process first warms up
+    (imports, FaceMesh graph, camera), sends ("ready", seconds) and waits for
+    the remaining tracker options on that queue before tracking starts.
+    (kind, detail, ts) tuples on `triggers` save evidence clips for events
+    published in the exam process (the talking fusion runs there).
+    """
+    started = time.monotonic()  # Warm-up time includes the imports below
+    import cv2
+    import capture
+    import eventlog
+    import eyehead
+    import stagetimer
+
+    ring = FrameRing(ring_name)
+    h, w = ring.shape[:2]
+
+    def forward(event):
+        # Violations must reach the exam process; block briefly rather than drop
+        try:
+            results.put(("event",) + tuple(event), timeout=1.0)
+        except queue.Full:
+            pass
+
+    eventlog.bus.subscribe(forward)
+    cap = tracker = None
+    profiler = stagetimer.start_profiler()
+    try:
+        face_mesh = eyehead.create_face_mesh(options.get("refine_landmarks", True))
+        cap = capture.watch_camera(source, face_mesh)
+        if control is not None:
+            ret, frame = cap.read()
+            if not ret:
+                raise RuntimeError("camera not available")
+            face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))  # Builds the inference graph
+            results.put(("ready", time.monotonic() - started))
+            while True:
+                if stop.is_set():
+                    return
+                try:
+                    options = dict(options, **control.get(timeout=0.05))
+                    break
+                except queue.Empty:
+                    if isinstance(source, int):
+                        cap.grab()  # Keep the camera streaming so no stale frames are buffered
+        tracker = eyehead.EyeHeadTracker(face_mesh=face_mesh, **options)
+        timer = tracker.timer
+        next_stats = time.monotonic() + STATS_INTERVAL
+        while cap.isOpened() and not stop.is_set():
+            timer.start()
+            ret, frame = cap.read()
+            captured = time.monotonic()
+            timer.lap("capture")
+            if not ret:
+                continue  # Camera outage: the watchdog reconnects, isOpened() ends files
+            frame = cv2.flip(frame, 1)
+            result = tracker.process(frame)
+            while triggers is not None:
+                try:
+                    tracker.trigger_evidence(*triggers.get_nowait())
+                except queue.Empty:
+                    break
+            tracker.draw(frame, result)
+            seq = ring.write(cv2.cvtColor(cv2.resize(frame, (w, h)), cv2.COLOR_BGR2RGB))
+            record = ("frame", seq, result["face"]) + tuple(
+                float(result.get(key, 0.0)) for key in ("smooth_dx", "smooth_dy", "yaw", "pitch", "roll")) + (
+                result.get("mouth"), captured)
+            try:
+                results.put_nowait(record)
+            except queue.Full:
+                pass  # The UI only needs the latest state
+            timer.lap("handoff")
+            timer.frame_done()
+            if time.monotonic() >= next_stats:
+                results.put(("stats", dict(timer.snapshot(), baselines=tracker.baselines(), eyes=tracker.eye_stats())))
+                next_stats = time.monotonic() + STATS_INTERVAL
+        results.put(("stats", dict(timer.snapshot(), baselines=tracker.baselines(), eyes=tracker.eye_stats())))
+    except Exception as e:
+        results.put(("error", str(e)))
+    finally:
+        if cap is not None:
+            cap.release()
+        if tracker is not None:
+            tracker.close()
+        stagetimer.stop_profiler(profiler)
+        eventlog.bus.unsubscribe(forward)
+        ring.close()
+        results.put(("done",))
+
+
+class TrackingWorker:
+    """Run eye/head tracking in its own process, away from the Tk GIL.
+
+    The exam process polls at its own rate: ``poll()`` drains the small
+    records and ``read_preview()`` copies the newest preview frame out of
+    shared memory.  A ``warm`` worker loads everything up front and only
+    starts tracking on ``begin(options)``; ``wait_ready()`` blocks until it
+    can.
+    """
+
+    def __init__(self, source=0, options=None, preview_shape=PREVIEW_SHAPE, warm=False):
+        ctx = mp.get_context("spawn")
+        self.ring = FrameRing(shape=preview_shape, create=True)
+        self.results = ctx.Queue(RESULT_QUEUE_SIZE)
+        self.stop_event = ctx.Event()
+        self.control = ctx.Queue() if warm else None
+        self.triggers = ctx.Queue()
+        self.process = ctx.Process(target=tracking_process, name="eyehead-tracking",
+                                   args=(self.ring.name, self.results, self.stop_event,
+                                         source, options or {}, self.control, self.triggers),
+                                   daemon=True)
+        self.last_seq = 0
+        self.done = False
+        self.ready = not warm
+        self.warmup_seconds = None
+        self.error = None
+        self.pending = []  # Records read by wait_ready(), handed out by the next poll()
+
+    def start(self):
+        self.process.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """Block until a warm worker is loaded; False if it failed or timed out"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.ready:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                record = self.results.get(timeout=remaining)
+            except queue.Empty:
+                return False
+            if record[0] == "ready":
+                self.ready, self.warmup_seconds = True, record[1]
+                continue
+            self.pending.append(record)
+            if record[0] == "error":
+                self.error = record[1]
+            elif record[0] == "done":
+                self.done = True
+                return False
+        return True
+
+    def begin(self, options=None):
+        """Start tracking on a warm worker, with options on top of the initial ones"""
+        self.control.put(options or {})
+
+    def trigger_evidence(self, kind, detail="", ts=None):
+        """Ask the tracking process to clip an event published in this process"""
+        self.triggers.put((kind, detail, time.time() if ts is None else ts))
+
+    def poll(self, limit=1000):
+        records, self.pending = self.pending, []
+        while len(records) < limit:
+            try:
+                record = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if record[0] == "done":
+                self.done = True
+            records.append(record)
+        if not self.done and not self.process.is_alive() and self.process.exitcode is not None:
+            self.done = True  # Died without saying so (e.g. killed)
+        return records
+
+    def read_preview(self):
+        seq, frame = self.ring.read_latest(self.last_seq)
+        self.last_seq = seq
+        return frame
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.ring.close()
+        self.ring.unlink()
+
+
+def watch_tracking(stop_event, source=0, interval=0.1, **options):
+    """Headless gaze/head monitoring: the tracking process's events onto this process's bus"""
+    import eventlog
+
+    def forward(records):
+        for record in records:
+            if record[0] == "event":
+                _, ts, kind, detail, value = record
+                eventlog.publish(kind, detail, value, ts)
+
+    worker = TrackingWorker(source, options).start()
+    try:
+        while not worker.done and not stop_event.wait(interval):
+            forward(worker.poll())
+    finally:
+        worker.stop()
+        forward(worker.poll())  # Whatever it sent while shutting down
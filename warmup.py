@@ -0,0 +1,139 @@
+import threading
+import time
+
+# ===================== Settings =====================
+READY_TIMEOUT = 60  # seconds a tracking process may take to warm up
+
+
+# ===================== Orchestrator =====================
+class Warmup:
+    """Load slow subsystems on a background thread while the intro screens show.
+
+    ``add(name, load, release, label)`` queues a loader; ``start()`` runs them
+    in order.  The UI shows ``summary()`` as a readiness line and ``take(name)``
+    hands the loaded object over exactly once.  Whatever was never taken is
+    released by ``close()``.
+    """
+
+    def __init__(self):
+        self.tasks = []     # (name, load, release, label)
+        self.state = {}     # name -> "pending" | "loading" | "ready" | "failed"
+        self.results = {}   # name -> loaded object, until taken
+        self.errors = {}
+        self.seconds = {}
+        self.closed = False
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def add(self, name, load, release=None, label=None):
+        self.tasks.append((name, load, release, label or name))
+        self.state[name] = "pending"
+        return self
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        for name, load, release, _ in self.tasks:
+            if self.closed:
+                break
+            with self.lock:
+                self.state[name] = "loading"
+            started = time.perf_counter()
+            try:
+                result = load()
+            except Exception as e:
+                with self.lock:
+                    self.state[name] = "failed"
+                    self.errors[name] = str(e)
+                continue
+            with self.lock:
+                self.seconds[name] = time.perf_counter() - started
+                self.state[name] = "ready"
+                if not self.closed:
+                    self.results[name] = result
+                    continue
+            if release:
+                release(result)  # Closed while loading
+
+    def done(self, name):
+        """True once the loader finished, successfully or not"""
+        return self.state.get(name) in ("ready", "failed")
+
+    def take(self, name):
+        """The loaded object (once), or None if it is not ready or failed"""
+        with self.lock:
+            return self.results.pop(name, None)
+
+    def summary(self):
+        """(readiness text, all finished) for display"""
+        lines = []
+        with self.lock:
+            for name, _, _, label in self.tasks:
+                state = self.state[name]
+                if state == "ready":
+                    lines.append(f"{label}: ready ({self.seconds[name]:.1f}s)")
+                elif state == "failed":
+                    lines.append(f"{label}: unavailable ({self.errors[name]})")
+                else:
+                    lines.append(f"{label}: loading...")
+            finished = all(self.done(name) for name, _, _, _ in self.tasks)
+        return "\n".join(lines), finished
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            leftovers, self.results = self.results, {}
+        for name, _, release, _ in self.tasks:
+            if name in leftovers and release:
+                release(leftovers[name])
+
+
+# ===================== Tracking loaders =====================
+def load_tracking_worker(options, source=0):
+    """Tracking process with modules, FaceMesh graph and camera already up"""
+    import trackworker
+    worker = trackworker.TrackingWorker(source, options, warm=True).start()
+    if not worker.wait_ready(READY_TIMEOUT):
+        error = worker.error or "timed out"
+        worker.stop()
+        raise RuntimeError(error)
+    return worker
+
+
+def load_tracking_engine(options, source=0):
+    """(FaceMesh, open camera) for in-process tracking, first inference done"""
+    import cv2
+    import capture
+    import eyehead
+    face_mesh = eyehead.create_face_mesh(options.get("refine_landmarks", True))
+    cap = capture.watch_camera(source, face_mesh)
+    ret, frame = cap.read()
+    if not ret:
+        cap.release()
+        raise RuntimeError("camera not available")
+    face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))  # Builds the inference graph
+    return face_mesh, cap
+
+
+def release_tracking_engine(engine):
+    face_mesh, cap = engine
+    cap.release()
+
+
+# ===================== Audio loaders =====================
+def load_audio_stream():
+    """(PyAudio, input stream) on the default microphone, already open.
+
+    PortAudio's device scan and stream start take a noticeable moment on
+    first use, so the exam's audio monitor is handed an open stream.
+    """
+    import sound
+    return sound.open_stream()
+
+
+def release_audio_stream(audio):
+    import sound
+    sound.close_stream(audio)